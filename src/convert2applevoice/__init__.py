@@ -1,6 +1,14 @@
 """Convert2ApplePVoice package."""
 
-from .main import main
-
 __version__ = "0.1.0"
 __all__ = ["main"]
+
+
+def __getattr__(name):
+    # Import the CLI lazily so light entry points (e.g. the daemon client)
+    # do not pay for rich and the TTS engines
+    if name == "main":
+        from .main import main
+        globals()["main"] = main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,8 +1,16 @@
 """Audio device management for Convert2ApplePVoice."""
 
+import io
+import os
+import shutil
 import subprocess
+import tempfile
+import threading
+import wave
 from typing import Optional, List, Dict, Tuple
 
+from .cancel import CancellationToken
+
 class AudioManager:
     """Manages audio device selection and routing."""
     
@@ -38,7 +46,36 @@ class AudioManager:
             print(f"Error getting audio devices: {str(e)}")
         
         return devices
-    
+
+    @staticmethod
+    def get_device_format(device_name: str) -> Optional[Tuple[int, int]]:
+        """Get the current sample rate and output channel count of a device.
+
+        Args:
+            device_name: Name of the output device
+
+        Returns:
+            Optional[Tuple[int, int]]: (sample_rate, channels), or None if
+            the device is not found
+        """
+        if not shutil.which("system_profiler"):
+            return None
+        try:
+            cmd = ["system_profiler", "SPAudioDataType", "-json"]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode == 0:
+                import json
+                data = json.loads(result.stdout)
+                for item in data.get("SPAudioDataType", []):
+                    for dev in item.get("_items", []):
+                        if dev.get("_name") == device_name and "coreaudio_device_srate" in dev:
+                            return (int(dev["coreaudio_device_srate"]),
+                                    int(dev.get("coreaudio_device_output", 2)))
+        except Exception as e:
+            print(f"Error getting audio device format: {str(e)}")
+
+        return None
+
     @staticmethod
     def set_default_input_device(device_name: str) -> bool:
         """Set the default system input device.
@@ -156,3 +193,120 @@ class AudioManager:
             
         except Exception as e:
             return False, f"Error setting up audio routing: {str(e)}"
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int, channels: int = 1, sample_width: int = 2) -> bytes:
+    """Wrap raw PCM samples in a WAV container.
+
+    Args:
+        pcm: Raw little-endian PCM samples
+        sample_rate: Sample rate in Hz
+        channels: Number of interleaved channels
+        sample_width: Bytes per sample
+
+    Returns:
+        bytes: WAV file contents
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(sample_width)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class AudioPlayer:
+    """Plays WAV audio through the default output device.
+
+    Uses ``afplay`` on macOS and ``paplay``/``aplay`` elsewhere, so the
+    audio follows the same routing as the ``say`` command.
+    """
+
+    PLAYERS = ["afplay", "paplay", "aplay"]
+
+    # Seconds to wait for the player to exit on SIGTERM before killing it
+    STOP_TIMEOUT = 0.02
+
+    def __init__(self):
+        """Initialize the player."""
+        self._process: Optional[subprocess.Popen] = None
+        self._path: Optional[str] = None
+        self._lock = threading.Lock()
+        self._command = next((p for p in self.PLAYERS if shutil.which(p)), None)
+
+    def play(self, audio: bytes, block: bool = False,
+             token: Optional[CancellationToken] = None) -> bool:
+        """Play WAV audio.
+
+        Args:
+            audio: WAV file contents
+            block: Wait for playback to finish
+            token: Stops playback when cancelled
+
+        Returns:
+            bool: True if playback started, False otherwise
+        """
+        self.stop()
+        if not self._command:
+            print("Error playing audio: no audio player found")
+            return False
+        if token is not None and token.cancelled:
+            return False
+
+        path = None
+        try:
+            fd, path = tempfile.mkstemp(suffix=".wav")
+            with os.fdopen(fd, 'wb') as f:
+                f.write(audio)
+            process = subprocess.Popen(
+                [self._command, path],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except Exception as e:
+            print(f"Error playing audio: {str(e)}")
+            self._remove(path)
+            return False
+
+        with self._lock:
+            self._process, self._path = process, path
+        if token is not None:
+            # Only stop this playback, not whatever plays after it
+            token.on_cancel(lambda: self._stop_process(process))
+        if block:
+            process.wait()
+            self._stop_process(process)
+        return True
+
+    def is_playing(self) -> bool:
+        """Check if audio is currently playing."""
+        process = self._process
+        return process is not None and process.poll() is None
+
+    def stop(self) -> None:
+        """Stop playback and release the temporary file."""
+        self._stop_process(self._process)
+
+    def _stop_process(self, process: Optional[subprocess.Popen]):
+        with self._lock:
+            if process is None or process is not self._process:
+                return
+            path = self._path
+            self._process = self._path = None
+        if process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(self.STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self._remove(path)
+
+    @staticmethod
+    def _remove(path: Optional[str]):
+        if path:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
@@ -0,0 +1,171 @@
+"""Benchmarking of TTS engines and voices."""
+
+import io
+import statistics
+import time
+import wave
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional
+
+from .tts.base import TTSEngine
+
+# Short, medium and long prompts in the style of the Personal Voice phrase set
+STANDARD_PHRASES = [
+    "Good morning.",
+    "Could you pass me the salt, please?",
+    "The weather forecast says it will rain later this afternoon, so take an umbrella.",
+    "When I was younger, we used to spend every summer at my grandparents' farm, "
+    "feeding the chickens and picking strawberries until our hands were stained red.",
+]
+
+
+def audio_duration(audio: bytes) -> float:
+    """Get the duration of WAV audio in seconds.
+
+    Args:
+        audio: WAV file contents
+
+    Returns:
+        float: Duration in seconds, or 0 if the audio cannot be parsed
+    """
+    try:
+        with wave.open(io.BytesIO(audio)) as wav:
+            return wav.getnframes() / float(wav.getframerate())
+    except (wave.Error, EOFError):
+        return 0.0
+
+
+@dataclass
+class BenchResult:
+    """Timings for one engine and voice over a set of runs."""
+    engine: str
+    voice: Optional[str]
+    kind: str
+    streaming: bool = False
+    runs: int = 0
+    errors: int = 0
+    init_time: float = 0.0
+    ttfb: List[float] = field(default_factory=list)
+    total: List[float] = field(default_factory=list)
+    rtf: List[float] = field(default_factory=list)
+    output_bytes: List[int] = field(default_factory=list)
+
+    @property
+    def error_rate(self) -> float:
+        return self.errors / self.runs if self.runs else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """Mean of each measurement, for tables and JSON output."""
+        def mean(values):
+            return statistics.fmean(values) if values else None
+
+        return {
+            'engine': self.engine,
+            'voice': self.voice,
+            'kind': self.kind,
+            'streaming': self.streaming,
+            'runs': self.runs,
+            'init_time': self.init_time,
+            'ttfb': mean(self.ttfb),
+            'total': mean(self.total),
+            'rtf': mean(self.rtf),
+            'output_bytes': mean(self.output_bytes),
+            'error_rate': self.error_rate,
+        }
+
+
+def _time_synthesis(tts: TTSEngine, text: str, result: BenchResult):
+    result.runs += 1
+    started = time.monotonic()
+    first_chunk = None
+    chunks = []
+    try:
+        for chunk in tts.synthesize_stream(text):
+            if first_chunk is None:
+                first_chunk = time.monotonic() - started
+            chunks.append(chunk)
+    except Exception as e:
+        print(f"Error benchmarking {result.engine}: {str(e)}")
+        result.errors += 1
+        return
+
+    total = time.monotonic() - started
+    audio = b"".join(chunks)
+    if not audio:
+        result.errors += 1
+        return
+
+    duration = audio_duration(audio)
+    # A non-streaming engine yields the whole render at once, so its TTFB is
+    # the total time; ``streaming`` records which one was measured
+    result.streaming = tts.supports_streaming
+    result.ttfb.append(first_chunk)
+    result.total.append(total)
+    result.output_bytes.append(len(audio))
+    if duration:
+        result.rtf.append(total / duration)
+
+
+def _close(tts: TTSEngine):
+    if hasattr(tts, 'close'):
+        tts.close()
+
+
+def benchmark_engine(engine: str, voice: Optional[str],
+                     factory: Callable[[str, Optional[str]], Optional[TTSEngine]],
+                     phrases: Optional[List[str]] = None,
+                     warm_runs: int = 3) -> List[BenchResult]:
+    """Benchmark one engine and voice.
+
+    Cold runs render each phrase on a freshly created engine; warm runs
+    then repeat the phrase set on the last of them. Time to first byte
+    equals the total render time for engines that do not stream, which
+    the results flag with ``streaming``. Every engine is closed once
+    its runs are done.
+
+    Args:
+        engine: Engine name
+        voice: Voice to use, or None for the engine default
+        factory: Function creating an engine from a name and voice
+        phrases: Phrases to render (defaults to STANDARD_PHRASES)
+        warm_runs: Number of warm passes over the phrase set
+
+    Returns:
+        List[BenchResult]: Cold and warm results
+    """
+    phrases = phrases or STANDARD_PHRASES
+    cold = BenchResult(engine, voice, 'cold')
+    warm = BenchResult(engine, voice, 'warm')
+
+    tts = None
+    init_times = []
+    for i, text in enumerate(phrases):
+        started = time.monotonic()
+        try:
+            tts = factory(engine, voice)
+        except Exception as e:
+            print(f"Error creating {engine}: {str(e)}")
+            tts = None
+        init_times.append(time.monotonic() - started)
+
+        if tts is None:
+            cold.runs += 1
+            cold.errors += 1
+            continue
+        _time_synthesis(tts, text, cold)
+        if i + 1 < len(phrases):
+            _close(tts)
+            tts = None
+
+    cold.init_time = statistics.fmean(init_times)
+    if tts is None:
+        return [cold]
+
+    try:
+        for _ in range(warm_runs):
+            for text in phrases:
+                _time_synthesis(tts, text, warm)
+    finally:
+        _close(tts)
+
+    return [cold, warm]
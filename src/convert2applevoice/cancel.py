@@ -0,0 +1,76 @@
+"""Cancellation tokens for abandoning in-flight synthesis and playback.
+
+A token is created for each unit of work (a spoken phrase, a prefetch
+render) and handed to every layer doing that work. Cancelling it runs
+the registered callbacks immediately, so a playback process is killed
+or a queued request dropped without waiting for the next poll.
+"""
+
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class CancelledError(Exception):
+    """Raised when work is abandoned because its token was cancelled."""
+
+
+class CancellationToken:
+    """A one-shot cancellation signal shared between threads."""
+
+    def __init__(self):
+        """Initialize an uncancelled token."""
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+        self.cancelled_at: Optional[float] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self):
+        """Cancel the token and run its callbacks. Later calls do nothing."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.cancelled_at = time.monotonic()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in cancellation callback: {str(e)}")
+
+    def on_cancel(self, callback: Callable[[], None]):
+        """Register a callback to run on cancellation.
+
+        The callback runs immediately if the token is already cancelled.
+
+        Args:
+            callback: Function called with no arguments
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def raise_if_cancelled(self):
+        """Raise CancelledError if the token has been cancelled."""
+        if self._event.is_set():
+            raise CancelledError("Cancelled")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the token is cancelled or ``timeout`` elapses.
+
+        Returns:
+            bool: True if the token was cancelled
+        """
+        return self._event.wait(timeout)
+
+    def sleep(self, seconds: float):
+        """Sleep, waking early with CancelledError if the token is cancelled."""
+        if self._event.wait(seconds):
+            raise CancelledError("Cancelled")
@@ -0,0 +1,358 @@
+"""Clause-level chunked synthesis for long prompts.
+
+Rendering a long sentence in one request means nothing plays until the
+whole sentence is synthesized. ``ChunkedTTS`` splits prompts at clause
+and punctuation boundaries, starts playing the first clause as soon as
+it is rendered and renders each following clause while the previous
+one plays. For batch rendering the clauses are joined into one file
+with short pauses at punctuation and crossfades where a clause had to
+be split mid-sentence.
+
+Live, each clause is handed to the engine's player separately, so the
+player's start-up time adds to every pause and the pauses are only
+approximate. Separate players cannot overlap either, so a crossfade is
+played as a fade-out at the end of one clause and a fade-in at the
+start of the next.
+"""
+
+import io
+import re
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio import pcm_to_wav
+from .cancel import CancellationToken, CancelledError
+from .tts.base import TTSEngine, PRIORITY_LIVE
+
+# Punctuation ending a clause, when followed by whitespace or the end of the text
+BOUNDARY = re.compile(r'([.!?…]+["\'”’)\]]*|[,;:]|\s[—–-])(?=\s|$)')
+
+# Samples quieter than this are trimmed from the ends of each chunk
+SILENCE_THRESHOLD = 300
+
+# Upper bounds of the prompt length buckets time-to-first-audio is reported in
+LENGTH_BUCKETS = (40, 80, 160, 320)
+
+
+@dataclass
+class Chunk:
+    """A piece of a prompt and the kind of boundary that ends it.
+
+    ``boundary`` is 'sentence' or 'clause' after punctuation, 'word'
+    where a long clause was split at a space, and 'end' for the last
+    chunk.
+    """
+    text: str
+    boundary: str
+
+
+def split_clauses(text: str, max_chars: int = 120, min_chars: int = 20) -> List[Chunk]:
+    """Split text into chunks at clause and punctuation boundaries.
+
+    Pieces shorter than ``min_chars`` are merged with the next one, so
+    abbreviations and short interjections do not become separate
+    requests. Pieces longer than ``max_chars`` are split at the last
+    space that fits.
+
+    Args:
+        text: Text to split
+        max_chars: Longest chunk to render in one request
+        min_chars: Shortest chunk to render on its own
+
+    Returns:
+        List[Chunk]: Chunks in order, the last with boundary 'end'
+    """
+    pieces: List[Chunk] = []
+    start = 0
+    for match in BOUNDARY.finditer(text):
+        piece = text[start:match.end()].strip()
+        if piece:
+            kind = 'sentence' if match.group(1)[0] in '.!?…' else 'clause'
+            pieces.append(Chunk(piece, kind))
+        start = match.end()
+    if text[start:].strip():
+        pieces.append(Chunk(text[start:].strip(), 'end'))
+
+    merged: List[Chunk] = []
+    pending = ""
+    for piece in pieces:
+        pending = f"{pending} {piece.text}".strip()
+        if len(pending) >= min_chars:
+            merged.append(Chunk(pending, piece.boundary))
+            pending = ""
+    if pending:
+        if merged:
+            merged[-1] = Chunk(f"{merged[-1].text} {pending}", pieces[-1].boundary)
+        else:
+            merged.append(Chunk(pending, pieces[-1].boundary))
+
+    chunks: List[Chunk] = []
+    for chunk in merged:
+        rest = chunk.text
+        while len(rest) > max_chars:
+            cut = rest.rfind(' ', 0, max_chars + 1)
+            if cut <= 0:
+                break
+            chunks.append(Chunk(rest[:cut], 'word'))
+            rest = rest[cut + 1:]
+        chunks.append(Chunk(rest, chunk.boundary))
+    if chunks:
+        chunks[-1].boundary = 'end'
+    return chunks
+
+
+def _read_wav(audio: bytes) -> Tuple[np.ndarray, int, int]:
+    with wave.open(io.BytesIO(audio)) as wav:
+        rate, channels = wav.getframerate(), wav.getnchannels()
+        pcm = wav.readframes(wav.getnframes())
+    return np.frombuffer(pcm, dtype='<i2').reshape(-1, channels), rate, channels
+
+
+def trim_silence(samples: np.ndarray, threshold: int = SILENCE_THRESHOLD) -> np.ndarray:
+    """Remove leading and trailing silence from (frames, channels) samples."""
+    loud = np.flatnonzero(np.abs(samples).max(axis=1) > threshold)
+    if not len(loud):
+        return samples[:0]
+    return samples[loud[0]:loud[-1] + 1]
+
+
+def join_chunks(chunks: List[bytes], gaps: List[float]) -> bytes:
+    """Join rendered chunks with silence or crossfades between them.
+
+    Args:
+        chunks: WAV renders in order, all at the same rate and layout
+        gaps: Seconds between consecutive chunks, one fewer than
+            ``chunks``; positive values insert silence, negative values
+            overlap the chunks with a linear crossfade
+
+    Returns:
+        bytes: A single WAV file
+    """
+    parts = [_read_wav(audio) for audio in chunks]
+    _, rate, channels = parts[0]
+    output = trim_silence(parts[0][0]).astype(np.float32)
+    for (samples, _, _), gap in zip(parts[1:], gaps):
+        samples = trim_silence(samples).astype(np.float32)
+        frames = int(round(abs(gap) * rate))
+        if gap >= 0:
+            output = np.concatenate([output, np.zeros((frames, channels), np.float32), samples])
+            continue
+        frames = min(frames, len(output), len(samples))
+        fade = np.linspace(0.0, 1.0, frames, dtype=np.float32)[:, None]
+        overlap = output[len(output) - frames:] * (1 - fade) + samples[:frames] * fade
+        output = np.concatenate([output[:len(output) - frames], overlap, samples[frames:]])
+    pcm = np.clip(np.round(output), -32768, 32767).astype('<i2').tobytes()
+    return pcm_to_wav(pcm, rate, channels)
+
+
+class ChunkedTTS(TTSEngine):
+    """Wraps an engine to render and play long prompts clause by clause."""
+
+    def __init__(self, tts: TTSEngine, max_chars: int = 120, min_chars: int = 20,
+                 sentence_pause: float = 0.25, clause_pause: float = 0.1,
+                 crossfade: float = 0.02):
+        """Initialize the wrapper.
+
+        Args:
+            tts: Engine that renders and plays each chunk
+            max_chars: Longest chunk to render in one request
+            min_chars: Shortest chunk to render on its own
+            sentence_pause: Seconds of silence after a sentence
+            clause_pause: Seconds of silence after a comma, colon,
+                semicolon or dash
+            crossfade: Seconds of overlap where a clause was split at a
+                space
+        """
+        self.tts = tts
+        self.max_chars = max_chars
+        self.min_chars = min_chars
+        self.gaps = {'sentence': sentence_pause, 'clause': clause_pause, 'word': -crossfade}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.phrases = 0
+        self.chunks = 0
+        # (prompt length, seconds until its first chunk started playing)
+        self.timings: List[Tuple[int, float]] = []
+
+    def split(self, text: str) -> List[Chunk]:
+        """Split text into chunks using this wrapper's limits."""
+        return split_clauses(text, self.max_chars, self.min_chars)
+
+    def synthesize(self, text: str, priority: int = PRIORITY_LIVE,
+                   token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        """Render text to a single WAV file, clause by clause.
+
+        Args:
+            text: Text to render
+            priority: Scheduling priority passed to the engine
+            token: Cancels the render between and during chunks
+
+        Returns:
+            Optional[bytes]: WAV file contents, or None on failure
+
+        Raises:
+            CancelledError: If ``token`` was cancelled
+        """
+        chunks = self.split(text)
+        if len(chunks) < 2:
+            return self.tts.synthesize(text, priority=priority, token=token)
+        renders = []
+        for chunk in chunks:
+            audio = self.tts.synthesize(chunk.text, priority=priority, token=token)
+            if audio is None:
+                return None
+            renders.append(audio)
+        with self._lock:
+            self.chunks += len(chunks)
+        return join_chunks(renders, [self.gaps[chunk.boundary] for chunk in chunks[:-1]])
+
+    def speak(self, text: str) -> bool:
+        """Speak text, playing each clause while the next one renders.
+
+        Returns once the first chunk has started playing; the rest play
+        in the background until finished or stopped. Engines that cannot
+        render audio speak the whole text themselves.
+
+        Args:
+            text: Text to speak
+
+        Returns:
+            bool: True if playback started, False otherwise
+        """
+        token = self._start_utterance()
+        started = time.monotonic()
+        chunks = self.split(text) or [Chunk(text, 'end')]
+        first = threading.Event()
+        result = {'started': False}
+        self._thread = threading.Thread(
+            target=self._play_chunks, args=(text, chunks, token, started, first, result),
+            name="chunked-speech", daemon=True)
+        self._thread.start()
+        first.wait()
+        if not result['started'] and not token.cancelled:
+            # The engine cannot render ahead of playback; let it speak directly
+            return self.tts.speak(text)
+        return result['started']
+
+    def _play_chunks(self, text: str, chunks: List[Chunk], token: CancellationToken,
+                     started: float, first: threading.Event, result: Dict[str, bool]):
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="chunk-render")
+        try:
+            pending = executor.submit(self.tts.synthesize, chunks[0].text, PRIORITY_LIVE, token)
+            fade_in = 0.0
+            for i, chunk in enumerate(chunks):
+                audio = pending.result()
+                last = i + 1 == len(chunks)
+                if audio is None and i > 0:
+                    # Rather than dropping the rest of the prompt, render it whole
+                    print(f"Error rendering chunk {i + 1} of {len(chunks)}, "
+                          "rendering the rest of the prompt in one request")
+                    chunk = Chunk(" ".join(c.text for c in chunks[i:]), 'end')
+                    audio = self.tts.synthesize(chunk.text, PRIORITY_LIVE, token)
+                    if audio is None:
+                        print("Error rendering the rest of the prompt")
+                    last = True
+                if audio is None:
+                    break
+                # Render the next chunk while this one plays
+                if not last:
+                    pending = executor.submit(self.tts.synthesize, chunks[i + 1].text,
+                                              PRIORITY_LIVE, token)
+                gap = self.gaps.get(chunk.boundary, 0.0)
+                if len(chunks) > 1:
+                    audio = self._shape(audio, gap, trim_start=i > 0, fade_in=fade_in)
+                fade_in = max(-gap, 0.0)
+                token.raise_if_cancelled()
+                if i == 0:
+                    with self._lock:
+                        self.phrases += 1
+                        self.timings.append((len(text), time.monotonic() - started))
+                    result['started'] = True
+                    first.set()
+                with self._lock:
+                    self.chunks += 1
+                if not self.tts.play_audio(audio, block=True, token=token) or last:
+                    break
+        except CancelledError:
+            pass  # Interrupted by stop() or the next phrase
+        except Exception as e:
+            print(f"Error in chunked speech: {str(e)}")
+        finally:
+            first.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    @staticmethod
+    def _shape(audio: bytes, gap: float, trim_start: bool, fade_in: float = 0.0) -> bytes:
+        # Trim the engine's own padding so the gap between chunks is the
+        # configured pause; a negative gap fades the chunk out instead,
+        # and ``fade_in`` fades in the chunk after one
+        samples, rate, channels = _read_wav(audio)
+        loud = np.flatnonzero(np.abs(samples).max(axis=1) > SILENCE_THRESHOLD)
+        if not len(loud):
+            return audio
+        samples = samples[loud[0] if trim_start else 0:loud[-1] + 1].astype(np.float32)
+        if fade_in > 0:
+            frames = min(len(samples), int(round(fade_in * rate)))
+            samples[:frames] *= np.linspace(0.0, 1.0, frames, dtype=np.float32)[:, None]
+        if gap < 0:
+            frames = min(len(samples), int(round(-gap * rate)))
+            samples[len(samples) - frames:] *= np.linspace(1.0, 0.0, frames,
+                                                           dtype=np.float32)[:, None]
+        padding = np.zeros((int(round(max(gap, 0.0) * rate)), channels), dtype=np.float32)
+        pcm = np.round(np.concatenate([samples, padding])).astype('<i2').tobytes()
+        return pcm_to_wav(pcm, rate, channels)
+
+    def play_audio(self, audio: bytes, block: bool = False,
+                   token: Optional[CancellationToken] = None) -> bool:
+        """Play audio through the wrapped engine."""
+        return self.tts.play_audio(audio, block=block, token=token)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get chunk counts and time-to-first-audio by prompt length.
+
+        Returns:
+            Dict[str, Any]: 'phrases', 'chunks' and 'ttfa', a list of
+            {'min_chars', 'max_chars', 'phrases', 'mean'} per non-empty
+            length bucket ('max_chars' is None for the open-ended last
+            bucket)
+        """
+        with self._lock:
+            timings = list(self.timings)
+            stats = {'phrases': self.phrases, 'chunks': self.chunks, 'ttfa': []}
+        lower = 0
+        for upper in LENGTH_BUCKETS + (None,):
+            seconds = [t for length, t in timings
+                       if length > lower and (upper is None or length <= upper)]
+            if seconds:
+                stats['ttfa'].append({'min_chars': lower + 1, 'max_chars': upper,
+                                      'phrases': len(seconds),
+                                      'mean': sum(seconds) / len(seconds)})
+            lower = upper
+        return stats
+
+    def get_available_voices(self) -> list[str]:
+        return self.tts.get_available_voices()
+
+    def get_voice_details(self) -> list[Dict[str, Any]]:
+        return self.tts.get_voice_details()
+
+    def is_speaking(self) -> bool:
+        thread = self._thread
+        return bool(thread and thread.is_alive()) or self.tts.is_speaking()
+
+    def stop(self) -> None:
+        """Stop the current phrase and any chunks still to play."""
+        self.cancel()
+        self.tts.stop()
+
+    def close(self):
+        """Stop speech and release the wrapped engine."""
+        self.stop()
+        if hasattr(self.tts, 'close'):
+            self.tts.close()
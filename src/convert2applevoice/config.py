@@ -36,7 +36,9 @@ class Config:
         self.audio = config.get('audio', {
             'output_device': 'BlackHole 2ch',
             'enable_monitoring': True,
-            'monitoring_device': None
+            'monitoring_device': None,
+            'sample_rate': None,
+            'channels': None
         })
         
         # OCR settings
@@ -52,6 +54,109 @@ class Config:
         # Timing settings
         self.check_interval = config.get('check_interval', 0.5)  # seconds
         self.retry_delay = config.get('retry_delay', 1.0)  # seconds
+
+        # Cloud provider rate limits, overriding the built-in defaults per provider
+        self.rate_limits = config.get('rate_limits', {})
+        self.usage_file = config.get('usage_file', '~/.config/convert2applevoice/usage.json')
+        
+        # Prompt stability gate
+        self.stability = config.get('stability', {
+            'enabled': True,
+            'min_frames': 2,
+            'min_ms': 0,
+            'confidence_threshold': None
+        })
+        
+        # Process-per-stage pipeline
+        self.pipeline = config.get('pipeline', {
+            'slots': 4,
+            'slot_size_mb': 4,
+            'queue_size': 8
+        })
+        
+        # Persistent synthesis worker processes
+        self.workers = config.get('workers', {
+            'enabled': False,
+            'size': 1,
+            'max_jobs': 500,
+            'health_interval': 10
+        })
+        
+        # Render farm queue
+        self.farm = config.get('farm', {
+            'db': '~/.cache/convert2applevoice/farm.db',
+            'output_dir': '~/.cache/convert2applevoice/renders',
+            'lease_seconds': 60,
+            'max_attempts': 3
+        })
+
+        # Clause-level chunking of long prompts
+        self.chunking = config.get('chunking', {
+            'enabled': False,
+            'max_chars': 120,
+            'min_chars': 20,
+            'sentence_pause_ms': 250,
+            'clause_pause_ms': 100,
+            'crossfade_ms': 20
+        })
+        
+        # Daemon control socket
+        self.daemon = config.get('daemon', {
+            'socket': '~/.cache/convert2applevoice/daemon.sock'
+        })
+        
+        # Voice catalogue cache
+        self.voice_cache = config.get('voice_cache', {
+            'path': '~/.cache/convert2applevoice/voices.json',
+            'ttl_hours': 24
+        })
+        
+        # Prefetch settings
+        self.prefetch = config.get('prefetch', {
+            'enabled': False,
+            'phrase_list': None,
+            'depth': 2,
+            'buffer_size': 8
+        })
+        
+        # Benchmark settings: engine name -> voices to benchmark (null = engine default)
+        self.bench = config.get('bench', {
+            'engines': {self.tts_engine: [self.tts_voice]},
+            'warm_runs': 3
+        })
+        
+        # Soak-test settings
+        self.soak = config.get('soak', {
+            'limits': {
+                'max_rss_growth_mb': 50.0,
+                'max_traced_growth_mb': 20.0,
+                'max_fd_growth': 10,
+                'max_child_processes': 2
+            }
+        })
+        
+    def validate_voice(self, catalogue) -> Optional[str]:
+        """Check that ``tts_voice`` exists for ``tts_engine``.
+        
+        Args:
+            catalogue: VoiceCatalogue to look the voice up in
+            
+        Returns:
+            Optional[str]: A warning message, or None if the voice is valid
+            or the engine's voices are not cached yet
+        """
+        if not self.tts_voice or self.tts_engine not in catalogue.engines():
+            return None
+        if catalogue.find(self.tts_engine, self.tts_voice):
+            return None
+        
+        message = f"Voice '{self.tts_voice}' not found for engine '{self.tts_engine}'"
+        # Suggest voices for the same locale when the voice id contains one
+        locale = '-'.join(self.tts_voice.replace('_', '-').split('-')[:2])
+        suggestions = [v.id for v in catalogue.query(engine=self.tts_engine, locale=locale)][:5]
+        if suggestions:
+            message += f" (available for {locale}: {', '.join(suggestions)})"
+        return message
         
     def _create_default_config(self):
         """Create default configuration file."""
@@ -69,7 +174,9 @@ class Config:
             'audio': {
                 'output_device': 'BlackHole 2ch',
                 'enable_monitoring': True,
-                'monitoring_device': None
+                'monitoring_device': None,
+                'sample_rate': None,
+                'channels': None
             },
             'ocr': {
                 'region': {
@@ -81,6 +188,66 @@ class Config:
             },
             'check_interval': 0.5,  # seconds
             'retry_delay': 1.0,  # seconds
+            'rate_limits': {},
+            'usage_file': '~/.config/convert2applevoice/usage.json',
+            'stability': {
+                'enabled': True,
+                'min_frames': 2,
+                'min_ms': 0,
+                'confidence_threshold': None
+            },
+            'pipeline': {
+                'slots': 4,
+                'slot_size_mb': 4,
+                'queue_size': 8
+            },
+            'workers': {
+                'enabled': False,
+                'size': 1,
+                'max_jobs': 500,
+                'health_interval': 10
+            },
+            'farm': {
+                'db': '~/.cache/convert2applevoice/farm.db',
+                'output_dir': '~/.cache/convert2applevoice/renders',
+                'lease_seconds': 60,
+                'max_attempts': 3
+            },
+            'chunking': {
+                'enabled': False,
+                'max_chars': 120,
+                'min_chars': 20,
+                'sentence_pause_ms': 250,
+                'clause_pause_ms': 100,
+                'crossfade_ms': 20
+            },
+            'daemon': {
+                'socket': '~/.cache/convert2applevoice/daemon.sock'
+            },
+            'voice_cache': {
+                'path': '~/.cache/convert2applevoice/voices.json',
+                'ttl_hours': 24
+            },
+            'prefetch': {
+                'enabled': False,
+                'phrase_list': None,
+                'depth': 2,
+                'buffer_size': 8
+            },
+            'bench': {
+                'engines': {
+                    'azure': ['en-GB-SoniaNeural']
+                },
+                'warm_runs': 3
+            },
+            'soak': {
+                'limits': {
+                    'max_rss_growth_mb': 50.0,
+                    'max_traced_growth_mb': 20.0,
+                    'max_fd_growth': 10,
+                    'max_child_processes': 2
+                }
+            },
         }
         
         with open(self.config_file, 'w') as f:
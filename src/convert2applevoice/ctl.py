@@ -0,0 +1,113 @@
+"""Thin command-line client for the Convert2ApplePVoice daemon.
+
+Kept free of the package's heavier imports so that each command costs
+little more than interpreter start-up:
+
+    python -m convert2applevoice.ctl speak "Hello there"
+"""
+
+import argparse
+import json
+import socket
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_SOCKET = '~/.cache/convert2applevoice/daemon.sock'
+
+COMMANDS = ['start', 'pause', 'resume', 'speak', 'stats', 'reload', 'shutdown']
+
+
+class DaemonError(Exception):
+    """Raised for failed daemon requests."""
+
+
+class DaemonClient:
+    """Thin client for the daemon's control socket."""
+
+    def __init__(self, socket_path: str = DEFAULT_SOCKET, timeout: float = 30.0):
+        """Initialize the client.
+
+        Args:
+            socket_path: Filesystem path of the Unix socket
+            timeout: Seconds to wait for a response
+        """
+        self.socket_path = str(Path(socket_path).expanduser())
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._file = None
+
+    def _connect(self):
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(self.timeout)
+            try:
+                self._sock.connect(self.socket_path)
+            except OSError as e:
+                self._sock = None
+                raise DaemonError(f"Cannot connect to daemon at {self.socket_path}: {e}")
+            self._file = self._sock.makefile('rwb')
+
+    def request(self, cmd: str, **params: Any) -> Dict[str, Any]:
+        """Send a command and wait for its response.
+
+        The connection is kept open, so repeated requests avoid
+        reconnecting.
+
+        Args:
+            cmd: Command name
+            **params: Command parameters, e.g. ``text`` for speak
+
+        Returns:
+            Dict[str, Any]: The daemon's response
+
+        Raises:
+            DaemonError: If the daemon cannot be reached or the command fails
+        """
+        self._connect()
+        self._file.write((json.dumps({'cmd': cmd, **params}) + '\n').encode('utf-8'))
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            self.close()
+            raise DaemonError("Daemon closed the connection")
+        response = json.loads(line)
+        if not response.get('ok'):
+            raise DaemonError(response.get('error', 'Request failed'))
+        return response
+
+    def close(self):
+        """Close the connection."""
+        if self._sock is not None:
+            self._file.close()
+            self._sock.close()
+            self._sock = None
+            self._file = None
+
+
+def main(argv=None):
+    """Send one command to the daemon and print its response."""
+    parser = argparse.ArgumentParser(prog="convert2applevoice.ctl", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="Daemon control socket")
+    parser.add_argument("command", choices=COMMANDS)
+    parser.add_argument("text", nargs="*", help="Text for the speak command")
+    args = parser.parse_args(argv)
+
+    client = DaemonClient(args.socket)
+    try:
+        params = {'text': " ".join(args.text)} if args.command == 'speak' else {}
+        response = client.request(args.command, **params)
+    except DaemonError as e:
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        client.close()
+
+    response.pop('ok', None)
+    if response:
+        print(json.dumps(response, indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Long-lived daemon that keeps engines and caches warm.
+
+The daemon owns the TTS engine, prefetcher and automation loop, and is
+controlled over a Unix socket with one JSON request per line:
+
+    {"cmd": "speak", "text": "Hello"}  ->  {"ok": true}
+    {"cmd": "stats"}                   ->  {"ok": true, "state": "running", ...}
+
+Commands: start, pause, resume, speak, stats, reload, shutdown.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from .chunking import ChunkedTTS
+from .config import Config
+from .ctl import DaemonError
+from .loop import AutomationLoop
+from .tts.base import TTSEngine
+from .tts.formats import get_format_stats
+from .tts.scheduler import configure_schedulers
+
+
+class VoiceDaemon:
+    """Keeps the automation loop and its engine warm between commands."""
+
+    def __init__(self, config: Config,
+                 tts_factory: Callable[[Config], Optional[TTSEngine]],
+                 capture_factory: Callable[[Config], Any],
+                 loop_factory: Optional[Callable[..., AutomationLoop]] = None):
+        """Initialize the daemon and create the engine.
+
+        Args:
+            config: Application configuration
+            tts_factory: Creates the TTS engine from the configuration
+            capture_factory: Creates the capture backend on first start
+            loop_factory: Creates the automation loop from a capture
+                backend and engine (defaults to a plain AutomationLoop)
+        """
+        self.config = config
+        self.tts_factory = tts_factory
+        self.capture_factory = capture_factory
+        self.loop_factory = loop_factory or (
+            lambda capture, tts, config: AutomationLoop(
+                capture, tts, check_interval=config.check_interval)
+        )
+
+        self._lock = threading.RLock()
+        # Held for the duration of a tick; never while holding _lock
+        self._ticking = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._capture = None
+        self.loop: Optional[AutomationLoop] = None
+        self.state = 'idle'
+        self.started_at = time.time()
+        self.requests = 0
+        self.phrases_pushed = 0
+        self.tts = self._create_tts()
+
+    def _create_tts(self) -> TTSEngine:
+        tts = self.tts_factory(self.config)
+        if not tts:
+            raise DaemonError(f"TTS engine '{self.config.tts_engine}' not found")
+        return tts
+
+    @staticmethod
+    def _close_tts(tts: TTSEngine):
+        tts.stop()
+        # Pooled engines own worker processes
+        if hasattr(tts, 'close'):
+            tts.close()
+
+    def _run_loop(self):
+        while not self._stopping.is_set():
+            with self._lock:
+                running = self.state == 'running'
+                loop = self.loop
+            # Tick outside the lock so commands are answered while a
+            # phrase is being synthesized
+            if running:
+                with self._ticking:
+                    try:
+                        if loop is self.loop:  # Not replaced by a reload meanwhile
+                            loop.tick()
+                    except Exception as e:
+                        print(f"Error in automation loop: {str(e)}")
+            # Sleep between ticks, waking early for state changes
+            self._wake.wait(loop.check_interval if running else None)
+            self._wake.clear()
+
+    def start(self) -> Dict[str, Any]:
+        """Start polling for prompts, creating the capture backend on first use."""
+        with self._lock:
+            if self._capture is None:
+                self._capture = self.capture_factory(self.config)
+            if self.loop is None:
+                self.loop = self.loop_factory(self._capture, self.tts, self.config)
+            self.state = 'running'
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_loop, name="daemon-loop",
+                                                daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return {'state': self.state}
+
+    def pause(self) -> Dict[str, Any]:
+        """Stop polling but keep everything warm."""
+        with self._lock:
+            if self.state == 'running':
+                self.state = 'paused'
+            tts = self.tts
+        # Cancel the tick in progress, then stop anything it started
+        tts.stop()
+        with self._ticking:
+            tts.stop()
+        return {'state': self.state}
+
+    def resume(self) -> Dict[str, Any]:
+        """Resume polling after a pause."""
+        with self._lock:
+            if self.state == 'paused':
+                self.state = 'running'
+        self._wake.set()
+        return {'state': self.state}
+
+    def speak(self, text: str) -> Dict[str, Any]:
+        """Speak a phrase pushed by another tool."""
+        if not text:
+            raise DaemonError("No text given")
+        with self._lock:
+            tts = self.tts
+        # Speak outside the lock so other requests are answered meanwhile
+        tts.speak(text)
+        with self._lock:
+            self.phrases_pushed += 1
+        return {}
+
+    def reload(self) -> Dict[str, Any]:
+        """Reload the configuration and recreate the engine and loop.
+
+        The new loop carries on from the phrase the old one last spoke, so
+        the prompt on screen is not spoken again.
+        """
+        with self._lock:
+            config = Config(str(self.config.config_file))
+            configure_schedulers(config.rate_limits, config.usage_file, config.retry_delay)
+            self.config = config
+            old_tts, self.tts = self.tts, self._create_tts()
+            old_loop = self.loop
+            if old_loop is not None:
+                self.loop = self.loop_factory(self._capture, self.tts, config)
+                self.loop.last_text = old_loop.last_text
+                if self.loop.gate and old_loop.last_text:
+                    self.loop.gate.prime(old_loop.last_text)
+
+        # Let a tick still running on the old loop finish before closing
+        # what it uses
+        old_tts.stop()
+        with self._ticking:
+            if old_loop is not None and old_loop.prefetcher:
+                old_loop.prefetcher.close()
+            self._close_tts(old_tts)
+        return {'engine': config.tts_engine, 'voice': config.tts_voice}
+
+    def stats(self) -> Dict[str, Any]:
+        """Get daemon, loop and cache statistics."""
+        with self._lock:
+            stats = {
+                'state': self.state,
+                'uptime': time.time() - self.started_at,
+                'engine': self.config.tts_engine,
+                'voice': self.config.tts_voice,
+                'requests': self.requests,
+                'phrases_pushed': self.phrases_pushed,
+            }
+            if self.loop is not None:
+                stats['iterations'] = self.loop.iterations
+                stats['phrases_spoken'] = self.loop.phrases_spoken
+                if self.loop.prefetcher:
+                    stats['prefetch'] = self.loop.prefetcher.stats()
+            if isinstance(self.tts, ChunkedTTS):
+                stats['chunking'] = self.tts.stats()
+            formats = get_format_stats()
+            if formats:
+                stats['formats'] = formats
+        return stats
+
+    def shutdown(self):
+        """Stop the loop thread and release the engine."""
+        self._stopping.set()
+        self._wake.set()
+        self.tts.stop()
+        if self._thread:
+            self._thread.join(timeout=5)
+        with self._lock:
+            self._close_tts(self.tts)
+            if self.loop is not None and self.loop.prefetcher:
+                self.loop.prefetcher.close()
+            self.state = 'stopped'
+
+    def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Dispatch a control request.
+
+        Args:
+            request: Decoded request with a 'cmd' key
+
+        Returns:
+            Dict[str, Any]: Response with 'ok' and command-specific fields
+        """
+        self.requests += 1
+        commands = {
+            'start': self.start,
+            'pause': self.pause,
+            'resume': self.resume,
+            'speak': lambda: self.speak(request.get('text', '')),
+            'stats': self.stats,
+            'reload': self.reload,
+        }
+        command = commands.get(request.get('cmd'))
+        if command is None:
+            return {'ok': False, 'error': f"Unknown command: {request.get('cmd')}"}
+        try:
+            return {'ok': True, **command()}
+        except Exception as e:
+            return {'ok': False, 'error': str(e)}
+
+
+class _ControlHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                response = {'ok': False, 'error': f"Invalid request: {str(e)}"}
+            else:
+                if request.get('cmd') == 'shutdown':
+                    self._reply({'ok': True})
+                    threading.Thread(target=self.server.shutdown, daemon=True).start()
+                    return
+                response = self.server.daemon.handle(request)
+            self._reply(response)
+
+    def _reply(self, response: Dict[str, Any]):
+        self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+
+class ControlServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Unix-socket server exposing a VoiceDaemon's commands."""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, daemon: VoiceDaemon):
+        """Bind the control socket.
+
+        Args:
+            socket_path: Filesystem path of the Unix socket
+            daemon: Daemon handling the requests
+        """
+        self.socket_path = Path(socket_path).expanduser()
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.socket_path.exists():
+            if _is_listening(self.socket_path):
+                raise DaemonError(f"A daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+        self.daemon = daemon
+        super().__init__(str(self.socket_path), _ControlHandler)
+        # Only the current user may control the daemon
+        os.chmod(self.socket_path, 0o600)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            self.socket_path.unlink()
+        except OSError:
+            pass
+
+
+def _is_listening(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(path))
+            return True
+        except OSError:
+            return False
@@ -0,0 +1,442 @@
+"""Render farm for building phrase sets across many voices.
+
+A coordinator enqueues one job per (engine, voice, phrase) into a
+SQLite database. Any number of worker processes on the same machine
+lease jobs from it. The database uses SQLite's WAL journal, which relies
+on shared memory between the processes, so it must be on a local disk,
+not a network filesystem such as NFS:
+
+- a lease lasts ``lease_seconds`` and is renewed by a heartbeat while
+  the phrase renders; a worker that dies lets its lease expire, and the
+  job is handed to another worker
+- failed jobs are retried up to ``max_attempts`` times
+- duplicate jobs are ignored on enqueue, and rendered audio is stored
+  once per content hash, so identical renders share a file
+"""
+
+import hashlib
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .cancel import CancellationToken, CancelledError
+from .tts.base import TTSEngine, PRIORITY_BACKGROUND
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    engine TEXT NOT NULL,
+    voice TEXT NOT NULL,
+    text TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_expires REAL,
+    audio_hash TEXT,
+    error TEXT,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, lease_expires);
+"""
+
+STATES = ('pending', 'leased', 'done', 'failed')
+
+
+def job_key(engine: str, voice: Optional[str], text: str) -> str:
+    """Get the deduplication key of a render job."""
+    return hashlib.sha256(f"{engine}\0{voice or ''}\0{text}".encode('utf-8')).hexdigest()
+
+
+@dataclass
+class RenderJob:
+    """A leased render job."""
+    id: int
+    engine: str
+    voice: Optional[str]
+    text: str
+    attempts: int
+
+
+class RenderQueue:
+    """SQLite-backed queue of render jobs with leases.
+
+    Each call opens its own connection, so one queue object can be
+    shared between threads and the database between processes.
+    """
+
+    def __init__(self, path: str, output_dir: str, max_attempts: int = 3):
+        """Open or create the queue.
+
+        Args:
+            path: SQLite database file
+            output_dir: Directory rendered audio is stored in
+            max_attempts: Leases a job gets before it is marked failed
+        """
+        self.path = Path(path).expanduser()
+        self.output_dir = Path(output_dir).expanduser()
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # Autocommit mode, with explicit BEGIN IMMEDIATE where reads and
+        # writes must be atomic across workers
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        try:
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, engine: str, voice: Optional[str], phrases: Iterable[str]) -> int:
+        """Add a job per phrase, skipping jobs that already exist.
+
+        Args:
+            engine: Engine name
+            voice: Voice id, or None for the engine default
+            phrases: Phrases to render
+
+        Returns:
+            int: Number of new jobs
+        """
+        rows = [(job_key(engine, voice, text), engine, voice or '', text)
+                for text in (p.strip() for p in phrases) if text]
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT OR IGNORE INTO jobs (key, engine, voice, text) VALUES (?, ?, ?, ?)", rows
+            )
+            conn.execute("COMMIT")
+            return conn.total_changes - before
+
+    def lease(self, worker: str, lease_seconds: float = 60.0,
+              prefer: Optional[Tuple[str, Optional[str]]] = None) -> Optional[RenderJob]:
+        """Lease the next pending or expired job.
+
+        Args:
+            worker: Id of the leasing worker
+            lease_seconds: Lease duration
+            prefer: (engine, voice) to take first, so a worker keeps
+                using the engine it already has warm
+
+        Returns:
+            Optional[RenderJob]: The job, or None if there is no work
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs whose lease ran out on their last attempt have failed
+                conn.execute(
+                    "UPDATE jobs SET state = 'failed', error = 'Lease expired' "
+                    "WHERE state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, self.max_attempts)
+                )
+                available = ("(state = 'pending' OR (state = 'leased' AND lease_expires < ?))")
+                row = None
+                if prefer:
+                    row = conn.execute(
+                        f"SELECT id, engine, voice, text, attempts FROM jobs WHERE {available} "
+                        "AND engine = ? AND voice = ? ORDER BY id LIMIT 1",
+                        (now, prefer[0], prefer[1] or '')
+                    ).fetchone()
+                if row is None:
+                    row = conn.execute(
+                        f"SELECT id, engine, voice, text, attempts FROM jobs WHERE {available} "
+                        "ORDER BY id LIMIT 1",
+                        (now,)
+                    ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET state = 'leased', worker = ?, lease_expires = ?, "
+                    "attempts = attempts + 1 WHERE id = ?",
+                    (worker, now + lease_seconds, row[0])
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        job_id, engine, voice, text, attempts = row
+        return RenderJob(job_id, engine, voice or None, text, attempts + 1)
+
+    def heartbeat(self, job_id: int, worker: str, lease_seconds: float = 60.0) -> bool:
+        """Extend a lease.
+
+        Returns:
+            bool: False if the worker no longer holds the lease
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND state = 'leased'",
+                (time.time() + lease_seconds, job_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def store(self, audio: bytes) -> str:
+        """Store rendered audio under its content hash.
+
+        Returns:
+            str: The content hash
+        """
+        digest = hashlib.sha256(audio).hexdigest()
+        path = self.audio_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(audio)
+            tmp.replace(path)
+        return digest
+
+    def audio_path(self, digest: str) -> Path:
+        """Get the file holding the audio with a given content hash."""
+        return self.output_dir / digest[:2] / f"{digest}.wav"
+
+    def complete(self, job_id: int, worker: str, audio: bytes) -> bool:
+        """Record a finished render.
+
+        Returns:
+            bool: False if the lease was lost and the result discarded
+        """
+        digest = self.store(audio)
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET state = 'done', audio_hash = ?, error = NULL, completed_at = ?, "
+                "lease_expires = NULL WHERE id = ? AND worker = ? AND state = 'leased'",
+                (digest, time.time(), job_id, worker)
+            )
+            return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker: str, error: str):
+        """Record a failed render, returning the job to the queue if it has attempts left."""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "error = ?, lease_expires = NULL WHERE id = ? AND worker = ? AND state = 'leased'",
+                (self.max_attempts, error, job_id, worker)
+            )
+
+    def retry_failed(self) -> int:
+        """Return failed jobs to the queue with fresh attempts.
+
+        Returns:
+            int: Number of jobs requeued
+        """
+        with self._connect() as conn:
+            return conn.execute(
+                "UPDATE jobs SET state = 'pending', attempts = 0 WHERE state = 'failed'"
+            ).rowcount
+
+    def results(self, engine: Optional[str] = None,
+                voice: Optional[str] = None) -> List[Tuple[str, str, str, Path]]:
+        """Get finished renders.
+
+        Returns:
+            List[Tuple[str, str, str, Path]]: (engine, voice, text, audio
+            file) for each finished job
+        """
+        query = "SELECT engine, voice, text, audio_hash FROM jobs WHERE state = 'done'"
+        params: List[Any] = []
+        if engine is not None:
+            query += " AND engine = ?"
+            params.append(engine)
+        if voice is not None:
+            query += " AND voice = ?"
+            params.append(voice)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY id", params).fetchall()
+        return [(e, v, text, self.audio_path(digest)) for e, v, text, digest in rows]
+
+    def progress(self, window: float = 60.0) -> Dict[str, Any]:
+        """Get queue progress for the dashboard.
+
+        Args:
+            window: Seconds over which the completion rate is measured
+
+        Returns:
+            Dict[str, Any]: Totals per state, 'voices' with per
+            (engine, voice) totals, 'workers' holding live leases and
+            'rate' of jobs completed per minute
+        """
+        now = time.time()
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT engine, voice, state, COUNT(*) FROM jobs GROUP BY engine, voice, state"
+            ).fetchall()
+            workers = [row[0] for row in conn.execute(
+                "SELECT DISTINCT worker FROM jobs WHERE state = 'leased' AND lease_expires >= ? "
+                "ORDER BY worker", (now,)
+            )]
+            recent = conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE completed_at >= ?", (now - window,)
+            ).fetchone()[0]
+
+        totals = {state: 0 for state in STATES}
+        voices: Dict[Tuple[str, str], Dict[str, int]] = {}
+        for engine, voice, state, count in rows:
+            totals[state] += count
+            voices.setdefault((engine, voice), {s: 0 for s in STATES})[state] = count
+        return {
+            **totals,
+            'total': sum(totals.values()),
+            'voices': voices,
+            'workers': workers,
+            'rate': recent * 60.0 / window,
+        }
+
+
+def default_worker_id() -> str:
+    """Get a worker id unique to this host and process."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class RenderWorker:
+    """Leases jobs from a RenderQueue and renders them.
+
+    Engines are created on first use and kept until the worker loop
+    exits, so each (engine, voice) pays its start-up cost once.
+    """
+
+    def __init__(self, queue: RenderQueue,
+                 engine_factory: Callable[[str, Optional[str]], Optional[TTSEngine]],
+                 worker_id: Optional[str] = None, lease_seconds: float = 60.0,
+                 heartbeat_interval: Optional[float] = None, poll_interval: float = 1.0):
+        """Initialize the worker.
+
+        Args:
+            queue: Queue to lease jobs from
+            engine_factory: Creates an engine from an engine name and voice
+            worker_id: Id recorded on leases (defaults to host:pid)
+            lease_seconds: Lease duration
+            heartbeat_interval: Seconds between lease renewals (defaults
+                to a third of the lease)
+            poll_interval: Seconds to wait when the queue is empty
+        """
+        self.queue = queue
+        self.engine_factory = engine_factory
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.heartbeat_interval = heartbeat_interval or lease_seconds / 3
+        self.poll_interval = poll_interval
+        self._engines: Dict[Tuple[str, Optional[str]], TTSEngine] = {}
+        self._last: Optional[Tuple[str, Optional[str]]] = None
+        self.completed = 0
+        self.failed = 0
+        self.lost = 0
+
+    def _engine(self, engine: str, voice: Optional[str]) -> TTSEngine:
+        key = (engine, voice)
+        if key not in self._engines:
+            tts = self.engine_factory(engine, voice)
+            if tts is None:
+                raise ValueError(f"TTS engine '{engine}' not found")
+            self._engines[key] = tts
+        return self._engines[key]
+
+    def close(self):
+        """Close the engines created by this worker."""
+        engines, self._engines = self._engines, {}
+        for tts in engines.values():
+            if hasattr(tts, 'close'):
+                tts.close()
+
+    def _heartbeat(self, job: RenderJob, token: CancellationToken, done: threading.Event):
+        while not done.wait(self.heartbeat_interval):
+            if not self.queue.heartbeat(job.id, self.worker_id, self.lease_seconds):
+                # Another worker has the job now; stop paying for this render
+                token.cancel()
+                return
+
+    def render(self, job: RenderJob) -> bool:
+        """Render one leased job and record the outcome.
+
+        Returns:
+            bool: True if the result was stored
+        """
+        token = CancellationToken()
+        done = threading.Event()
+        heartbeat = threading.Thread(target=self._heartbeat, args=(job, token, done),
+                                     name="farm-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            audio = self._engine(job.engine, job.voice).synthesize(
+                job.text, priority=PRIORITY_BACKGROUND, token=token
+            )
+            if audio is None:
+                raise RuntimeError(f"{job.engine} cannot render audio")
+        except CancelledError:
+            self.lost += 1
+            return False
+        except Exception as e:
+            print(f"Error rendering job {job.id}: {str(e)}")
+            self.queue.fail(job.id, self.worker_id, str(e))
+            self.failed += 1
+            return False
+        finally:
+            done.set()
+            heartbeat.join()
+
+        if not self.queue.complete(job.id, self.worker_id, audio):
+            self.lost += 1
+            return False
+        self.completed += 1
+        return True
+
+    def run(self, max_jobs: Optional[int] = None, exit_when_idle: bool = True,
+            stop_event: Optional[threading.Event] = None) -> int:
+        """Render jobs until the queue is empty or ``max_jobs`` are done.
+
+        Args:
+            max_jobs: Maximum jobs to lease, or None for no limit
+            exit_when_idle: Return when no job is available instead of
+                waiting for more to be enqueued
+            stop_event: Optional event that stops the worker when set
+
+        Returns:
+            int: Number of jobs completed
+        """
+        leased = 0
+        try:
+            while max_jobs is None or leased < max_jobs:
+                if stop_event is not None and stop_event.is_set():
+                    break
+                job = self.queue.lease(self.worker_id, self.lease_seconds, prefer=self._last)
+                if job is None:
+                    if exit_when_idle:
+                        break
+                    time.sleep(self.poll_interval)
+                    continue
+                leased += 1
+                self._last = (job.engine, job.voice)
+                self.render(job)
+        finally:
+            self.close()
+        return self.completed
+
+
+def run_worker(db_path: str, output_dir: str,
+               engine_factory: Callable[[str, Optional[str]], Optional[TTSEngine]],
+               worker_id: Optional[str] = None, lease_seconds: float = 60.0,
+               max_attempts: int = 3, exit_when_idle: bool = True) -> int:
+    """Run a render worker; usable as a ``multiprocessing`` target.
+
+    The engine factory must be picklable when run in another process.
+
+    Returns:
+        int: Number of jobs completed
+    """
+    queue = RenderQueue(db_path, output_dir, max_attempts)
+    worker = RenderWorker(queue, engine_factory, worker_id, lease_seconds)
+    return worker.run(exit_when_idle=exit_when_idle)
@@ -0,0 +1,124 @@
+"""Automation loop shared by the live CLI and the offline harnesses."""
+
+import time
+from typing import Any, Callable, Optional
+
+from rich.console import Console
+
+from .prefetch import Prefetcher
+from .stability import StabilityGate
+from .tts.base import TTSEngine
+
+
+class AutomationLoop:
+    """Polls a capture backend for prompt text and speaks each new phrase.
+
+    The capture backend is anything with an ``extract_text()`` method
+    returning the current prompt (or an empty string when Personal Voice
+    is not focused), so stand-in backends can drive the same loop.
+    """
+
+    def __init__(
+        self,
+        capture: Any,
+        tts: TTSEngine,
+        check_interval: float = 0.5,
+        console: Optional[Console] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        prefetcher: Optional[Prefetcher] = None,
+        gate: Optional[StabilityGate] = None,
+    ):
+        """Initialize the loop.
+
+        Args:
+            capture: Object providing ``extract_text() -> str``
+            tts: TTS engine used to speak new phrases
+            check_interval: Seconds to wait between ticks
+            console: Console for status messages (quiet if None)
+            sleep: Function used to wait between ticks
+            prefetcher: Optional background renderer for upcoming phrases
+            gate: Optional stability gate filtering transient prompt text
+        """
+        self.capture = capture
+        self.tts = tts
+        self.check_interval = check_interval
+        self.console = console
+        self.sleep = sleep
+        self.prefetcher = prefetcher
+        self.gate = gate
+
+        self.last_text = ""
+        self.waiting_for_focus = False
+        self.iterations = 0
+        self.phrases_spoken = 0
+
+    def _print(self, message: str):
+        if self.console:
+            self.console.print(message)
+
+    def tick(self) -> Optional[str]:
+        """Run a single capture/speak iteration.
+
+        Returns:
+            Optional[str]: The phrase that was spoken, or None
+        """
+        self.iterations += 1
+
+        # Extract text from current prompt
+        confidence = None
+        if self.gate and hasattr(self.capture, 'extract_text_with_confidence'):
+            text, confidence = self.capture.extract_text_with_confidence()
+        else:
+            text = self.capture.extract_text()
+
+        # If text is empty and we weren't previously waiting for focus
+        if not text and not self.waiting_for_focus:
+            self._print("[yellow]Waiting for Personal Voice window to be focused...[/yellow]")
+            self.waiting_for_focus = True
+        # If we have text and we were waiting for focus
+        elif text and self.waiting_for_focus:
+            self._print("[green]Personal Voice window detected![/green]")
+            self.waiting_for_focus = False
+
+        if self.gate:
+            # Only process text once it has settled after a prompt transition
+            decision = self.gate.observe(text, confidence)
+            if decision.cancel:
+                self._print("[yellow]Prompt was a transient, cancelling speech[/yellow]")
+                self.tts.stop()
+                self.last_text = ""
+            phrase = decision.emit
+        else:
+            # Only process if text has changed (new prompt)
+            phrase = text if text and text != self.last_text else None
+
+        if phrase:
+            self._print(f"[cyan]New phrase detected:[/cyan] {phrase}")
+
+            # Play prefetched audio if we predicted this phrase, else synthesize now
+            audio = self.prefetcher.take(phrase) if self.prefetcher else None
+            if self.prefetcher:
+                # Start rendering the next phrases before this one plays
+                self.prefetcher.observe(phrase)
+            if audio is not None:
+                # Cut off the previous phrase, which may still be playing
+                self.tts.stop()
+                self.tts.play_audio(audio)
+            else:
+                self.tts.speak(phrase)
+            self.last_text = phrase
+            self.phrases_spoken += 1
+            return phrase
+
+        return None
+
+    def run(self, max_iterations: Optional[int] = None):
+        """Run the loop until interrupted or ``max_iterations`` is reached.
+
+        Args:
+            max_iterations: Number of ticks to run, or None to run forever
+        """
+        while max_iterations is None or self.iterations < max_iterations:
+            self.tick()
+            if self.check_interval:
+                self.sleep(self.check_interval)  # Wait before next check
@@ -1,68 +1,634 @@
 #!/usr/bin/env python3
 """Main entry point for Convert2ApplePVoice automation."""
 
+import argparse
+import functools
+import json
 import sys
 import time
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 from rich import print
 from rich.console import Console
+from rich.table import Table
 
-from convert2applevoice.ocr import OCRExtractor
-from convert2applevoice.tts import create_engine, TTSConfig
+from convert2applevoice.tts import create_engine, get_available_engines, TTSConfig, TTSEngine
+from convert2applevoice.tts.workers import WorkerPool, PooledTTS
+from convert2applevoice.tts.scheduler import configure_schedulers
+from convert2applevoice.tts.formats import get_format_stats
 from convert2applevoice.config import Config
+from convert2applevoice.audio import AudioManager
+from convert2applevoice.loop import AutomationLoop
+from convert2applevoice.trace import (
+    TraceRecorder, RecordingCapture, TracingTTS, ReplayReport, replay,
+)
+from convert2applevoice.voices import VoiceCatalogue
+from convert2applevoice.stability import StabilityGate, gate_from_settings
+from convert2applevoice.pipeline import PipelineSupervisor
+from convert2applevoice.prefetch import Prefetcher, PhrasePredictor, load_phrase_list
+from convert2applevoice.chunking import ChunkedTTS
 
 console = Console()
 
-def main():
-    """Main automation loop for Personal Voice creation."""
-    try:
-        config = Config()
-        ocr = OCRExtractor(region=config.ocr.get('region'))
-        
-        # Create TTS engine with config
+
+def create_tts(config: Config, engine_name: Optional[str] = None,
+               voice: Optional[str] = None, use_workers: bool = True,
+               chunked: bool = True) -> Optional[TTSEngine]:
+    """Create the configured TTS engine.
+
+    Args:
+        config: Application configuration
+        engine_name: Engine to create instead of ``config.tts_engine``
+        voice: Voice to use instead of ``config.tts_voice``
+        use_workers: Render on persistent worker processes when
+            ``workers.enabled`` is set
+        chunked: Split long prompts into clauses when
+            ``chunking.enabled`` is set
+
+    Returns:
+        TTSEngine: The engine, or None if the name is unknown
+    """
+    engine_name = engine_name or config.tts_engine
+    workers = config.workers
+    if use_workers and workers.get('enabled'):
+        if engine_name.lower() not in get_available_engines():
+            return None
+        tts = PooledTTS(WorkerPool(
+            functools.partial(worker_tts, str(config.config_file), engine_name, voice),
+            size=workers.get('size', 1),
+            max_jobs=workers.get('max_jobs', 500),
+            health_interval=workers.get('health_interval', 10),
+        ))
+    else:
+        sample_rate, channels = output_format(config)
         tts_config = TTSConfig(
-            voice=config.tts_voice,
+            voice=voice or config.tts_voice,
             rate=config.tts_rate,
             volume=config.tts_volume,
             pitch=config.tts_pitch,
+            sample_rate=sample_rate,
+            channels=channels,
         )
         tts_config.extra_options = config.tts_extra_options
-        tts = create_engine(config.tts_engine, tts_config)
-        
+        tts = create_engine(engine_name, tts_config)
+
+    chunking = config.chunking
+    if tts is not None and chunked and chunking.get('enabled'):
+        tts = ChunkedTTS(
+            tts,
+            max_chars=chunking.get('max_chars', 120),
+            min_chars=chunking.get('min_chars', 20),
+            sentence_pause=chunking.get('sentence_pause_ms', 250) / 1000,
+            clause_pause=chunking.get('clause_pause_ms', 100) / 1000,
+            crossfade=chunking.get('crossfade_ms', 20) / 1000,
+        )
+    return tts
+
+
+@functools.lru_cache(maxsize=None)
+def _device_format(device_name: str) -> Optional[Tuple[int, int]]:
+    return AudioManager.get_device_format(device_name)
+
+
+def output_format(config: Config) -> Tuple[Optional[int], Optional[int]]:
+    """Get the sample rate and channel count engines should render at.
+
+    ``audio.sample_rate`` and ``audio.channels`` take precedence; unset
+    values are read from the output device.
+
+    Returns:
+        Tuple[Optional[int], Optional[int]]: (sample_rate, channels), with
+        None where neither is known
+    """
+    sample_rate = config.audio.get('sample_rate')
+    channels = config.audio.get('channels')
+    device = config.audio.get('output_device')
+    if (sample_rate is None or channels is None) and device:
+        detected = _device_format(device)
+        if detected:
+            sample_rate = sample_rate or detected[0]
+            channels = channels or detected[1]
+    return sample_rate, channels
+
+
+def worker_tts(config_file: str, engine_name: Optional[str] = None,
+               voice: Optional[str] = None, chunked: bool = False) -> Optional[TTSEngine]:
+    """Create the configured TTS engine inside a synthesis or render worker."""
+    config = Config(config_file)
+    configure_schedulers(config.rate_limits, config.usage_file, config.retry_delay)
+    return create_tts(config, engine_name, voice, use_workers=False, chunked=chunked)
+
+
+def run_automation(config: Config, record: Optional[str] = None):
+    """Main automation loop for Personal Voice creation.
+
+    Args:
+        config: Application configuration
+        record: Optional path of a trace file to record the session to
+    """
+    # Vision/Quartz are only available on macOS, so import them lazily
+    from convert2applevoice.ocr import OCRExtractor
+
+    ocr = OCRExtractor(region=config.ocr.get('region'))
+    tts = create_tts(config)
+
+    if not tts:
+        console.print(f"[bold red]Error: TTS engine '{config.tts_engine}' not found[/bold red]")
+        sys.exit(1)
+
+    catalogue = create_voice_catalogue(config)
+    warning = config.validate_voice(catalogue)
+    if warning:
+        console.print(f"[bold yellow]Warning:[/bold yellow] {warning}")
+    catalogue.refresh_stale([config.tts_engine])
+
+    console.print("[bold green]Starting Personal Voice automation...[/bold green]")
+    console.print("[yellow]Make sure Personal Voice is in Continuous Recording mode[/yellow]")
+    console.print("[yellow]Press Ctrl+C to stop[/yellow]")
+
+    chunker = tts if isinstance(tts, ChunkedTTS) else None
+    capture = ocr
+    recorder = None
+    if record:
+        recorder = TraceRecorder(record, engine=config.tts_engine, voice=config.tts_voice,
+                                 check_interval=config.check_interval,
+                                 stability=config.stability)
+        capture = RecordingCapture(ocr, recorder)
+        tts = TracingTTS(tts, recorder)
+        console.print(f"[yellow]Recording session trace to {record}[/yellow]")
+
+    prefetcher = create_prefetcher(config, tts)
+    loop = AutomationLoop(capture, tts, check_interval=config.check_interval, console=console,
+                          prefetcher=prefetcher, gate=create_stability_gate(config))
+    try:
+        loop.run()
+    finally:
+        if recorder:
+            recorder.close()
+        if prefetcher:
+            prefetcher.close()
+            print_prefetch_stats(prefetcher)
+        if chunker:
+            print_chunking_stats(chunker)
+        print_format_stats()
+
+
+def create_voice_catalogue(config: Config) -> VoiceCatalogue:
+    """Create the voice catalogue backed by the on-disk cache."""
+    settings = config.voice_cache
+    return VoiceCatalogue(
+        settings.get('path', '~/.cache/convert2applevoice/voices.json'),
+        lambda engine: create_tts(config, engine, use_workers=False),
+        ttl=settings.get('ttl_hours', 24) * 3600,
+    )
+
+
+def run_voices(config: Config, args: argparse.Namespace):
+    """List cached voices, refreshing stale engines first."""
+    catalogue = create_voice_catalogue(config)
+    engines = [args.engine] if args.engine else [config.tts_engine]
+    if args.refresh:
+        for engine in engines:
+            catalogue.refresh(engine)
+    else:
+        catalogue.refresh_stale(engines, background=False)
+
+    neural = True if args.neural else None
+    voices = catalogue.query(engine=args.engine, locale=args.locale, gender=args.gender,
+                             neural=neural)
+
+    table = Table(title=f"{len(voices)} voices")
+    for column in ["Engine", "Id", "Name", "Locale", "Gender", "Rate", "Neural"]:
+        table.add_column(column)
+    for voice in voices:
+        table.add_row(voice.engine, voice.id, voice.name or "", voice.locale or "",
+                      voice.gender or "", str(voice.sample_rate or ""),
+                      "yes" if voice.neural else "")
+    console.print(table)
+
+
+def create_stability_gate(config: Config) -> Optional[StabilityGate]:
+    """Create the prompt stability gate if enabled in the configuration."""
+    return gate_from_settings(config.stability)
+
+
+def create_prefetcher(config: Config, tts: TTSEngine) -> Optional[Prefetcher]:
+    """Create the phrase prefetcher if enabled in the configuration."""
+    settings = config.prefetch
+    if not settings.get('enabled'):
+        return None
+
+    phrases = []
+    if settings.get('phrase_list'):
+        phrases = load_phrase_list(settings['phrase_list'])
+    return Prefetcher(
+        tts,
+        PhrasePredictor(phrases),
+        depth=settings.get('depth', 2),
+        buffer_size=settings.get('buffer_size', 8),
+    )
+
+
+def print_prefetch_stats(prefetcher: Prefetcher):
+    """Print prefetch hit rate, wasted synthesis and latency saved."""
+    stats = prefetcher.stats()
+    console.print(
+        f"[bold]Prefetch:[/bold] {stats['hits']} hits, {stats['misses']} misses "
+        f"({stats['hit_rate']:.0%} hit rate), {stats['wasted']} wasted renders "
+        f"({stats['wasted_seconds']:.1f}s), {stats['latency_saved']:.1f}s latency saved"
+    )
+
+
+def print_chunking_stats(chunker: ChunkedTTS):
+    """Print chunk counts and time-to-first-audio by prompt length."""
+    stats = chunker.stats()
+    console.print(f"[bold]Chunking:[/bold] {stats['phrases']} phrases in {stats['chunks']} chunks")
+    for bucket in stats['ttfa']:
+        lower, upper = bucket['min_chars'], bucket['max_chars']
+        label = f"{lower}-{upper}" if upper else f">{lower - 1}"
+        console.print(f"  {label} chars: {bucket['mean'] * 1000:.0f}ms to first audio "
+                      f"({bucket['phrases']} phrases)")
+
+
+def print_format_stats():
+    """Print per-engine output format handling and decode time avoided."""
+    for engine, stats in get_format_stats().items():
+        avoided = stats['decode_time_avoided']
+        console.print(
+            f"[bold]Audio ({engine}):[/bold] {stats['native']} native, "
+            f"{stats['converted']} converted, {stats['decoded']} decoded, "
+            f"{stats['bytes_transferred'] / 1024:.0f} KiB transferred, "
+            f"{stats['decode_time']:.2f}s decoding"
+            + (f", {avoided:.2f}s decode avoided" if avoided is not None else "")
+        )
+
+
+def pipeline_capture(config_file: str):
+    """Create the OCR capture backend inside a pipeline worker."""
+    from convert2applevoice.ocr import OCRExtractor
+    return OCRExtractor(region=Config(config_file).ocr.get('region'))
+
+
+def pipeline_tts(config_file: str) -> TTSEngine:
+    """Create the configured TTS engine inside a pipeline worker."""
+    config = Config(config_file)
+    configure_schedulers(config.rate_limits, config.usage_file, config.retry_delay)
+    tts = create_tts(config, use_workers=False)
+    if not tts:
+        raise ValueError(f"TTS engine '{config.tts_engine}' not found")
+    return tts
+
+
+def run_pipeline(config: Config):
+    """Run the automation with capture, synthesis and playback in separate processes."""
+    settings = config.pipeline
+    supervisor = PipelineSupervisor(
+        functools.partial(pipeline_capture, str(config.config_file)),
+        functools.partial(pipeline_tts, str(config.config_file)),
+        check_interval=config.check_interval,
+        gate_settings=config.stability,
+        slots=settings.get('slots', 4),
+        slot_size=int(settings.get('slot_size_mb', 4) * 1024 * 1024),
+        queue_size=settings.get('queue_size', 8),
+    )
+
+    console.print("[bold green]Starting Personal Voice automation (pipeline mode)...[/bold green]")
+    console.print("[yellow]Make sure Personal Voice is in Continuous Recording mode[/yellow]")
+    console.print("[yellow]Press Ctrl+C to stop[/yellow]")
+
+    def show(snapshot):
+        console.print(" | ".join(
+            f"{stage}: q={s['queued']} done={s['processed']} "
+            f"{s['throughput']:.2f}/s err={s['errors']} restarts={s['restarts']}"
+            for stage, s in snapshot.items()
+        ))
+
+    supervisor.run(check_every=5.0, on_check=show)
+
+
+def run_daemon(config: Config, args: argparse.Namespace):
+    """Run the long-lived daemon with a Unix-socket control API."""
+    from convert2applevoice.daemon import VoiceDaemon, ControlServer
+
+    def capture_factory(config: Config):
+        from convert2applevoice.ocr import OCRExtractor
+        return OCRExtractor(region=config.ocr.get('region'))
+
+    def loop_factory(capture, tts, config: Config) -> AutomationLoop:
+        return AutomationLoop(capture, tts, check_interval=config.check_interval,
+                              console=console, prefetcher=create_prefetcher(config, tts),
+                              gate=create_stability_gate(config))
+
+    socket_path = args.socket or config.daemon.get('socket')
+    daemon = VoiceDaemon(config, create_tts, capture_factory, loop_factory)
+    server = ControlServer(socket_path, daemon)
+    console.print(f"[bold green]Daemon listening on {server.socket_path}[/bold green]")
+    if args.autostart:
+        daemon.start()
+    try:
+        server.serve_forever()
+    finally:
+        daemon.shutdown()
+        server.server_close()
+        console.print("[yellow]Daemon stopped[/yellow]")
+
+
+def run_replay(config: Config, args: argparse.Namespace):
+    """Replay a recorded session and optionally compare it to a baseline report."""
+    tts = None
+    if args.engine:
+        tts = create_tts(config, args.engine)
         if not tts:
-            console.print(f"[bold red]Error: TTS engine '{config.tts_engine}' not found[/bold red]")
+            console.print(f"[bold red]Error: TTS engine '{args.engine}' not found[/bold red]")
             sys.exit(1)
 
-        console.print("[bold green]Starting Personal Voice automation...[/bold green]")
-        console.print("[yellow]Make sure Personal Voice is in Continuous Recording mode[/yellow]")
-        console.print("[yellow]Press Ctrl+C to stop[/yellow]")
-        
-        last_text = ""
-        waiting_for_focus = False
-        
-        while True:
-            # Extract text from current prompt
-            text = ocr.extract_text()
-            
-            # If text is empty and we weren't previously waiting for focus
-            if not text and not waiting_for_focus:
-                console.print("[yellow]Waiting for Personal Voice window to be focused...[/yellow]")
-                waiting_for_focus = True
-            # If we have text and we were waiting for focus
-            elif text and waiting_for_focus:
-                console.print("[green]Personal Voice window detected![/green]")
-                waiting_for_focus = False
-            
-            # Only process if text has changed (new prompt)
-            if text and text != last_text:
-                console.print(f"[cyan]New phrase detected:[/cyan] {text}")
-                
-                # Play text using TTS
-                tts.speak(text)
-                last_text = text
-            
-            time.sleep(config.check_interval)  # Wait before next check
-            
+    console.print(f"[bold green]Replaying {args.trace} at {args.speed}x...[/bold green]")
+    report = replay(args.trace, speed=args.speed, tts=tts, stability=config.stability,
+                    prefetcher_factory=lambda engine: create_prefetcher(config, engine))
+    if args.report:
+        report.save(args.report)
+
+    summary = report.summary()
+    baseline_report = ReplayReport.load(args.baseline) if args.baseline else None
+    baseline = baseline_report.summary() if baseline_report else None
+
+    table = Table(title="Replay summary")
+    table.add_column("Metric")
+    if baseline:
+        table.add_column("Baseline", justify="right")
+    table.add_column("This build", justify="right")
+    for name, value in summary.items():
+        row = [name]
+        if baseline:
+            row.append(_format_metric(baseline[name]))
+        row.append(_format_metric(value))
+        table.add_row(*row)
+    console.print(table)
+
+    if baseline_report and baseline_report.phrases != report.phrases:
+        console.print("[bold red]Spoken phrases differ from the baseline[/bold red]")
+        sys.exit(1)
+
+
+def _format_metric(value) -> str:
+    return f"{value:.4f}" if isinstance(value, float) else str(value)
+
+
+def run_bench(config: Config, args: argparse.Namespace):
+    """Benchmark each configured engine and voice."""
+    from convert2applevoice.bench import benchmark_engine, STANDARD_PHRASES
+
+    if args.engine:
+        targets = []
+        for spec in args.engine:
+            name, _, voice = spec.partition(':')
+            targets.append((name, voice or None))
+    else:
+        targets = [(name, voice) for name, voices in config.bench.get('engines', {}).items()
+                   for voice in (voices or [None])]
+
+    phrases = load_phrase_list(args.phrases) if args.phrases else STANDARD_PHRASES
+    warm_runs = args.runs if args.runs is not None else config.bench.get('warm_runs', 3)
+
+    results = []
+    for name, voice in targets:
+        console.print(f"[cyan]Benchmarking {name}[/cyan] ({voice or 'default voice'})...")
+        results.extend(benchmark_engine(
+            name, voice,
+            lambda engine, v: create_tts(config, engine, v),
+            phrases=phrases,
+            warm_runs=warm_runs,
+        ))
+
+    summaries = [result.summary() for result in results]
+
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    table = Table(title="Engine benchmark")
+    for column in ["Engine", "Voice", "Run", "Streaming", "Init (s)", "TTFB (s)", "Total (s)",
+                   "RTF", "Bytes", "Errors"]:
+        table.add_column(column, justify="left" if column in ("Engine", "Voice", "Run",
+                                                              "Streaming") else "right")
+    for row in summaries:
+        table.add_row(
+            row['engine'], row['voice'] or "default", row['kind'],
+            "yes" if row['streaming'] else "no",
+            fmt(row['init_time'], ".3f"), fmt(row['ttfb'], ".3f"), fmt(row['total'], ".3f"),
+            fmt(row['rtf'], ".3f"), fmt(row['output_bytes'], ".0f"), f"{row['error_rate']:.0%}",
+        )
+    console.print(table)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(summaries, f, indent=4)
+        console.print(f"[green]Wrote results to {args.json}[/green]")
+
+
+def farm_table(progress: Dict[str, Any]) -> Table:
+    """Build the render farm progress table."""
+    table = Table(title=(f"Render farm: {progress['done']}/{progress['total']} done, "
+                         f"{len(progress['workers'])} workers, {progress['rate']:.1f} jobs/min"))
+    for column in ["Engine", "Voice", "Pending", "Leased", "Done", "Failed"]:
+        table.add_column(column, justify="left" if column in ("Engine", "Voice") else "right")
+    for (engine, voice), counts in sorted(progress['voices'].items()):
+        table.add_row(engine, voice or "default", str(counts['pending']), str(counts['leased']),
+                      str(counts['done']), str(counts['failed']))
+    return table
+
+
+def run_farm(config: Config, args: argparse.Namespace):
+    """Enqueue, render or monitor render farm jobs."""
+    import multiprocessing as mp
+    from rich.live import Live
+    from convert2applevoice.farm import RenderQueue, RenderWorker, run_worker
+
+    settings = config.farm
+    db = args.db or settings.get('db')
+    output_dir = settings.get('output_dir')
+    max_attempts = settings.get('max_attempts', 3)
+    lease_seconds = settings.get('lease_seconds', 60)
+    queue = RenderQueue(db, output_dir, max_attempts)
+
+    if args.action == "enqueue":
+        if not args.phrases:
+            raise ValueError("farm enqueue needs --phrases")
+        phrases = load_phrase_list(args.phrases)
+        for spec in args.voice or [f"{config.tts_engine}:{config.tts_voice or ''}"]:
+            engine, _, voice = spec.partition(':')
+            added = queue.enqueue(engine, voice or None, phrases)
+            console.print(f"[green]Queued {added} new jobs for {engine} "
+                          f"({voice or 'default voice'})[/green]")
+
+    elif args.action == "work":
+        factory = functools.partial(worker_tts, str(config.config_file), chunked=True)
+        if args.processes > 1:
+            ctx = mp.get_context('spawn')
+            processes = [
+                ctx.Process(target=run_worker,
+                            args=(db, output_dir, factory, None, lease_seconds, max_attempts,
+                                  not args.wait),
+                            name=f"convert2applevoice-farm-{i}")
+                for i in range(args.processes)
+            ]
+            for process in processes:
+                process.start()
+            with Live(farm_table(queue.progress()), console=console) as live:
+                while any(process.is_alive() for process in processes):
+                    time.sleep(1)
+                    live.update(farm_table(queue.progress()))
+            for process in processes:
+                process.join()
+        else:
+            worker = RenderWorker(queue, factory, lease_seconds=lease_seconds)
+            console.print(f"[cyan]Worker {worker.worker_id} started[/cyan]")
+            worker.run(exit_when_idle=not args.wait)
+            console.print(f"[green]Completed {worker.completed} jobs[/green] "
+                          f"({worker.failed} failed, {worker.lost} lost leases)")
+        console.print(farm_table(queue.progress()))
+
+    elif args.action == "retry":
+        console.print(f"[green]Requeued {queue.retry_failed()} failed jobs[/green]")
+
+    else:
+        if not args.watch:
+            console.print(farm_table(queue.progress()))
+            return
+        with Live(farm_table(queue.progress()), console=console) as live:
+            while True:
+                time.sleep(1)
+                live.update(farm_table(queue.progress()))
+
+
+def run_soak(config: Config, args: argparse.Namespace):
+    """Run the soak-test harness and exit non-zero if limits are exceeded."""
+    from convert2applevoice.soak import FakeCapture, FakeTTS, SoakLimits, SoakRunner
+
+    if args.engine:
+        tts = create_tts(config, args.engine)
+        if not tts:
+            console.print(f"[bold red]Error: TTS engine '{args.engine}' not found[/bold red]")
+            sys.exit(1)
+    else:
+        tts = FakeTTS(spawn_process=args.spawn)
+
+    loop = AutomationLoop(FakeCapture(), tts, check_interval=0)
+    runner = SoakRunner(
+        loop,
+        limits=SoakLimits.from_dict(config.soak.get('limits', {})),
+        sample_every=args.sample_every,
+    )
+
+    console.print(f"[bold green]Running soak test for {args.iterations} iterations...[/bold green]")
+    result = runner.run(
+        args.iterations,
+        on_sample=lambda s: console.print(
+            f"[cyan]{s.iteration:>8}[/cyan] rss={s.rss_mb:.1f}MB traced={s.traced_mb:.2f}MB "
+            f"fds={s.open_fds} children={s.child_processes}"
+        ),
+    )
+
+    table = Table(title="Soak growth")
+    table.add_column("Metric")
+    table.add_column("Growth", justify="right")
+    for name, value in result.growth().items():
+        table.add_row(name, f"{value:.2f}" if isinstance(value, float) else str(value))
+    console.print(table)
+
+    console.print("[bold]Top allocators since warm-up:[/bold]")
+    for line in result.top_allocators:
+        console.print(f"  {line}")
+
+    if not result.passed:
+        for violation in result.violations:
+            console.print(f"[bold red]FAIL:[/bold red] {violation}")
+        sys.exit(1)
+    console.print("[bold green]Soak test passed[/bold green]")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line argument parser."""
+    parser = argparse.ArgumentParser(prog="convert2applevoice", description=__doc__)
+    parser.add_argument("--config", default="config.json", help="Path to config.json")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run = subparsers.add_parser("run", help="Run the Personal Voice automation (default)")
+    run.add_argument("--record", metavar="TRACE", help="Record the session to a trace file")
+    run.add_argument("--pipeline", action="store_true",
+                     help="Run capture, synthesis and playback in separate processes")
+
+    daemon = subparsers.add_parser("daemon", help="Run a long-lived daemon controlled over a socket")
+    daemon.add_argument("--socket", help="Control socket path (default: daemon.socket)")
+    daemon.add_argument("--autostart", action="store_true",
+                        help="Start the automation loop immediately")
+
+    replay_cmd = subparsers.add_parser("replay", help="Replay a recorded session trace")
+    replay_cmd.add_argument("trace", help="Trace file written by 'run --record'")
+    replay_cmd.add_argument("--speed", type=float, default=1.0,
+                            help="Speed factor; 0 replays as fast as possible")
+    replay_cmd.add_argument("--engine", help="Use a real TTS engine instead of the stand-in")
+    replay_cmd.add_argument("--report", help="Write the replay report to a JSON file")
+    replay_cmd.add_argument("--baseline", help="Compare against a report from another build")
+
+    voices = subparsers.add_parser("voices", help="List voices from the voice catalogue")
+    voices.add_argument("--engine", help="Engine to list (default: tts_engine)")
+    voices.add_argument("--locale", help="Locale such as en-GB, or a language such as en")
+    voices.add_argument("--gender", help="Voice gender, e.g. female")
+    voices.add_argument("--neural", action="store_true", help="Only neural voices")
+    voices.add_argument("--refresh", action="store_true", help="Refresh even if not stale")
+
+    bench = subparsers.add_parser("bench-engines", help="Benchmark TTS engines and voices")
+    bench.add_argument("--engine", action="append", metavar="NAME[:VOICE]",
+                       help="Engine (and voice) to benchmark; repeatable. "
+                            "Defaults to bench.engines in config.json")
+    bench.add_argument("--runs", type=int, help="Warm passes over the phrase set")
+    bench.add_argument("--phrases", help="Phrase list file, one phrase per line")
+    bench.add_argument("--json", help="Write results to a JSON file")
+
+    farm = subparsers.add_parser("farm", help="Render phrase sets on a shared job queue")
+    farm.add_argument("action", choices=["enqueue", "work", "status", "retry"])
+    farm.add_argument("--db", help="Queue database (default: farm.db in config.json)")
+    farm.add_argument("--voice", action="append", metavar="ENGINE[:VOICE]",
+                      help="Engine and voice to enqueue for; repeatable")
+    farm.add_argument("--phrases", help="Phrase list file for 'enqueue', one phrase per line")
+    farm.add_argument("--processes", type=int, default=1, help="Worker processes for 'work'")
+    farm.add_argument("--wait", action="store_true",
+                      help="Keep working and wait for new jobs when the queue is empty")
+    farm.add_argument("--watch", action="store_true", help="Refresh 'status' every second")
+
+    soak = subparsers.add_parser("soak", help="Run the loop against stand-in backends")
+    soak.add_argument("--iterations", type=int, default=5000)
+    soak.add_argument("--sample-every", type=int, default=500)
+    soak.add_argument("--spawn", action="store_true",
+                      help="Spawn a child process per phrase like MacOSTTS")
+    soak.add_argument("--engine", help="Use a real TTS engine instead of the stand-in")
+
+    return parser
+
+
+def main(argv=None):
+    """Parse arguments and dispatch to the requested command."""
+    args = build_parser().parse_args(argv)
+    try:
+        config = Config(args.config)
+        configure_schedulers(config.rate_limits, config.usage_file, config.retry_delay)
+        if args.command == "soak":
+            run_soak(config, args)
+        elif args.command == "farm":
+            run_farm(config, args)
+        elif args.command == "daemon":
+            run_daemon(config, args)
+        elif args.command == "voices":
+            run_voices(config, args)
+        elif args.command == "bench-engines":
+            run_bench(config, args)
+        elif args.command == "replay":
+            run_replay(config, args)
+        elif getattr(args, 'pipeline', False):
+            run_pipeline(config)
+        else:
+            run_automation(config, record=getattr(args, 'record', None))
+
     except KeyboardInterrupt:
         console.print("\n[yellow]Stopping automation...[/yellow]")
         sys.exit(0)
@@ -1,6 +1,7 @@
 """OCR module for extracting text from Personal Voice UI."""
 
 from pathlib import Path
+from typing import Tuple
 import Quartz
 from Vision import VNRecognizeTextRequest, VNImageRequestHandler
 from AppKit import NSBitmapImageRep, NSWorkspace
@@ -29,6 +30,9 @@ class OCRExtractor:
             'width': 800,  # Width of capture
             'height': 100  # Height of capture
         }
+        
+        # Whether Personal Voice was focused on the last capture
+        self.focused = False
 
     def set_capture_region(self, x: int, y: int, width: int, height: int):
         """Update the screen region to capture.
@@ -63,7 +67,8 @@ class OCRExtractor:
     def _capture_screen_region(self):
         """Capture the region of screen containing the prompt text."""
         # Only capture if Personal Voice is focused
-        if not self._is_personal_voice_focused():
+        self.focused = self._is_personal_voice_focused()
+        if not self.focused:
             return None
             
         # Capture the screen region
@@ -85,11 +90,21 @@ class OCRExtractor:
         Returns:
             str: The extracted text, or empty string if extraction failed.
         """
+        text, _ = self.extract_text_with_confidence()
+        return text
+
+    def extract_text_with_confidence(self) -> Tuple[str, float]:
+        """Extract text and Vision's recognition confidence.
+        
+        Returns:
+            Tuple[str, float]: The extracted text and its confidence
+            between 0 and 1, or ("", 0.0) if extraction failed.
+        """
         try:
             # Capture the screen region
             image = self._capture_screen_region()
             if not image:
-                return ""
+                return "", 0.0
 
             # Create image request handler
             handler = VNImageRequestHandler.alloc().initWithCGImage_options_(
@@ -102,12 +117,12 @@ class OCRExtractor:
             # Get the results
             results = self.request.results()
             if not results:
-                return ""
+                return "", 0.0
 
             # Get the text from the first (usually only) result
-            text = results[0].topCandidates_(1)[0].string()
-            return text.strip()
+            candidate = results[0].topCandidates_(1)[0]
+            return candidate.string().strip(), float(candidate.confidence())
 
         except Exception as e:
             print(f"Error during OCR: {str(e)}")
-            return ""
+            return "", 0.0
@@ -0,0 +1,548 @@
+"""Process-per-stage automation pipeline.
+
+Capture/OCR, synthesis and playback each run in their own process so a
+slow stage (a Vision call, a network request, a long phrase playing)
+does not stall the others on a shared GIL. Rendered audio is written
+into a shared-memory slot pool and only the slot index crosses the
+queue, so audio buffers are never pickled.
+
+When the stability gate cancels an early-accepted phrase, the capture
+stage bumps a shared flush generation; phrases and audio queued before
+the flush are dropped and the render or playback in progress is stopped.
+"""
+
+import multiprocessing as mp
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .cancel import CancellationToken, CancelledError
+from .stability import gate_from_settings
+
+STAGES = ('capture', 'synthesis', 'playback')
+
+# Counters kept per stage in shared memory
+COUNTERS = ('processed', 'errors', 'restarts')
+
+# Holders of an audio slot; a slot is 'queued' while its index is in the
+# audio channel, between the synthesis and playback stages
+SLOT_OWNERS = ('synthesis', 'queued', 'playback')
+
+
+class AudioSlotPool:
+    """Fixed-size audio buffers in one shared-memory block.
+
+    The synthesis stage claims a free slot, writes into it and hands the
+    index on; the playback stage reads the slot in place and frees it.
+    The owner of each slot lives in a shared array, so the slots held by
+    a crashed worker can be reclaimed by the supervisor without touching
+    slots that have already been handed to the next stage.
+
+    Each queued slot also carries a ticket, which travels with its index
+    through the audio channel, and a flag set once the index has been
+    sent. A queued slot whose index never reached the channel can then be
+    reclaimed, and the playback stage ignores any index whose ticket no
+    longer matches its slot.
+    """
+
+    def __init__(self, ctx, slots: int = 4, slot_size: int = 4 * 1024 * 1024):
+        """Allocate the pool.
+
+        Args:
+            ctx: Multiprocessing context
+            slots: Number of buffers
+            slot_size: Size of each buffer in bytes
+        """
+        self.slots = slots
+        self.slot_size = slot_size
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * slot_size)
+        self.name = self._shm.name
+        self._busy = ctx.Array('b', slots)
+        self._tickets = ctx.Array('l', slots)
+        self._sent = ctx.Array('b', slots)
+        self._next_ticket = ctx.Value('l', 0)
+        self._owner = True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_shm']
+        state['_owner'] = False
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._shm = shared_memory.SharedMemory(name=self.name)
+
+    def acquire(self, owner: str = 'synthesis', stop_event=None) -> Optional[int]:
+        """Claim a free slot, waiting until one is released.
+
+        Args:
+            owner: Holder of the slot, one of ``SLOT_OWNERS``
+            stop_event: Event that abandons the wait when set
+
+        Returns:
+            Optional[int]: Slot index, or None if ``stop_event`` was set
+        """
+        while stop_event is None or not stop_event.is_set():
+            with self._busy.get_lock():
+                for slot in range(self.slots):
+                    if not self._busy[slot]:
+                        self._busy[slot] = SLOT_OWNERS.index(owner) + 1
+                        return slot
+            time.sleep(0.005)
+        return None
+
+    def hand_over(self, slot: int, owner: str):
+        """Transfer a claimed slot to its next holder."""
+        with self._busy.get_lock():
+            self._busy[slot] = SLOT_OWNERS.index(owner) + 1
+
+    def enqueue(self, slot: int) -> int:
+        """Hand a claimed slot to the audio channel before sending its index.
+
+        Returns:
+            int: Ticket to send along with the slot index
+        """
+        with self._busy.get_lock():
+            with self._next_ticket.get_lock():
+                self._next_ticket.value += 1
+                ticket = self._next_ticket.value
+            self._tickets[slot] = ticket
+            self._sent[slot] = 0
+            self._busy[slot] = SLOT_OWNERS.index('queued') + 1
+        return ticket
+
+    def mark_sent(self, slot: int):
+        """Record that a queued slot's index is in the audio channel."""
+        self._sent[slot] = 1
+
+    def claim(self, slot: int, ticket: int, owner: str = 'playback') -> bool:
+        """Take over a queued slot if it still holds the item for ``ticket``.
+
+        Returns:
+            bool: False if the slot was reclaimed since the index was sent
+        """
+        with self._busy.get_lock():
+            if (self._busy[slot] != SLOT_OWNERS.index('queued') + 1
+                    or self._tickets[slot] != ticket):
+                return False
+            self._busy[slot] = SLOT_OWNERS.index(owner) + 1
+            return True
+
+    def owner(self, slot: int) -> Optional[str]:
+        """Get the holder of a slot, or None if it is free."""
+        value = self._busy[slot]
+        return SLOT_OWNERS[value - 1] if value else None
+
+    def release(self, slot: int):
+        """Return a slot to the pool."""
+        with self._busy.get_lock():
+            self._busy[slot] = 0
+
+    def reclaim(self, owner: str) -> List[int]:
+        """Free every slot held by ``owner``.
+
+        Returns:
+            List[int]: Indices of the slots freed
+        """
+        value = SLOT_OWNERS.index(owner) + 1
+        freed = []
+        with self._busy.get_lock():
+            for slot in range(self.slots):
+                if self._busy[slot] == value:
+                    self._busy[slot] = 0
+                    freed.append(slot)
+        return freed
+
+    def reclaim_unsent(self) -> List[int]:
+        """Free queued slots whose index was never sent to the audio channel.
+
+        Returns:
+            List[int]: Indices of the slots freed
+        """
+        queued = SLOT_OWNERS.index('queued') + 1
+        freed = []
+        with self._busy.get_lock():
+            for slot in range(self.slots):
+                if self._busy[slot] == queued and not self._sent[slot]:
+                    self._busy[slot] = 0
+                    freed.append(slot)
+        return freed
+
+    def write(self, slot: int, data: bytes) -> int:
+        """Copy audio into a slot.
+
+        Returns:
+            int: Number of bytes written
+        """
+        if len(data) > self.slot_size:
+            raise ValueError(f"Audio of {len(data)} bytes exceeds slot size {self.slot_size}")
+        start = slot * self.slot_size
+        self._shm.buf[start:start + len(data)] = data
+        return len(data)
+
+    def view(self, slot: int, length: int) -> memoryview:
+        """Get a zero-copy view of the audio in a slot."""
+        start = slot * self.slot_size
+        return self._shm.buf[start:start + length]
+
+    def close(self):
+        """Detach from the shared memory, freeing it in the owning process."""
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class StageStats:
+    """Per-stage counters and queue depths shared between processes.
+
+    Also holds the flush generation, which the capture stage bumps to
+    drop everything queued or in progress behind it.
+    """
+
+    def __init__(self, ctx):
+        self._values = {
+            (stage, name): ctx.Value('l', 0)
+            for stage in STAGES for name in COUNTERS + ('queued',)
+        }
+        self._generation = ctx.Value('l', 0)
+
+    def add(self, stage: str, name: str, amount: int = 1):
+        value = self._values[(stage, name)]
+        with value.get_lock():
+            value.value += amount
+
+    def get(self, stage: str, name: str) -> int:
+        return self._values[(stage, name)].value
+
+    def set(self, stage: str, name: str, amount: int):
+        self._values[(stage, name)].value = amount
+
+    @property
+    def generation(self) -> int:
+        """Number of flushes so far; queued work from earlier ones is stale."""
+        return self._generation.value
+
+    def flush(self):
+        """Mark everything queued or in progress as stale."""
+        with self._generation.get_lock():
+            self._generation.value += 1
+
+
+class FlushWatcher:
+    """Cancels the current item's token when the pipeline is flushed.
+
+    Each stage begins every item with the generation it was queued under;
+    a background thread cancels the item's token as soon as the shared
+    generation moves on, interrupting a render or stopping playback.
+    """
+
+    def __init__(self, stats: StageStats, stop_event, interval: float = 0.01):
+        self.stats = stats
+        self.stop_event = stop_event
+        self.interval = interval
+        self._current: Optional[Tuple[int, CancellationToken]] = None
+        threading.Thread(target=self._run, name="flush-watcher", daemon=True).start()
+
+    def begin(self, generation: int) -> CancellationToken:
+        """Get a token for an item queued under ``generation``."""
+        token = CancellationToken()
+        self._current = (generation, token)
+        if self.stats.generation != generation:
+            token.cancel()
+        return token
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            current = self._current
+            if current and self.stats.generation != current[0]:
+                current[1].cancel()
+            time.sleep(self.interval)
+
+
+class StageChannel:
+    """Bounded one-way channel feeding a single stage.
+
+    Built on a pipe rather than ``multiprocessing.Queue``: a queue's
+    reader lock is never released if its holder is killed, which would
+    wedge the restarted worker. Both pipe ends stay open in the
+    supervisor, so a restarted consumer picks up where the old one left
+    off. Depth is tracked in ``StageStats`` because ``Queue.qsize`` is
+    not implemented on macOS anyway.
+    """
+
+    def __init__(self, ctx, stage: str, stats: StageStats, maxsize: int = 8):
+        self.stage = stage
+        self.stats = stats
+        self.maxsize = maxsize
+        self._reader, self._writer = ctx.Pipe(duplex=False)
+
+    def put(self, item, stop_event) -> bool:
+        """Send an item once the channel has room, unless the pipeline stops."""
+        while self.stats.get(self.stage, 'queued') >= self.maxsize:
+            if stop_event.is_set():
+                return False
+            time.sleep(0.005)
+        self.stats.add(self.stage, 'queued')
+        self._writer.send(item)
+        return True
+
+    def get(self, stop_event):
+        """Receive the next item, or None when the pipeline stops."""
+        while not stop_event.is_set():
+            if self._reader.poll(0.1):
+                item = self._reader.recv()
+                self.stats.add(self.stage, 'queued', -1)
+                return item
+        return None
+
+
+def capture_worker(capture_factory: Callable[[], Any], gate_settings: Optional[Dict[str, Any]],
+                   check_interval: float, text_channel: StageChannel, stats: StageStats,
+                   stop_event):
+    """Poll the capture backend and queue each new, stable phrase.
+
+    Phrases are queued with the current flush generation; when the gate
+    cancels an early-accepted phrase, the generation is bumped so the
+    later stages drop it.
+    """
+    capture = capture_factory()
+    gate = gate_from_settings(gate_settings) if gate_settings is not None else None
+    last_text = ""
+    while not stop_event.is_set():
+        confidence = None
+        try:
+            if gate and hasattr(capture, 'extract_text_with_confidence'):
+                text, confidence = capture.extract_text_with_confidence()
+            else:
+                text = capture.extract_text()
+        except Exception as e:
+            print(f"Error in capture stage: {str(e)}")
+            stats.add('capture', 'errors')
+            text = ""
+
+        if gate:
+            decision = gate.observe(text, confidence)
+            if decision.cancel:
+                # Drop the transient phrase's render and stop its playback
+                stats.flush()
+            phrase = decision.emit
+        else:
+            phrase = text if text and text != last_text else None
+
+        if phrase:
+            last_text = phrase
+            text_channel.put((stats.generation, phrase), stop_event)
+            stats.add('capture', 'processed')
+
+        if check_interval:
+            time.sleep(check_interval)
+
+
+def synthesis_worker(tts_factory: Callable[[], Any], text_channel: StageChannel,
+                     audio_channel: StageChannel, pool: AudioSlotPool, stats: StageStats,
+                     stop_event):
+    """Render queued phrases into shared-memory slots."""
+    tts = tts_factory()
+    watcher = FlushWatcher(stats, stop_event)
+    while not stop_event.is_set():
+        item = text_channel.get(stop_event)
+        if item is None:
+            break
+        generation, text = item
+
+        try:
+            audio = tts.synthesize(text, token=watcher.begin(generation))
+            if audio is None:
+                raise RuntimeError(f"{type(tts).__name__} cannot render audio")
+        except CancelledError:
+            continue  # Flushed while queued or rendering
+        except Exception as e:
+            print(f"Error in synthesis stage: {str(e)}")
+            stats.add('synthesis', 'errors')
+            continue
+
+        slot = pool.acquire('synthesis', stop_event)
+        if slot is None:
+            break
+        try:
+            length = pool.write(slot, audio)
+        except ValueError as e:
+            print(f"Error in synthesis stage: {str(e)}")
+            stats.add('synthesis', 'errors')
+            pool.release(slot)
+            continue
+
+        # Hand the slot over before sending its index, so a crash from
+        # here on can never let the supervisor reclaim a slot that the
+        # playback stage may already be reading; until it is marked sent,
+        # the supervisor treats it as orphaned
+        ticket = pool.enqueue(slot)
+        if not audio_channel.put((slot, ticket, length, generation, text), stop_event):
+            pool.release(slot)
+            continue
+        pool.mark_sent(slot)
+        stats.add('synthesis', 'processed')
+
+
+def playback_worker(tts_factory: Callable[[], Any], audio_channel: StageChannel,
+                    pool: AudioSlotPool, stats: StageStats, stop_event):
+    """Play rendered audio straight out of shared memory."""
+    tts = tts_factory()
+    watcher = FlushWatcher(stats, stop_event)
+    while not stop_event.is_set():
+        item = audio_channel.get(stop_event)
+        if item is None:
+            break
+        slot, ticket, length, generation, text = item
+        if not pool.claim(slot, ticket):
+            continue  # Reclaimed after a synthesis crash
+        try:
+            token = watcher.begin(generation)
+            if token.cancelled:
+                continue  # Flushed while queued
+            view = pool.view(slot, length)
+            try:
+                tts.play_audio(view, block=True, token=token)
+            finally:
+                view.release()
+            stats.add('playback', 'processed')
+        except Exception as e:
+            print(f"Error in playback stage: {str(e)}")
+            stats.add('playback', 'errors')
+        finally:
+            pool.release(slot)
+
+
+class PipelineSupervisor:
+    """Starts the stage processes and restarts any that crash."""
+
+    def __init__(self, capture_factory: Callable[[], Any], tts_factory: Callable[[], Any],
+                 check_interval: float = 0.5, gate_settings: Optional[Dict[str, Any]] = None,
+                 slots: int = 4, slot_size: int = 4 * 1024 * 1024, queue_size: int = 8):
+        """Initialize the supervisor.
+
+        The factories are called inside the worker processes, so they must
+        be picklable (module-level callables or ``functools.partial``).
+
+        Args:
+            capture_factory: Creates the capture backend
+            tts_factory: Creates the TTS engine used for synthesis and playback
+            check_interval: Seconds between captures
+            gate_settings: The ``stability`` configuration section, or None
+                to speak on every text change
+            slots: Number of shared audio buffers
+            slot_size: Size of each audio buffer in bytes
+            queue_size: Maximum depth of the stage queues
+        """
+        # pyobjc frameworks are not fork-safe, so always spawn
+        self.ctx = mp.get_context('spawn')
+        self.capture_factory = capture_factory
+        self.tts_factory = tts_factory
+        self.check_interval = check_interval
+        self.gate_settings = gate_settings
+
+        self.stop_event = self.ctx.Event()
+        self.stats = StageStats(self.ctx)
+        self.pool = AudioSlotPool(self.ctx, slots, slot_size)
+        self.text_channel = StageChannel(self.ctx, 'synthesis', self.stats, queue_size)
+        self.audio_channel = StageChannel(self.ctx, 'playback', self.stats, queue_size)
+        self.processes: Dict[str, Any] = {}
+        self.started = 0.0
+
+    def _spawn(self, stage: str):
+        if stage == 'capture':
+            target, args = capture_worker, (self.capture_factory, self.gate_settings,
+                                            self.check_interval, self.text_channel)
+        elif stage == 'synthesis':
+            target, args = synthesis_worker, (self.tts_factory, self.text_channel,
+                                              self.audio_channel, self.pool)
+        else:
+            target, args = playback_worker, (self.tts_factory, self.audio_channel, self.pool)
+
+        process = self.ctx.Process(target=target, args=args + (self.stats, self.stop_event),
+                                   name=f"convert2applevoice-{stage}", daemon=True)
+        process.start()
+        self.processes[stage] = process
+
+    def start(self):
+        """Start all stage processes."""
+        self.started = time.monotonic()
+        for stage in STAGES:
+            self._spawn(stage)
+
+    def check(self) -> int:
+        """Restart any stage process that has exited.
+
+        Returns:
+            int: Number of processes restarted
+        """
+        restarted = 0
+        for stage, process in list(self.processes.items()):
+            if process.is_alive() or self.stop_event.is_set():
+                continue
+            # Reclaim audio slots the crashed worker was holding
+            if stage in SLOT_OWNERS:
+                self.pool.reclaim(stage)
+            if stage == 'synthesis':
+                self.pool.reclaim_unsent()
+            print(f"Stage '{stage}' exited with code {process.exitcode}, restarting")
+            self.stats.add(stage, 'restarts')
+            self._spawn(stage)
+            restarted += 1
+        return restarted
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Get queue depth, throughput and counters for each stage.
+
+        Returns:
+            Dict[str, Dict[str, float]]: Per-stage 'queued', 'processed',
+            'throughput' (per second), 'errors', 'restarts' and 'alive'
+        """
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        result = {}
+        for stage in STAGES:
+            processed = self.stats.get(stage, 'processed')
+            process = self.processes.get(stage)
+            result[stage] = {
+                'queued': self.stats.get(stage, 'queued'),
+                'processed': processed,
+                'throughput': processed / elapsed,
+                'errors': self.stats.get(stage, 'errors'),
+                'restarts': self.stats.get(stage, 'restarts'),
+                'alive': bool(process and process.is_alive()),
+            }
+        return result
+
+    def run(self, duration: Optional[float] = None, check_every: float = 0.5,
+            on_check: Optional[Callable[[Dict[str, Dict[str, float]]], None]] = None):
+        """Supervise the pipeline until interrupted or ``duration`` elapses.
+
+        Args:
+            duration: Seconds to run, or None to run until interrupted
+            check_every: Seconds between health checks
+            on_check: Optional callback given each stats snapshot
+        """
+        if not self.processes:
+            self.start()
+        try:
+            while duration is None or time.monotonic() - self.started < duration:
+                time.sleep(check_every)
+                self.check()
+                if on_check:
+                    on_check(self.snapshot())
+        finally:
+            self.stop()
+
+    def stop(self, timeout: float = 2.0):
+        """Stop all stage processes and free the shared memory."""
+        if self.stop_event.is_set():
+            return
+        self.stop_event.set()
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.pool.close()
@@ -0,0 +1,237 @@
+"""Speculative pre-synthesis of upcoming Personal Voice prompts."""
+
+import re
+import threading
+import time
+from collections import Counter, OrderedDict, defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from .cancel import CancellationToken
+from .tts.base import TTSEngine, PRIORITY_BACKGROUND
+
+
+def normalize_phrase(text: str) -> str:
+    """Normalize a phrase so OCR output can be matched against the phrase list.
+
+    Args:
+        text: Raw phrase text
+
+    Returns:
+        str: Lower-cased text with punctuation and extra whitespace removed
+    """
+    text = re.sub(r"[^\w\s']", " ", text.lower())
+    return " ".join(text.split())
+
+
+def load_phrase_list(path: str) -> List[str]:
+    """Load a phrase list with one phrase per line.
+
+    Args:
+        path: Path to the phrase list file
+
+    Returns:
+        List[str]: Non-empty phrases in file order
+    """
+    with open(Path(path).expanduser(), encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+class PhrasePredictor:
+    """Predicts the next prompts from a phrase list and session history.
+
+    Transitions observed during the session take precedence; otherwise the
+    prediction falls back to the phrases that follow the current one in the
+    known list.
+    """
+
+    def __init__(self, phrases: Optional[List[str]] = None):
+        """Initialize the predictor.
+
+        Args:
+            phrases: Known prompts in their usual presentation order
+        """
+        self.phrases = list(phrases or [])
+        self._index = {}
+        for i, phrase in enumerate(self.phrases):
+            self._index.setdefault(normalize_phrase(phrase), i)
+        self._transitions: Dict[str, Counter] = defaultdict(Counter)
+        self._texts: Dict[str, str] = {}
+        self._last: Optional[str] = None
+
+    def observe(self, text: str):
+        """Record that a phrase was presented.
+
+        Args:
+            text: The phrase that was just shown
+        """
+        key = normalize_phrase(text)
+        self._texts.setdefault(key, text)
+        if self._last is not None and self._last != key:
+            self._transitions[self._last][key] += 1
+        self._last = key
+
+    def predict(self, count: int = 2) -> List[str]:
+        """Predict the next phrases after the last observed one.
+
+        Args:
+            count: Maximum number of phrases to return
+
+        Returns:
+            List[str]: Predicted phrases, most likely first
+        """
+        if self._last is None or count <= 0:
+            return []
+
+        predictions = []
+        seen = {self._last}
+
+        def add(key: str, text: str):
+            if key not in seen and len(predictions) < count:
+                seen.add(key)
+                predictions.append(text)
+
+        # Prefer transitions actually observed this session
+        for key, _ in self._transitions[self._last].most_common():
+            add(key, self._texts[key])
+
+        # Then follow the known list from the current position
+        position = self._index.get(self._last)
+        if position is not None:
+            for phrase in self.phrases[position + 1:]:
+                if len(predictions) >= count:
+                    break
+                add(normalize_phrase(phrase), phrase)
+
+        return predictions
+
+
+class Prefetcher:
+    """Synthesizes predicted phrases in the background.
+
+    Rendered audio is held in a bounded buffer keyed by the normalized
+    phrase; entries that are evicted or never played count as wasted.
+    """
+
+    def __init__(self, tts: TTSEngine, predictor: PhrasePredictor,
+                 depth: int = 2, buffer_size: int = 8):
+        """Initialize the prefetcher.
+
+        Args:
+            tts: Engine used for background synthesis
+            predictor: Source of predicted phrases
+            depth: Number of phrases to prefetch after each observed phrase
+            buffer_size: Maximum number of buffered renders
+        """
+        self.tts = tts
+        self.predictor = predictor
+        self.depth = depth
+        self.buffer_size = max(1, buffer_size)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self._buffer: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.wasted_seconds = 0.0
+        self.latency_saved = 0.0
+
+    def _render(self, entry: Dict[str, Any]) -> Optional[bytes]:
+        started = time.monotonic()
+        audio = self.tts.synthesize(entry['text'], priority=PRIORITY_BACKGROUND,
+                                    token=entry['token'])
+        entry['synth_time'] = time.monotonic() - started
+        return audio
+
+    def _discard(self, entry: Dict[str, Any]):
+        future: Future = entry['future']
+        if future.cancel():
+            return
+        # Abort a render in progress rather than paying for the rest of it
+        entry['token'].cancel()
+        if future.done() and future.exception() is None and future.result() is not None:
+            self.wasted += 1
+            self.wasted_seconds += entry.get('synth_time', 0.0)
+
+    def observe(self, text: str):
+        """Record the current phrase and schedule renders of the next ones.
+
+        Args:
+            text: The phrase that is now being spoken
+        """
+        self.predictor.observe(text)
+        with self._lock:
+            for phrase in self.predictor.predict(self.depth):
+                key = normalize_phrase(phrase)
+                if key in self._buffer:
+                    self._buffer.move_to_end(key)
+                    continue
+                entry = {'text': phrase, 'token': CancellationToken()}
+                entry['future'] = self._executor.submit(self._render, entry)
+                self._buffer[key] = entry
+
+            while len(self._buffer) > self.buffer_size:
+                _, entry = self._buffer.popitem(last=False)
+                self._discard(entry)
+
+    def take(self, text: str) -> Optional[bytes]:
+        """Take prefetched audio for a phrase, if any.
+
+        A render that is still in progress is waited for, since it is
+        already ahead of a fresh request.
+
+        Args:
+            text: The phrase about to be spoken
+
+        Returns:
+            Optional[bytes]: WAV audio, or None on a prefetch miss
+        """
+        with self._lock:
+            entry = self._buffer.pop(normalize_phrase(text), None)
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        requested = time.monotonic()
+        try:
+            audio = entry['future'].result()
+        except Exception as e:
+            print(f"Error prefetching audio: {str(e)}")
+            audio = None
+
+        if audio is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        waited = time.monotonic() - requested
+        self.latency_saved += max(0.0, entry.get('synth_time', 0.0) - waited)
+        return audio
+
+    def stats(self) -> Dict[str, Any]:
+        """Get prefetch statistics.
+
+        Returns:
+            Dict[str, Any]: Hits, misses, hit rate, wasted renders and
+            seconds of synthesis latency saved
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'wasted': self.wasted,
+            'wasted_seconds': self.wasted_seconds,
+            'latency_saved': self.latency_saved,
+        }
+
+    def close(self):
+        """Stop background synthesis and account for unused renders."""
+        with self._lock:
+            while self._buffer:
+                _, entry = self._buffer.popitem(last=False)
+                self._discard(entry)
+        self._executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,317 @@
+"""Soak-test harness for long-running automation sessions.
+
+Runs the automation loop for many iterations against stand-in capture and
+TTS backends while sampling process resources, and reports growth that
+exceeds the configured limits.
+"""
+
+import gc
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, List, Optional
+
+from .loop import AutomationLoop
+from .tts.base import TTSEngine, TTSConfig
+
+DEFAULT_PHRASES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Please call Stella and ask her to bring these things with her from the store.",
+    "She sells seashells by the seashore.",
+    "How much wood would a woodchuck chuck if a woodchuck could chuck wood?",
+    "I would like a cup of tea with milk and no sugar.",
+]
+
+
+class FakeCapture:
+    """Stand-in capture backend that cycles through a list of phrases.
+
+    Each phrase is held for ``frames_per_phrase`` ticks, followed by
+    ``blank_frames`` empty ticks to mimic focus loss between prompts.
+    """
+
+    def __init__(self, phrases: Optional[List[str]] = None,
+                 frames_per_phrase: int = 3, blank_frames: int = 1):
+        """Initialize the fake capture backend.
+
+        Args:
+            phrases: Phrases to cycle through
+            frames_per_phrase: Number of ticks each phrase stays on screen
+            blank_frames: Number of empty ticks after each phrase
+        """
+        self.phrases = phrases or DEFAULT_PHRASES
+        self.frames_per_phrase = frames_per_phrase
+        self.blank_frames = blank_frames
+        self.frames = 0
+
+    def extract_text(self) -> str:
+        """Return the text currently "on screen".
+
+        Returns:
+            str: Current phrase, or empty string during blank frames
+        """
+        period = self.frames_per_phrase + self.blank_frames
+        index, offset = divmod(self.frames, period)
+        self.frames += 1
+        if offset >= self.frames_per_phrase:
+            return ""
+        return self.phrases[index % len(self.phrases)]
+
+
+class FakeTTS(TTSEngine):
+    """Stand-in TTS engine that records phrases instead of speaking them.
+
+    With ``spawn_process`` enabled every phrase launches a short-lived
+    child process, mirroring the ``Popen`` lifecycle of ``MacOSTTS``.
+    """
+
+    def __init__(self, config: Optional[TTSConfig] = None, spawn_process: bool = False):
+        """Initialize the fake engine.
+
+        Args:
+            config: TTS configuration (unused)
+            spawn_process: Launch a child process per phrase
+        """
+        self.config = config or TTSConfig()
+        self.spawn_process = spawn_process
+        self.spoken = 0
+        self._current_process: Optional[subprocess.Popen] = None
+
+    def speak(self, text: str) -> bool:
+        """Record the phrase, optionally spawning a child process.
+
+        Args:
+            text: Text to "speak"
+
+        Returns:
+            bool: Always True
+        """
+        self.stop()
+        if self.spawn_process:
+            self._current_process = subprocess.Popen(
+                [sys.executable, "-c", "pass"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE
+            )
+        self.spoken += 1
+        return True
+
+    def get_available_voices(self) -> list[str]:
+        return ["fake"]
+
+    def is_speaking(self) -> bool:
+        if self._current_process is None:
+            return False
+        return self._current_process.poll() is None
+
+    def stop(self) -> None:
+        self.cancel()
+        if self._current_process:
+            if self._current_process.poll() is None:
+                self._current_process.terminate()
+            self._current_process.communicate()
+            self._current_process = None
+
+
+@dataclass
+class SoakLimits:
+    """Maximum allowed growth over the course of a soak run."""
+    max_rss_growth_mb: float = 50.0
+    max_traced_growth_mb: float = 20.0
+    max_fd_growth: int = 10
+    max_child_processes: int = 2
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'SoakLimits':
+        """Build limits from a config dictionary, ignoring unknown keys."""
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+@dataclass
+class ResourceSample:
+    """A single measurement of process resource usage."""
+    iteration: int
+    elapsed: float
+    rss_mb: float
+    traced_mb: float
+    open_fds: int
+    child_processes: int
+
+
+@dataclass
+class SoakResult:
+    """Outcome of a soak run."""
+    iterations: int
+    samples: List[ResourceSample] = field(default_factory=list)
+    top_allocators: List[str] = field(default_factory=list)
+    violations: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.violations
+
+    def growth(self) -> Dict[str, float]:
+        """Growth of each metric between the first and last sample."""
+        if len(self.samples) < 2:
+            return {'rss_mb': 0.0, 'traced_mb': 0.0, 'open_fds': 0, 'child_processes': 0}
+        first, last = self.samples[0], self.samples[-1]
+        return {
+            'rss_mb': last.rss_mb - first.rss_mb,
+            'traced_mb': last.traced_mb - first.traced_mb,
+            'open_fds': last.open_fds - first.open_fds,
+            'child_processes': max(s.child_processes for s in self.samples),
+        }
+
+
+def current_rss_mb() -> float:
+    """Get the resident set size of this process in megabytes."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    try:
+        # macOS has no /proc; ps reports RSS in kilobytes
+        result = subprocess.run(
+            ["ps", "-o", "rss=", "-p", str(os.getpid())],
+            capture_output=True, text=True
+        )
+        return int(result.stdout.strip()) / 1024
+    except (OSError, ValueError):
+        return 0.0
+
+
+def open_fd_count() -> int:
+    """Get the number of open file descriptors in this process."""
+    for fd_dir in ('/proc/self/fd', '/dev/fd'):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return 0
+
+
+def child_process_count() -> int:
+    """Get the number of live child processes of this process."""
+    pid = os.getpid()
+    if os.path.isdir('/proc'):
+        count = 0
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # The command name may contain spaces, so split after it
+                    fields = f.read().rsplit(')', 1)[1].split()
+                if int(fields[1]) == pid and fields[0] != 'Z':
+                    count += 1
+            except (OSError, IndexError, ValueError):
+                continue
+        return count
+    try:
+        result = subprocess.run(["pgrep", "-P", str(pid)], capture_output=True, text=True)
+        return len(result.stdout.split())
+    except OSError:
+        return 0
+
+
+class SoakRunner:
+    """Drives an automation loop for many iterations and tracks resources."""
+
+    def __init__(self, loop: AutomationLoop, limits: Optional[SoakLimits] = None,
+                 sample_every: int = 500, top_allocators: int = 10):
+        """Initialize the soak runner.
+
+        Args:
+            loop: Automation loop to drive
+            limits: Growth limits to enforce
+            sample_every: Iterations between resource samples
+            top_allocators: Number of tracemalloc entries to report
+        """
+        self.loop = loop
+        self.limits = limits or SoakLimits()
+        self.sample_every = max(1, sample_every)
+        self.top_allocators = top_allocators
+
+    def _sample(self, iteration: int, started: float) -> ResourceSample:
+        gc.collect()
+        traced, _ = tracemalloc.get_traced_memory()
+        return ResourceSample(
+            iteration=iteration,
+            elapsed=time.monotonic() - started,
+            rss_mb=current_rss_mb(),
+            traced_mb=traced / (1024 * 1024),
+            open_fds=open_fd_count(),
+            child_processes=child_process_count(),
+        )
+
+    def run(self, iterations: int,
+            on_sample: Optional[Callable[[ResourceSample], None]] = None) -> SoakResult:
+        """Run the soak test.
+
+        Args:
+            iterations: Number of loop iterations to run
+            on_sample: Optional callback invoked with each sample
+
+        Returns:
+            SoakResult: Samples, top allocators and limit violations
+        """
+        result = SoakResult(iterations=iterations)
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+
+        try:
+            started = time.monotonic()
+            # Warm up once so one-off allocations (imports, caches) are not counted
+            self.loop.tick()
+            baseline = tracemalloc.take_snapshot()
+            result.samples.append(self._sample(0, started))
+
+            for i in range(1, iterations + 1):
+                self.loop.tick()
+                if i % self.sample_every == 0 or i == iterations:
+                    sample = self._sample(i, started)
+                    result.samples.append(sample)
+                    if on_sample:
+                        on_sample(sample)
+
+            snapshot = tracemalloc.take_snapshot()
+            stats = snapshot.compare_to(baseline, 'lineno')
+            result.top_allocators = [str(stat) for stat in stats[:self.top_allocators]]
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+
+        result.violations = self._check_limits(result)
+        return result
+
+    def _check_limits(self, result: SoakResult) -> List[str]:
+        growth = result.growth()
+        violations = []
+        if growth['rss_mb'] > self.limits.max_rss_growth_mb:
+            violations.append(
+                f"RSS grew by {growth['rss_mb']:.1f} MB (limit {self.limits.max_rss_growth_mb} MB)"
+            )
+        if growth['traced_mb'] > self.limits.max_traced_growth_mb:
+            violations.append(
+                f"Traced allocations grew by {growth['traced_mb']:.1f} MB "
+                f"(limit {self.limits.max_traced_growth_mb} MB)"
+            )
+        if growth['open_fds'] > self.limits.max_fd_growth:
+            violations.append(
+                f"Open file descriptors grew by {growth['open_fds']} "
+                f"(limit {self.limits.max_fd_growth})"
+            )
+        if growth['child_processes'] > self.limits.max_child_processes:
+            violations.append(
+                f"{growth['child_processes']} child processes alive "
+                f"(limit {self.limits.max_child_processes})"
+            )
+        return violations
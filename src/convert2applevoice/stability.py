@@ -0,0 +1,133 @@
+"""Stability gate for prompt text captured during UI transitions."""
+
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+
+@dataclass
+class GateDecision:
+    """Result of feeding one frame to the stability gate."""
+    emit: Optional[str] = None
+    cancel: bool = False
+
+
+class StabilityGate:
+    """Emits a phrase only once OCR has read it consistently.
+
+    When Personal Voice animates to the next prompt, OCR can return
+    partial or blended text for a frame or two. A phrase is emitted once
+    it has been seen for ``min_frames`` consecutive frames and at least
+    ``min_ms`` milliseconds. With ``confidence_threshold`` set, a phrase
+    read with high enough confidence is emitted immediately; if different
+    text then appears before it would have been stable, it is treated as a
+    transient and the decision asks for the speech to be cancelled.
+    """
+
+    def __init__(self, min_frames: int = 2, min_ms: float = 0,
+                 confidence_threshold: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the gate.
+
+        Args:
+            min_frames: Consecutive identical frames required
+            min_ms: Minimum milliseconds the text must be on screen
+            confidence_threshold: OCR confidence for early acceptance, or None
+            clock: Monotonic time source
+        """
+        self.min_frames = max(1, min_frames)
+        self.min_ms = min_ms
+        self.confidence_threshold = confidence_threshold
+        self.clock = clock
+
+        self._candidate = ""
+        self._count = 0
+        self._first_seen = 0.0
+        self._emitted = ""
+        self._provisional = False
+
+        self.transients = 0
+        self.cancelled = 0
+
+    def prime(self, text: str):
+        """Treat ``text`` as already spoken, so it is not emitted again.
+
+        Used when a gate replaces another while a prompt is on screen.
+        """
+        self._emitted = text
+        self._provisional = False
+
+    def _is_stable(self, now: float) -> bool:
+        return (self._count >= self.min_frames
+                and (now - self._first_seen) * 1000 >= self.min_ms)
+
+    def observe(self, text: str, confidence: Optional[float] = None) -> GateDecision:
+        """Feed one captured frame to the gate.
+
+        Args:
+            text: Text read from the frame (empty when nothing was read)
+            confidence: OCR confidence for the text, if known
+
+        Returns:
+            GateDecision: The phrase to speak, if any, and whether speech
+            for an early-accepted transient should be cancelled
+        """
+        now = self.clock()
+        decision = GateDecision()
+
+        if text == self._candidate:
+            self._count += 1
+        else:
+            if self._candidate and self._count < self.min_frames:
+                self.transients += 1
+            self._candidate = text
+            self._count = 1
+            self._first_seen = now
+
+        if not text:
+            return decision
+
+        if self._provisional and text != self._emitted:
+            # The early-accepted phrase never became stable
+            self._provisional = False
+            self._emitted = ""
+            self.cancelled += 1
+            decision.cancel = True
+
+        if text == self._emitted:
+            if self._provisional and self._is_stable(now):
+                self._provisional = False
+            return decision
+
+        if self._is_stable(now):
+            self._emitted = text
+            self._provisional = False
+            decision.emit = text
+        elif (self.confidence_threshold is not None and confidence is not None
+              and confidence >= self.confidence_threshold):
+            self._emitted = text
+            self._provisional = True
+            decision.emit = text
+
+        return decision
+
+
+def gate_from_settings(settings: Dict[str, Any],
+                       clock: Callable[[], float] = time.monotonic) -> Optional[StabilityGate]:
+    """Create a gate from a ``stability`` configuration section.
+
+    Args:
+        settings: The ``stability`` section of config.json
+        clock: Monotonic time source
+
+    Returns:
+        Optional[StabilityGate]: The gate, or None if it is disabled
+    """
+    if not settings.get('enabled', True):
+        return None
+    return StabilityGate(
+        min_frames=settings.get('min_frames', 2),
+        min_ms=settings.get('min_ms', 0),
+        confidence_threshold=settings.get('confidence_threshold'),
+        clock=clock,
+    )
@@ -0,0 +1,393 @@
+"""Session record-and-replay for deterministic performance comparisons.
+
+A trace is a JSON-lines file (gzip-compressed when the name ends in
+``.gz``). The first line is a header; each following line is an event:
+
+    {"t": 1.52, "e": "frame", "text": "Hello there.", "focused": true, "conf": 0.93}
+    {"t": 1.53, "e": "speak", "text": "Hello there.", "ok": true, "dur": 0.41}
+    {"t": 2.10, "e": "synth", "text": "Thank you.", "ok": true, "dur": 0.38}
+    {"t": 3.02, "e": "play", "ok": true, "dur": 0.01}
+
+``t`` is seconds since recording started. Frame events omit ``text`` and
+``focused`` when they are unchanged from the previous frame, and ``conf``
+when the capture backend reports no OCR confidence. ``synth`` events are
+renders ahead of playback, such as prefetches, and ``play`` events are
+playback of such renders.
+"""
+
+import gzip
+import json
+import statistics
+import time
+from dataclasses import dataclass, field, asdict
+from typing import Any, Callable, Dict, IO, List, Optional, Tuple
+
+from .audio import pcm_to_wav
+from .cancel import CancellationToken
+from .loop import AutomationLoop
+from .prefetch import Prefetcher
+from .stability import gate_from_settings
+from .tts.base import TTSEngine, PRIORITY_LIVE
+
+TRACE_VERSION = 1
+
+
+def _open(path: str, mode: str) -> IO[str]:
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class TraceRecorder:
+    """Writes capture frames and engine responses to a trace file."""
+
+    def __init__(self, path: str, **header: Any):
+        """Open a trace for writing.
+
+        Args:
+            path: Trace file path
+            **header: Extra metadata stored in the header line
+        """
+        self.path = path
+        self._file = _open(path, 'w')
+        self._started = time.monotonic()
+        self._last_frame: Tuple[Optional[str], Optional[bool]] = (None, None)
+        self._write({'version': TRACE_VERSION, **header})
+
+    def _write(self, event: Dict[str, Any]):
+        self._file.write(json.dumps(event, separators=(',', ':')) + '\n')
+
+    def _now(self) -> float:
+        return round(time.monotonic() - self._started, 4)
+
+    def frame(self, text: str, focused: bool, confidence: Optional[float] = None):
+        """Record a capture frame."""
+        event = {'t': self._now(), 'e': 'frame'}
+        if (text, focused) != self._last_frame:
+            event['text'] = text
+            event['focused'] = focused
+            self._last_frame = (text, focused)
+        if confidence is not None:
+            event['conf'] = round(confidence, 4)
+        self._write(event)
+
+    def speak(self, text: str, ok: bool, duration: float):
+        """Record an engine response."""
+        self._write({'t': self._now(), 'e': 'speak', 'text': text, 'ok': ok,
+                     'dur': round(duration, 4)})
+
+    def synth(self, text: str, ok: bool, duration: float):
+        """Record a render ahead of playback."""
+        self._write({'t': self._now(), 'e': 'synth', 'text': text, 'ok': ok,
+                     'dur': round(duration, 4)})
+
+    def play(self, ok: bool, duration: float):
+        """Record playback of previously rendered audio."""
+        self._write({'t': self._now(), 'e': 'play', 'ok': ok, 'dur': round(duration, 4)})
+
+    def close(self):
+        """Flush and close the trace file."""
+        self._file.close()
+
+
+def load_trace(path: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Load a trace file.
+
+    Args:
+        path: Trace file path
+
+    Returns:
+        Tuple[Dict[str, Any], List[Dict[str, Any]]]: (header, events), with
+        the text and focus state filled in on every frame event
+    """
+    with _open(path, 'r') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"Empty trace file: {path}")
+
+    header, events = lines[0], lines[1:]
+    if header.get('version') != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version: {header.get('version')}")
+
+    text, focused = "", False
+    for event in events:
+        if event['e'] == 'frame':
+            text = event.setdefault('text', text)
+            focused = event.setdefault('focused', focused)
+    return header, events
+
+
+class RecordingCapture:
+    """Capture backend wrapper that records every frame."""
+
+    def __init__(self, capture: Any, recorder: TraceRecorder):
+        self.capture = capture
+        self.recorder = recorder
+
+    def extract_text(self) -> str:
+        text = self.capture.extract_text()
+        self.recorder.frame(text, getattr(self.capture, 'focused', bool(text)))
+        return text
+
+    def extract_text_with_confidence(self) -> Tuple[str, Optional[float]]:
+        if not hasattr(self.capture, 'extract_text_with_confidence'):
+            return self.extract_text(), None
+        text, confidence = self.capture.extract_text_with_confidence()
+        self.recorder.frame(text, getattr(self.capture, 'focused', bool(text)), confidence)
+        return text, confidence
+
+
+class TracingTTS(TTSEngine):
+    """TTS engine wrapper that times every speak, synthesize and play call.
+
+    Speak calls are appended to ``calls``, renders to ``renders`` and
+    playback of rendered audio to ``plays``; when a recorder is given
+    they are also written to the trace.
+    """
+
+    def __init__(self, tts: TTSEngine, recorder: Optional[TraceRecorder] = None):
+        self.tts = tts
+        self.recorder = recorder
+        self.calls: List[Tuple[str, bool, float]] = []
+        self.renders: List[Tuple[str, bool, float]] = []
+        self.plays: List[Tuple[bool, float]] = []
+
+    def speak(self, text: str) -> bool:
+        started = time.monotonic()
+        try:
+            ok = self.tts.speak(text) is not False
+        except Exception:
+            self._record(text, False, time.monotonic() - started)
+            raise
+        self._record(text, ok, time.monotonic() - started)
+        return ok
+
+    def _record(self, text: str, ok: bool, duration: float):
+        self.calls.append((text, ok, duration))
+        if self.recorder:
+            self.recorder.speak(text, ok, duration)
+
+    def synthesize(self, text: str, priority: int = PRIORITY_LIVE,
+                   token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        started = time.monotonic()
+        audio = self.tts.synthesize(text, priority=priority, token=token)
+        duration = time.monotonic() - started
+        self.renders.append((text, audio is not None, duration))
+        if self.recorder:
+            self.recorder.synth(text, audio is not None, duration)
+        return audio
+
+    def play_audio(self, audio: bytes, block: bool = False,
+                   token: Optional[CancellationToken] = None) -> bool:
+        started = time.monotonic()
+        ok = self.tts.play_audio(audio, block=block, token=token)
+        duration = time.monotonic() - started
+        self.plays.append((ok, duration))
+        if self.recorder:
+            self.recorder.play(ok, duration)
+        return ok
+
+    def get_available_voices(self) -> list[str]:
+        return self.tts.get_available_voices()
+
+    def is_speaking(self) -> bool:
+        return self.tts.is_speaking()
+
+    def stop(self) -> None:
+        self.tts.stop()
+
+
+class ReplayCapture:
+    """Capture backend that replays the frames of a trace in order."""
+
+    def __init__(self, events: List[Dict[str, Any]]):
+        self.frames = [e for e in events if e['e'] == 'frame']
+        self.position = 0
+        self.focused = False
+        # Recorded time of the last frame returned
+        self.time = 0.0
+
+    @property
+    def exhausted(self) -> bool:
+        return self.position >= len(self.frames)
+
+    def current_time(self) -> Optional[float]:
+        """Recorded time of the next frame, or None when exhausted."""
+        return None if self.exhausted else self.frames[self.position]['t']
+
+    def extract_text(self) -> str:
+        text, _ = self.extract_text_with_confidence()
+        return text
+
+    def extract_text_with_confidence(self) -> Tuple[str, Optional[float]]:
+        if self.exhausted:
+            return "", None
+        frame = self.frames[self.position]
+        self.position += 1
+        self.focused = frame['focused']
+        self.time = frame['t']
+        return frame['text'], frame.get('conf')
+
+
+class ReplayTTS(TTSEngine):
+    """Stand-in engine that reproduces the recorded engine latency."""
+
+    def __init__(self, events: List[Dict[str, Any]], speed: float = 1.0):
+        """Initialize the stand-in engine.
+
+        Args:
+            events: Trace events containing the recorded speak responses
+            speed: Playback speed factor; 0 disables all waiting
+        """
+        self.speed = speed
+        self._responses: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        self._plays: List[Dict[str, Any]] = []
+        for event in events:
+            if event['e'] in ('speak', 'synth'):
+                self._responses.setdefault((event['e'], event['text']), []).append(event)
+            elif event['e'] == 'play':
+                self._plays.append(event)
+
+    def _respond(self, response: Optional[Dict[str, Any]],
+                 token: Optional[CancellationToken] = None) -> bool:
+        if response is None:
+            return True
+        if self.speed:
+            (token or CancellationToken()).sleep(response['dur'] / self.speed)
+        return response['ok']
+
+    def _next(self, kind: str, text: str) -> Optional[Dict[str, Any]]:
+        responses = self._responses.get((kind, text))
+        if not responses:
+            return None
+        return responses.pop(0) if len(responses) > 1 else responses[0]
+
+    def speak(self, text: str) -> bool:
+        return self._respond(self._next('speak', text))
+
+    def synthesize(self, text: str, priority: int = PRIORITY_LIVE,
+                   token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        if not self._respond(self._next('synth', text), token):
+            return None
+        # 10ms of 16kHz mono silence per character
+        return pcm_to_wav(b"\0\0" * 160 * len(text), 16000)
+
+    def play_audio(self, audio: bytes, block: bool = False,
+                   token: Optional[CancellationToken] = None) -> bool:
+        play = self._plays.pop(0) if len(self._plays) > 1 else next(iter(self._plays), None)
+        return self._respond(play, token)
+
+    def get_available_voices(self) -> list[str]:
+        return ["replay"]
+
+    def is_speaking(self) -> bool:
+        return False
+
+    def stop(self) -> None:
+        pass
+
+
+@dataclass
+class ReplayReport:
+    """Behaviour and latency of a replayed session."""
+    frames: int = 0
+    phrases: List[str] = field(default_factory=list)
+    speak_latency: List[float] = field(default_factory=list)
+    prefetch_hits: int = 0
+    tick_time: List[float] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    def summary(self) -> Dict[str, float]:
+        """Summary statistics for comparing builds."""
+        def percentile(values, pct):
+            if not values:
+                return 0.0
+            ordered = sorted(values)
+            return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+        return {
+            'frames': self.frames,
+            'phrases': len(self.phrases),
+            'speak_mean': statistics.fmean(self.speak_latency) if self.speak_latency else 0.0,
+            'speak_p95': percentile(self.speak_latency, 0.95),
+            'prefetch_hits': self.prefetch_hits,
+            'tick_mean': statistics.fmean(self.tick_time) if self.tick_time else 0.0,
+            'tick_p95': percentile(self.tick_time, 0.95),
+            'wall_time': self.wall_time,
+        }
+
+    def save(self, path: str):
+        """Write the report as JSON."""
+        with open(path, 'w') as f:
+            json.dump(asdict(self), f, indent=4)
+
+    @classmethod
+    def load(cls, path: str) -> 'ReplayReport':
+        """Read a report written by ``save``."""
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+def replay(path: str, speed: float = 1.0, tts: Optional[TTSEngine] = None,
+           stability: Optional[Dict[str, Any]] = None,
+           prefetcher_factory: Optional[Callable[[TTSEngine], Optional[Prefetcher]]] = None
+           ) -> ReplayReport:
+    """Replay a recorded session through the automation loop.
+
+    Frames are fed in recorded order and the stability gate is timed by
+    the recorded timestamps, so the phrases spoken depend only on the
+    trace. Waits between frames follow the recorded timestamps divided
+    by ``speed``; a speed of 0 replays as fast as possible.
+
+    Args:
+        path: Trace file path
+        speed: Playback speed factor
+        tts: Engine to drive instead of the latency-reproducing stand-in
+        stability: ``stability`` configuration section for the gate;
+            defaults to the one stored in the trace header
+        prefetcher_factory: Creates the prefetcher for the replay engine,
+            or None to replay without prefetching
+
+    Returns:
+        ReplayReport: Phrases spoken and latency measurements
+    """
+    header, events = load_trace(path)
+    capture = ReplayCapture(events)
+    engine = TracingTTS(tts or ReplayTTS(events, speed))
+    report = ReplayReport()
+
+    if stability is None:
+        stability = header.get('stability', {})
+    gate = gate_from_settings(stability, clock=lambda: capture.time)
+    prefetcher = prefetcher_factory(engine) if prefetcher_factory else None
+
+    started = time.monotonic()
+    first = capture.current_time() or 0.0
+
+    def wait_for_next_frame(_interval: float):
+        next_time = capture.current_time()
+        if next_time is None or not speed:
+            return
+        delay = started + (next_time - first) / speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    loop = AutomationLoop(capture, engine, check_interval=1, sleep=wait_for_next_frame,
+                          prefetcher=prefetcher, gate=gate)
+    try:
+        while not capture.exhausted:
+            tick_started = time.monotonic()
+            phrase = loop.tick()
+            report.tick_time.append(time.monotonic() - tick_started)
+            if phrase:
+                report.phrases.append(phrase)
+            loop.sleep(loop.check_interval)
+    finally:
+        if prefetcher:
+            prefetcher.close()
+
+    report.wall_time = time.monotonic() - started
+    report.frames = len(capture.frames)
+    report.speak_latency = [duration for _, _, duration in engine.calls]
+    report.prefetch_hits = prefetcher.hits if prefetcher else 0
+    return report
@@ -2,7 +2,14 @@
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterator
+
+from ..audio import AudioPlayer
+from ..cancel import CancellationToken
+
+# Scheduling priorities for synthesis requests; lower values run first
+PRIORITY_LIVE = 0
+PRIORITY_BACKGROUND = 10
 
 @dataclass
 class TTSConfig:
@@ -11,6 +18,9 @@ class TTSConfig:
     rate: int = 175
     volume: float = 1.0
     pitch: float = 1.0
+    # Output device format; None keeps whatever the engine produces
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
     extra_options: Dict[str, Any] = None
 
     def __post_init__(self):
@@ -20,6 +30,10 @@ class TTSConfig:
 class TTSEngine(ABC):
     """Abstract base class for TTS engines."""
     
+    # Whether synthesize_stream yields audio as it arrives rather than
+    # the whole render at once
+    supports_streaming = False
+    
     @abstractmethod
     def speak(self, text: str) -> bool:
         """Speak the given text.
@@ -32,6 +46,81 @@ class TTSEngine(ABC):
         """
         pass
     
+    def synthesize(self, text: str, priority: int = PRIORITY_LIVE,
+                   token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        """Render text to WAV audio without playing it.
+        
+        Args:
+            text: The text to render
+            priority: Scheduling priority for engines with rate limits
+            token: Cancels the render; queued requests are dropped and
+                running ones abandoned
+            
+        Returns:
+            Optional[bytes]: WAV file contents, or None if the engine
+            cannot render audio ahead of playback
+            
+        Raises:
+            CancelledError: If ``token`` was cancelled
+        """
+        return None
+    
+    def synthesize_stream(self, text: str, priority: int = PRIORITY_LIVE,
+                          token: Optional[CancellationToken] = None) -> Iterator[bytes]:
+        """Render text to WAV audio, yielding it in chunks as it arrives.
+        
+        Engines without streaming support (``supports_streaming`` is
+        False) yield the whole render at once.
+        
+        Args:
+            text: The text to render
+            priority: Scheduling priority for engines with rate limits
+            token: Cancels the render between chunks
+            
+        Yields:
+            bytes: Consecutive chunks of the WAV file
+        """
+        audio = self.synthesize(text, priority=priority, token=token)
+        if audio is None:
+            raise RuntimeError(f"{type(self).__name__} cannot render audio")
+        if token is not None:
+            token.raise_if_cancelled()
+        yield audio
+    
+    def play_audio(self, audio: bytes, block: bool = False,
+                   token: Optional[CancellationToken] = None) -> bool:
+        """Play previously synthesized WAV audio.
+        
+        Args:
+            audio: WAV file contents from ``synthesize``
+            block: Wait for playback to finish
+            token: Stops playback when cancelled
+            
+        Returns:
+            bool: True if playback started, False otherwise
+        """
+        if getattr(self, '_player', None) is None:
+            self._player = AudioPlayer()
+        return self._player.play(audio, block=block, token=token)
+    
+    def _start_utterance(self) -> CancellationToken:
+        """Cancel the utterance in progress and return a token for a new one."""
+        self.cancel()
+        self._utterance = CancellationToken()
+        return self._utterance
+    
+    def cancel(self) -> None:
+        """Abandon the current utterance's synthesis and stop playback."""
+        token = getattr(self, '_utterance', None)
+        if token is not None:
+            token.cancel()
+        self.stop_audio()
+    
+    def stop_audio(self) -> None:
+        """Stop playback started by ``play_audio``."""
+        if getattr(self, '_player', None) is not None:
+            self._player.stop()
+    
     @abstractmethod
     def get_available_voices(self) -> list[str]:
         """Get list of available voices.
@@ -41,6 +130,16 @@ class TTSEngine(ABC):
         """
         pass
     
+    def get_voice_details(self) -> list[Dict[str, Any]]:
+        """Get available voices with their metadata.
+        
+        Returns:
+            list[Dict[str, Any]]: One dict per voice with at least an 'id'
+            key and, where known, 'name', 'locale', 'gender',
+            'sample_rate' and 'neural'
+        """
+        return [{'id': voice, 'name': voice} for voice in self.get_available_voices()]
+    
     @abstractmethod
     def is_speaking(self) -> bool:
         """Check if the engine is currently speaking.
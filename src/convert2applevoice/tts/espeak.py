@@ -0,0 +1,218 @@
+"""In-process eSpeak NG TTS implementation using libespeak-ng."""
+
+import ctypes
+import ctypes.util
+import threading
+from typing import Optional, Dict, Any, List
+
+from .base import TTSEngine, TTSConfig, PRIORITY_LIVE
+from .formats import to_output
+from ..cancel import CancellationToken, CancelledError
+
+# Constants from speak_lib.h
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+POS_CHARACTER = 1
+ESPEAK_CHARS_UTF8 = 1
+ESPEAK_RATE = 1
+ESPEAK_VOLUME = 2
+ESPEAK_PITCH = 3
+EE_OK = 0
+
+# int callback(short *wav, int numsamples, espeak_EVENT *events)
+SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short),
+                                  ctypes.c_int, ctypes.c_void_p)
+
+
+class _VoiceStruct(ctypes.Structure):
+    _fields_ = [
+        ('name', ctypes.c_char_p),
+        # A priority byte followed by a language name, repeated
+        ('languages', ctypes.c_void_p),
+        ('identifier', ctypes.c_char_p),
+        ('gender', ctypes.c_ubyte),
+        ('age', ctypes.c_ubyte),
+        ('variant', ctypes.c_ubyte),
+        ('xx1', ctypes.c_ubyte),
+        ('score', ctypes.c_int),
+        ('spare', ctypes.c_void_p),
+    ]
+
+
+_library: Optional[ctypes.CDLL] = None
+
+
+def find_library() -> Optional[str]:
+    """Find the eSpeak NG shared library.
+
+    Returns:
+        Optional[str]: Library name or path, or None if not installed
+    """
+    return ctypes.util.find_library('espeak-ng') or ctypes.util.find_library('espeak')
+
+
+def _load_library() -> ctypes.CDLL:
+    global _library
+    if _library is None:
+        name = find_library()
+        if not name:
+            raise OSError("libespeak-ng not found")
+        lib = ctypes.CDLL(name)
+        lib.espeak_Initialize.restype = ctypes.c_int
+        lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        lib.espeak_SetSynthCallback.argtypes = [SYNTH_CALLBACK]
+        lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        lib.espeak_SetParameter.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.espeak_Synth.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int,
+                                     ctypes.c_uint, ctypes.c_uint, ctypes.c_void_p, ctypes.c_void_p]
+        lib.espeak_ListVoices.restype = ctypes.POINTER(ctypes.POINTER(_VoiceStruct))
+        lib.espeak_ListVoices.argtypes = [ctypes.c_void_p]
+        _library = lib
+    return _library
+
+
+class ESpeakNGTTS(TTSEngine):
+    """TTS engine calling libespeak-ng directly.
+
+    The library is loaded and its voice data initialised once, so each
+    phrase costs only the synthesis itself. libespeak-ng keeps global
+    state, so only one instance should be used per process; run more
+    in a ``WorkerPool`` for concurrency.
+    """
+
+    def __init__(self, config: Optional[TTSConfig] = None):
+        """Initialize the TTS engine.
+
+        Args:
+            config: TTS configuration
+        """
+        self.config = config or TTSConfig()
+        self._lib = _load_library()
+        self._lock = threading.Lock()
+        self._samples: List[bytes] = []
+        self._token: Optional[CancellationToken] = None
+        self.sample_rate = self._lib.espeak_Initialize(AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+        if self.sample_rate <= 0:
+            raise OSError("espeak_Initialize failed")
+
+        # Keep a reference so the callback is not garbage collected
+        self._callback = SYNTH_CALLBACK(self._on_samples)
+        self._lib.espeak_SetSynthCallback(self._callback)
+        if self.config.voice and not self._set_voice(self.config.voice):
+            print(f"eSpeak NG voice not found: {self.config.voice}")
+        if self.config.rate:
+            self._lib.espeak_SetParameter(ESPEAK_RATE, int(self.config.rate), 0)
+        self._lib.espeak_SetParameter(ESPEAK_VOLUME, int(self.config.volume * 100), 0)
+        self._lib.espeak_SetParameter(ESPEAK_PITCH, int(self.config.pitch * 50), 0)
+
+    def _set_voice(self, voice: str) -> bool:
+        if self._lib.espeak_SetVoiceByName(voice.encode('utf-8')) == EE_OK:
+            return True
+        # Accept a language code such as 'en-GB' as well as a voice name
+        for details in self.get_voice_details():
+            if (details['locale'] or '').lower() == voice.lower():
+                return self._lib.espeak_SetVoiceByName(details['name'].encode('utf-8')) == EE_OK
+        return False
+
+    def _on_samples(self, wav, numsamples, events) -> int:
+        if wav and numsamples > 0:
+            self._samples.append(ctypes.string_at(wav, numsamples * 2))
+        # A non-zero return aborts synthesis
+        return 1 if self._token is not None and self._token.cancelled else 0
+
+    def synthesize(self, text: str, priority: int = PRIORITY_LIVE,
+                   token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        """Render text to WAV audio.
+
+        Args:
+            text: Text to render
+            priority: Unused; local rendering is not rate limited
+            token: Aborts synthesis at the next audio block when cancelled
+
+        Returns:
+            Optional[bytes]: WAV file contents, or None on failure
+
+        Raises:
+            CancelledError: If ``token`` was cancelled
+        """
+        data = text.encode('utf-8') + b'\0'
+        with self._lock:
+            self._samples = []
+            self._token = token
+            try:
+                result = self._lib.espeak_Synth(data, len(data), 0, POS_CHARACTER, 0,
+                                                ESPEAK_CHARS_UTF8, None, None)
+                if result != EE_OK:
+                    raise RuntimeError(f"espeak_Synth returned {result}")
+                self._lib.espeak_Synchronize()
+            except Exception as e:
+                print(f"eSpeak NG error: {str(e)}")
+                return None
+            finally:
+                self._token = None
+            pcm, self._samples = b''.join(self._samples), []
+        if token is not None:
+            token.raise_if_cancelled()
+        return to_output('espeak-ng', pcm, self.sample_rate,
+                         self.config.sample_rate, self.config.channels)
+
+    def speak(self, text: str) -> bool:
+        """Render text and play it.
+
+        Args:
+            text: Text to speak
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        token = self._start_utterance()
+        try:
+            audio = self.synthesize(text, token=token)
+        except CancelledError:
+            return False
+        if audio is None:
+            return False
+        return self.play_audio(audio, token=token)
+
+    def get_available_voices(self) -> list[str]:
+        """Get list of installed eSpeak NG voices.
+
+        Returns:
+            list[str]: List of voice names
+        """
+        return [voice['id'] for voice in self.get_voice_details()]
+
+    def get_voice_details(self) -> list[Dict[str, Any]]:
+        """Get installed voices with their languages.
+
+        Returns:
+            list[Dict[str, Any]]: Voice id, name, locale and sample rate
+        """
+        voices = []
+        entries = self._lib.espeak_ListVoices(None)
+        i = 0
+        while entries[i]:
+            voice = entries[i].contents
+            language = ctypes.string_at(voice.languages + 1)
+            voices.append({
+                'id': voice.name.decode('utf-8'),
+                'name': voice.name.decode('utf-8'),
+                'locale': language.decode('utf-8', 'replace') or None,
+                'gender': {1: 'male', 2: 'female'}.get(voice.gender),
+                'sample_rate': self.sample_rate,
+                'neural': False,
+            })
+            i += 1
+        return voices
+
+    def is_speaking(self) -> bool:
+        """Check if currently speaking.
+
+        Returns:
+            bool: True if speaking, False otherwise
+        """
+        player = getattr(self, '_player', None)
+        return bool(player and player.is_playing())
+
+    def stop(self) -> None:
+        """Stop current speech."""
+        self.cancel()
@@ -3,16 +3,20 @@
 from typing import Optional, Type
 from .base import TTSEngine, TTSConfig
 from .macos import MacOSTTS
+from .espeak import ESpeakNGTTS
 from .wrapper import WrapperTTS
 
 # Registry of available TTS engines
 TTS_ENGINES = {
     'macos': MacOSTTS,
+    'espeak-ng': ESpeakNGTTS,
     'espeak': lambda config: WrapperTTS(TTSConfig(
         voice=config.voice,
         rate=config.rate,
         volume=config.volume,
         pitch=config.pitch,
+        sample_rate=config.sample_rate,
+        channels=config.channels,
         extra_options={'engine_type': 'espeak'}
     )),
     'polly': lambda config: WrapperTTS(TTSConfig(
@@ -20,6 +24,8 @@ TTS_ENGINES = {
         rate=config.rate,
         volume=config.volume,
         pitch=config.pitch,
+        sample_rate=config.sample_rate,
+        channels=config.channels,
         extra_options={'engine_type': 'polly'}
     )),
     'watson': lambda config: WrapperTTS(TTSConfig(
@@ -27,6 +33,8 @@ TTS_ENGINES = {
         rate=config.rate,
         volume=config.volume,
         pitch=config.pitch,
+        sample_rate=config.sample_rate,
+        channels=config.channels,
         extra_options={'engine_type': 'watson'}
     )),
     'azure': lambda config: WrapperTTS(TTSConfig(
@@ -34,6 +42,8 @@ TTS_ENGINES = {
         rate=config.rate,
         volume=config.volume,
         pitch=config.pitch,
+        sample_rate=config.sample_rate,
+        channels=config.channels,
         extra_options={'engine_type': 'azure', **config.extra_options}
     )),
     'elevenlabs': lambda config: WrapperTTS(TTSConfig(
@@ -41,6 +51,8 @@ TTS_ENGINES = {
         rate=config.rate,
         volume=config.volume,
         pitch=config.pitch,
+        sample_rate=config.sample_rate,
+        channels=config.channels,
         extra_options={'engine_type': 'elevenlabs'}
     )),
 }
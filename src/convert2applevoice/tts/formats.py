@@ -0,0 +1,296 @@
+"""Output format negotiation between TTS providers and the audio device.
+
+Engines whose output format can be chosen per request ask for raw PCM
+at the output device's sample rate, so rendered audio can be played
+without decoding or resampling. Only ``say`` exposes that today: the
+tts_wrapper clients render in a format fixed by the client, and eSpeak
+NG always renders at its own rate. Anything that does not match (compressed
+audio, or PCM at another rate or channel count) goes through a fast
+fallback: compressed audio is decoded by ``ffmpeg`` straight to the
+device format, and PCM is converted with numpy.
+"""
+
+import io
+import shutil
+import subprocess
+import threading
+import time
+import wave
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, Optional
+
+import numpy as np
+
+from ..audio import pcm_to_wav
+
+
+@dataclass(frozen=True)
+class AudioFormat:
+    """An audio encoding, sample rate and channel count."""
+    encoding: str
+    sample_rate: int
+    channels: int = 1
+
+    @property
+    def is_pcm(self) -> bool:
+        return self.encoding in ('pcm', 'wav')
+
+
+@dataclass(frozen=True)
+class ProviderFormats:
+    """Output formats a provider can return."""
+    any_rate: bool = False
+    default_rate: int = 22050
+
+
+# Formats each engine can request. Only engines that pass the negotiated
+# format on to their renderer belong here; the rest are converted by
+# ``to_output`` after rendering.
+PROVIDER_FORMATS: Dict[str, ProviderFormats] = {
+    'macos': ProviderFormats(any_rate=True, default_rate=22050),
+}
+
+
+def negotiate_format(engine: str, sample_rate: Optional[int] = None,
+                     channels: Optional[int] = None) -> AudioFormat:
+    """Choose the format to request from an engine.
+
+    Raw PCM at the device rate is requested from engines that can render
+    at any rate; the rest keep their default rate and are converted by
+    ``to_output``.
+
+    Args:
+        engine: Engine name
+        sample_rate: Output device sample rate, or None to use the
+            engine's default
+        channels: Output device channel count
+
+    Returns:
+        AudioFormat: Format to request; TTS voices are always mono
+    """
+    caps = PROVIDER_FORMATS.get(engine, ProviderFormats())
+    if sample_rate is None:
+        return AudioFormat('pcm', caps.default_rate)
+    if caps.any_rate:
+        return AudioFormat('pcm', sample_rate)
+    return AudioFormat('pcm', caps.default_rate)
+
+
+def detect_encoding(data: bytes) -> str:
+    """Identify audio data from its leading bytes.
+
+    Returns:
+        str: 'wav', 'mp3', 'ogg', or 'pcm' for headerless samples
+    """
+    if data[:4] == b'RIFF' and data[8:12] == b'WAVE':
+        return 'wav'
+    if data[:4] == b'OggS':
+        return 'ogg'
+    if data[:3] == b'ID3' or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    return 'pcm'
+
+
+def _decoder_command(sample_rate: int, channels: int) -> list:
+    if shutil.which('ffmpeg'):
+        return ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', 'pipe:0',
+                '-f', 's16le', '-acodec', 'pcm_s16le', '-ar', str(sample_rate),
+                '-ac', str(channels), 'pipe:1']
+    raise RuntimeError("No decoder for compressed audio; install ffmpeg")
+
+
+def decode_compressed(data: bytes, sample_rate: int, channels: int = 1) -> bytes:
+    """Decode MP3 or Ogg audio straight to 16-bit PCM in the target format.
+
+    Args:
+        data: Compressed audio
+        sample_rate: Output sample rate
+        channels: Output channel count
+
+    Returns:
+        bytes: Raw little-endian 16-bit PCM
+    """
+    result = subprocess.run(_decoder_command(sample_rate, channels), input=data,
+                            capture_output=True, check=True)
+    return result.stdout
+
+
+def convert_pcm(pcm: bytes, from_rate: int, from_channels: int,
+                to_rate: int, to_channels: int) -> bytes:
+    """Resample and remix 16-bit PCM.
+
+    Args:
+        pcm: Raw little-endian 16-bit PCM
+        from_rate: Source sample rate
+        from_channels: Source channel count
+        to_rate: Target sample rate
+        to_channels: Target channel count
+
+    Returns:
+        bytes: Converted PCM
+    """
+    samples = np.frombuffer(pcm, dtype='<i2').reshape(-1, from_channels)
+    if from_channels != to_channels:
+        mono = samples.mean(axis=1, keepdims=True)
+        samples = np.repeat(mono, to_channels, axis=1)
+    if from_rate != to_rate and len(samples):
+        count = max(1, int(round(len(samples) * to_rate / from_rate)))
+        positions = np.arange(count) * (from_rate / to_rate)
+        source = np.arange(len(samples))
+        samples = np.stack([np.interp(positions, source, samples[:, c])
+                            for c in range(to_channels)], axis=1)
+    return np.round(samples).astype('<i2').tobytes()
+
+
+@dataclass
+class FormatStats:
+    """Per-engine record of how rendered audio reached the device format."""
+    renders: int = 0
+    native: int = 0
+    converted: int = 0
+    decoded: int = 0
+    bytes_transferred: int = 0
+    native_seconds: float = 0.0
+    decoded_seconds: float = 0.0
+    convert_time: float = 0.0
+    decode_time: float = 0.0
+
+    def summary(self, decode_cost: Optional[float] = None) -> Dict[str, Any]:
+        """Summarize the stats.
+
+        Args:
+            decode_cost: Seconds of decoding per second of audio, used to
+                estimate the decode time native renders avoided; taken
+                from this engine's own decodes when not given
+
+        Returns:
+            Dict[str, Any]: Counters plus 'decode_time_avoided' (None if
+            no decode cost is known)
+        """
+        if decode_cost is None and self.decoded_seconds:
+            decode_cost = self.decode_time / self.decoded_seconds
+        return {
+            'renders': self.renders,
+            'native': self.native,
+            'converted': self.converted,
+            'decoded': self.decoded,
+            'bytes_transferred': self.bytes_transferred,
+            'convert_time': self.convert_time,
+            'decode_time': self.decode_time,
+            'decode_time_avoided': (self.native_seconds * decode_cost
+                                    if decode_cost is not None else None),
+        }
+
+
+_stats: Dict[str, FormatStats] = {}
+_stats_lock = threading.Lock()
+
+
+def to_output(engine: str, data: bytes, source_rate: int, sample_rate: Optional[int] = None,
+              channels: Optional[int] = None) -> bytes:
+    """Bring rendered audio into the device format as WAV.
+
+    Audio that already matches is passed through untouched.
+
+    Args:
+        engine: Engine name the stats are recorded under
+        data: WAV, compressed or raw 16-bit mono PCM audio from the engine
+        source_rate: Sample rate of raw PCM input
+        sample_rate: Device sample rate, or None to keep the source rate
+        channels: Device channel count, or None to keep the source layout
+
+    Returns:
+        bytes: WAV file contents
+    """
+    started = time.monotonic()
+    encoding = detect_encoding(data)
+    rate, source_channels, wav_input = source_rate, 1, False
+
+    if encoding in ('mp3', 'ogg'):
+        rate = sample_rate or source_rate
+        source_channels = channels or 1
+        pcm = decode_compressed(data, rate, source_channels)
+        kind = 'decoded'
+    else:
+        if encoding == 'wav':
+            with wave.open(io.BytesIO(data)) as wav:
+                rate, source_channels = wav.getframerate(), wav.getnchannels()
+                pcm = wav.readframes(wav.getnframes())
+            wav_input = True
+        else:
+            pcm = data
+        target_rate = sample_rate or rate
+        target_channels = channels or source_channels
+        if (target_rate, target_channels) != (rate, source_channels):
+            pcm = convert_pcm(pcm, rate, source_channels, target_rate, target_channels)
+            rate, source_channels = target_rate, target_channels
+            kind = 'converted'
+        else:
+            kind = 'native'
+
+    output = data if kind == 'native' and wav_input else pcm_to_wav(pcm, rate, source_channels)
+    elapsed = time.monotonic() - started
+    seconds = len(pcm) / (2 * source_channels * rate) if rate else 0.0
+
+    with _stats_lock:
+        stats = _stats.setdefault(engine, FormatStats())
+        stats.renders += 1
+        stats.bytes_transferred += len(data)
+        if kind == 'native':
+            stats.native += 1
+            stats.native_seconds += seconds
+        elif kind == 'converted':
+            stats.converted += 1
+            stats.convert_time += elapsed
+        else:
+            stats.decoded += 1
+            stats.decoded_seconds += seconds
+            stats.decode_time += elapsed
+    return output
+
+
+def get_format_stats() -> Dict[str, Dict[str, Any]]:
+    """Get format stats for every engine that has rendered audio.
+
+    Engines with no decodes of their own use the decode cost measured
+    across all engines to estimate the decode time they avoided.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: ``FormatStats.summary`` per engine
+    """
+    with _stats_lock:
+        decoded_seconds = sum(s.decoded_seconds for s in _stats.values())
+        decode_cost = (sum(s.decode_time for s in _stats.values()) / decoded_seconds
+                       if decoded_seconds else None)
+        return {engine: stats.summary(None if stats.decoded_seconds else decode_cost)
+                for engine, stats in _stats.items()}
+
+
+def take_format_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the raw stats recorded since the last call and clear them.
+
+    Worker processes send these to the parent with each render, where
+    they are added in with ``merge_format_stats``.
+
+    Returns:
+        Dict[str, Dict[str, Any]]: ``FormatStats`` fields per engine
+    """
+    with _stats_lock:
+        raw = {engine: asdict(stats) for engine, stats in _stats.items()}
+        _stats.clear()
+    return raw
+
+
+def merge_format_stats(raw: Dict[str, Dict[str, Any]]):
+    """Add stats taken with ``take_format_stats`` in another process."""
+    with _stats_lock:
+        for engine, fields in raw.items():
+            stats = _stats.setdefault(engine, FormatStats())
+            for name, value in fields.items():
+                setattr(stats, name, getattr(stats, name) + value)
+
+
+def reset_format_stats():
+    """Clear the recorded format stats."""
+    with _stats_lock:
+        _stats.clear()
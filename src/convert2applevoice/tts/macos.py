@@ -1,8 +1,16 @@
 """macOS system TTS implementation."""
 
+import os
+import re
 import subprocess
-from typing import Optional
-from .base import TTSEngine, TTSConfig
+import tempfile
+from typing import Optional, Dict, Any
+from .base import TTSEngine, TTSConfig, PRIORITY_LIVE
+from .formats import negotiate_format, to_output
+from ..cancel import CancellationToken, CancelledError
+
+# A line of 'say -v ?' output, e.g. "Eddy (English (UK))  en_GB    # Hello! My name is Eddy."
+VOICE_LINE = re.compile(r'^(?P<name>.+?)\s+(?P<locale>[a-z]{2,3}_[A-Za-z0-9]+)\s+#')
 
 class MacOSTTS(TTSEngine):
     """TTS engine using macOS 'say' command."""
@@ -28,6 +36,7 @@ class MacOSTTS(TTSEngine):
         try:
             # Stop any current speech
             self.stop()
+            token = self._start_utterance()
             
             cmd = ["say"]
             if self.config.voice:
@@ -41,6 +50,7 @@ class MacOSTTS(TTSEngine):
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE
             )
+            token.on_cancel(self._current_process.kill)
             
             return True
             
@@ -48,6 +58,54 @@ class MacOSTTS(TTSEngine):
             print(f"MacOS TTS error: {str(e)}")
             return False
     
+    def synthesize(self, text: str, priority: int = PRIORITY_LIVE,
+                   token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        """Render text to WAV audio using macOS say command.
+        
+        Args:
+            text: Text to render
+            priority: Unused; local rendering is not rate limited
+            token: Kills the render process when cancelled
+            
+        Returns:
+            Optional[bytes]: WAV file contents, or None on failure
+            
+        Raises:
+            CancelledError: If ``token`` was cancelled
+        """
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            # Render straight at the device rate so no resampling is needed
+            fmt = negotiate_format('macos', self.config.sample_rate)
+            cmd = ["say", "-o", path, f"--data-format=LEI16@{fmt.sample_rate}"]
+            if self.config.voice:
+                cmd.extend(["-v", self.config.voice])
+            if self.config.rate:
+                cmd.extend(["-r", str(self.config.rate)])
+            cmd.append(text)
+            
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if token is not None:
+                token.on_cancel(process.kill)
+            _, stderr = process.communicate()
+            if token is not None:
+                token.raise_if_cancelled()
+            if process.returncode:
+                raise subprocess.CalledProcessError(process.returncode, cmd, stderr=stderr)
+            with open(path, 'rb') as f:
+                audio = f.read()
+            return to_output('macos', audio, fmt.sample_rate,
+                             self.config.sample_rate, self.config.channels)
+            
+        except CancelledError:
+            raise
+        except Exception as e:
+            print(f"MacOS TTS error: {str(e)}")
+            return None
+        finally:
+            os.unlink(path)
+    
     def get_available_voices(self) -> list[str]:
         """Get list of available system voices.
         
@@ -75,6 +133,36 @@ class MacOSTTS(TTSEngine):
             print(f"Error getting voices: {str(e)}")
             return []
     
+    def get_voice_details(self) -> list[Dict[str, Any]]:
+        """Get system voices with their locales.
+        
+        Returns:
+            list[Dict[str, Any]]: Voice id, name, locale and sample rate
+        """
+        try:
+            result = subprocess.run(
+                ["say", "-v", "?"],
+                capture_output=True,
+                text=True,
+                check=True
+            )
+        except Exception as e:
+            print(f"Error getting voices: {str(e)}")
+            return []
+            
+        voices = []
+        for line in result.stdout.splitlines():
+            match = VOICE_LINE.match(line.strip())
+            if match:
+                voices.append({
+                    'id': match['name'],
+                    'name': match['name'],
+                    'locale': match['locale'].replace('_', '-'),
+                    'sample_rate': 22050,
+                    'neural': False,
+                })
+        return voices
+    
     def is_speaking(self) -> bool:
         """Check if currently speaking.
         
@@ -89,6 +177,7 @@ class MacOSTTS(TTSEngine):
     
     def stop(self) -> None:
         """Stop current speech."""
+        self.cancel()
         if self._current_process and self.is_speaking():
             self._current_process.terminate()
             self._current_process = None
@@ -0,0 +1,678 @@
+"""Rate-limit-aware request scheduling for cloud TTS providers.
+
+Render farm and pipeline workers each run their own schedulers, so token
+buckets, throttling pauses and monthly usage are kept in files next to
+the usage file and updated under an exclusive lock. All processes on a
+machine then share one set of limits.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
+from concurrent.futures import CancelledError as FutureCancelledError
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: state is only shared between threads
+    fcntl = None
+
+from .base import PRIORITY_LIVE
+from ..cancel import CancellationToken, CancelledError
+
+
+class ThrottledError(Exception):
+    """Raised when a provider rejects a request for exceeding its rate limit."""
+
+    def __init__(self, message: str = "Request throttled", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class BudgetExceededError(Exception):
+    """Raised when a request would exceed the provider's monthly character budget."""
+
+
+@dataclass
+class ProviderLimits:
+    """Rate limits and retry policy for a TTS provider."""
+    requests_per_second: float = 5.0
+    request_burst: int = 5
+    characters_per_second: Optional[float] = None
+    character_burst: Optional[int] = None
+    monthly_characters: Optional[int] = None
+    max_concurrent: int = 1
+    max_retries: int = 5
+    backoff_base: float = 1.0
+    backoff_max: float = 30.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProviderLimits':
+        """Build limits from a config dictionary, ignoring unknown keys."""
+        known = {k: v for k, v in data.items() if k in cls.__dataclass_fields__}
+        return cls(**known)
+
+
+# Opt-in limits matching the providers' published free tiers, selected with
+# "profile": "free_tier" in a provider's rate_limits entry. Without a
+# profile, providers get the ProviderLimits defaults and no monthly budget.
+FREE_TIER_LIMITS = {
+    'polly': ProviderLimits(requests_per_second=8, request_burst=8,
+                            monthly_characters=5_000_000),
+    'azure': ProviderLimits(requests_per_second=0.33, request_burst=20,
+                            monthly_characters=500_000),
+    'elevenlabs': ProviderLimits(requests_per_second=2, request_burst=2, max_concurrent=2,
+                                 monthly_characters=10_000),
+    'watson': ProviderLimits(requests_per_second=5, request_burst=5,
+                             monthly_characters=10_000),
+}
+
+LIMIT_PROFILES = {'free_tier': FREE_TIER_LIMITS}
+
+
+class SharedStateFile:
+    """JSON file read and updated by several processes.
+
+    Updates hold an exclusive ``flock`` on a sibling ``.lock`` file for
+    the whole read-modify-write, and the file is replaced atomically, so
+    plain reads never see a partial write.
+    """
+
+    def __init__(self, path: str):
+        """Initialize the state file.
+
+        Args:
+            path: File path; created on the first update
+        """
+        self.path = Path(path).expanduser()
+        self._lock_path = self.path.with_name(self.path.name + '.lock')
+        self._lock = threading.Lock()
+
+    def read(self) -> Dict[str, Any]:
+        """Get the current contents (empty if the file does not exist)."""
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Error loading {self.path}: {str(e)}")
+            return {}
+
+    @contextmanager
+    def update(self) -> Iterator[Dict[str, Any]]:
+        """Lock the file and yield its contents; changes are written back."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self._lock_path, 'a') as lock:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                data = self.read()
+                before = json.dumps(data, sort_keys=True)
+                yield data
+                if json.dumps(data, sort_keys=True) != before:
+                    self._write(data)
+
+    def _write(self, data: Dict[str, Any]):
+        fd, tmp = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=4)
+            os.replace(tmp, self.path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+class TokenBucket:
+    """Thread-safe token bucket, optionally shared between processes."""
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic,
+                 state: Optional[SharedStateFile] = None, key: str = ''):
+        """Initialize a full bucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum number of tokens held
+            clock: Monotonic time source; must be comparable between
+                processes (e.g. ``time.time``) when ``state`` is given
+            state: File holding the bucket's level for all processes
+            key: Name of the bucket in ``state``
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.state = state
+        self.key = key
+        self._tokens = float(capacity)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = max(0.0, now - self._updated)
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def _take(self, amount: float) -> float:
+        now = self.clock()
+        self._refill(now)
+        if self._tokens >= amount:
+            self._tokens -= amount
+            return 0.0
+        return (amount - self._tokens) / self.rate
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """Take tokens if available.
+
+        Requests larger than the capacity are allowed once the bucket is full.
+
+        Args:
+            amount: Number of tokens to take
+
+        Returns:
+            float: 0 if the tokens were taken, otherwise seconds to wait
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            if self.state is None:
+                return self._take(amount)
+            with self.state.update() as data:
+                if self.key in data:
+                    self._tokens, self._updated = data[self.key]
+                wait = self._take(amount)
+                data[self.key] = [self._tokens, self._updated]
+                return wait
+
+
+def _process_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if fcntl is None:
+        # Without flock the file is not shared between processes, and
+        # os.kill would terminate the process on Windows
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class UsageTracker:
+    """Tracks characters sent to each provider per calendar month.
+
+    With a file, usage is re-read before every check and added to under
+    the file lock, so processes sharing the file share one budget. Holds
+    on characters of requests still in flight are kept in the same file,
+    per process id, and those of processes that have exited are dropped.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Initialize the tracker.
+
+        Args:
+            path: JSON file used to persist usage (in-memory only if None)
+        """
+        self.path = Path(path).expanduser() if path else None
+        self._file = SharedStateFile(str(self.path)) if self.path else None
+        # Per provider, characters used per month and, under 'reserved',
+        # characters of admitted requests not yet completed per process
+        self._usage: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _month() -> str:
+        return datetime.now(timezone.utc).strftime('%Y-%m')
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        # Pick up usage recorded by other processes
+        if self._file:
+            self._usage = self._file.read()
+        return self._usage
+
+    def used(self, provider: str) -> int:
+        """Get characters used by a provider this month."""
+        with self._lock:
+            return self._load().get(provider, {}).get(self._month(), 0)
+
+    def reserve(self, provider: str, characters: int, budget: Optional[int]) -> bool:
+        """Hold characters against the monthly budget for a request.
+
+        The check and the hold are atomic, so concurrent requests, in
+        this or any process sharing the file, cannot together overshoot
+        the budget. Release the hold with ``release``
+        once the request has been recorded with ``add`` or abandoned.
+
+        Args:
+            provider: Provider name
+            characters: Characters the request will be billed for
+            budget: Monthly character budget, or None for no limit
+
+        Returns:
+            bool: False if the request would exceed the budget
+        """
+        return self._change(self._hold, provider, characters, budget)
+
+    def release(self, provider: str, characters: int):
+        """Drop a hold taken by ``reserve``."""
+        self._change(self._drop, provider, characters)
+
+    def add(self, provider: str, characters: int):
+        """Record characters sent to a provider and persist the total."""
+        self._change(self._increment, provider, characters)
+
+    def _change(self, fn: Callable[..., Any], *args) -> Any:
+        with self._lock:
+            if self._file is None:
+                return fn(self._usage, *args)
+            with self._file.update() as usage:
+                result = fn(usage, *args)
+                self._usage = usage
+            return result
+
+    def _hold(self, usage: Dict[str, Dict[str, Any]], provider: str, characters: int,
+              budget: Optional[int]) -> bool:
+        entry = usage.setdefault(provider, {})
+        reserved = entry.setdefault('reserved', {})
+        for pid in [pid for pid in reserved if not _process_alive(int(pid))]:
+            del reserved[pid]
+        used = entry.get(self._month(), 0)
+        if budget is not None and used + sum(reserved.values()) + characters > budget:
+            return False
+        pid = str(os.getpid())
+        reserved[pid] = reserved.get(pid, 0) + characters
+        return True
+
+    def _drop(self, usage: Dict[str, Dict[str, Any]], provider: str, characters: int):
+        reserved = usage.get(provider, {}).get('reserved', {})
+        pid = str(os.getpid())
+        remaining = reserved.get(pid, 0) - characters
+        if remaining > 0:
+            reserved[pid] = remaining
+        else:
+            reserved.pop(pid, None)
+
+    def _increment(self, usage: Dict[str, Dict[str, Any]], provider: str, characters: int):
+        months = usage.setdefault(provider, {})
+        month = self._month()
+        months[month] = months.get(month, 0) + characters
+
+
+def throttle_info(error: BaseException) -> Tuple[bool, Optional[float]]:
+    """Work out whether an exception is a throttling response.
+
+    Understands ``ThrottledError`` as well as HTTP errors from urllib,
+    requests and the provider SDKs, which expose the status code and
+    headers under varying attribute names.
+
+    Args:
+        error: The exception raised by a provider call
+
+    Returns:
+        Tuple[bool, Optional[float]]: (is_throttled, retry_after_seconds)
+    """
+    if isinstance(error, ThrottledError):
+        return True, error.retry_after
+
+    response = getattr(error, 'response', None)
+    status = None
+    for source in (error, response):
+        for name in ('status_code', 'status', 'code'):
+            value = getattr(source, name, None)
+            if isinstance(value, int):
+                status = value
+                break
+        if status is not None:
+            break
+
+    if status not in (429, 503):
+        return False, None
+
+    headers = getattr(error, 'headers', None) or getattr(response, 'headers', None) or {}
+    return True, parse_retry_after(headers.get('Retry-After'))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """Schedules calls to one provider within its rate limits.
+
+    Jobs are run in priority order (live phrases before background
+    renders). Throttling responses pause the whole provider for the
+    Retry-After period, or a jittered exponential backoff, before the
+    job is retried.
+    """
+
+    def __init__(self, provider: str, limits: Optional[ProviderLimits] = None,
+                 usage: Optional[UsageTracker] = None,
+                 state: Optional[SharedStateFile] = None):
+        """Initialize the scheduler.
+
+        Args:
+            provider: Provider name used for usage tracking
+            limits: Rate limits and retry policy
+            usage: Monthly character usage tracker
+            state: File sharing the rate limit buckets and throttling
+                pauses with other processes (per process if None)
+        """
+        self.provider = provider
+        self.limits = limits or ProviderLimits()
+        self.usage = usage or UsageTracker()
+        self.state = state
+        # Shared buckets need a clock that means the same in every process
+        clock = time.time if state else time.monotonic
+        self._requests = TokenBucket(self.limits.requests_per_second, self.limits.request_burst,
+                                     clock, state, f"{provider}.requests")
+        self._characters = None
+        if self.limits.characters_per_second:
+            self._characters = TokenBucket(
+                self.limits.characters_per_second,
+                self.limits.character_burst or self.limits.characters_per_second,
+                clock, state, f"{provider}.characters",
+            )
+
+        self._queue = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._paused_until = 0.0
+        self._closed = False
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"{provider}-scheduler", daemon=True)
+            for _ in range(max(1, self.limits.max_concurrent))
+        ]
+        for worker in self._workers:
+            worker.start()
+
+        self.throttled = 0
+        self.retries = 0
+        self.cancelled = 0
+
+    def submit(self, fn: Callable[[], Any], characters: int = 0,
+               priority: int = PRIORITY_LIVE,
+               token: Optional[CancellationToken] = None) -> Future:
+        """Queue a provider call.
+
+        Args:
+            fn: Function performing the request
+            characters: Characters billed for the request
+            priority: Lower values run first
+            token: Drops the call if it has not been sent yet, or
+                abandons its result if it has
+
+        Returns:
+            Future: Resolves to the function's result
+        """
+        future = Future()
+        if token is not None:
+            token.on_cancel(lambda: self._abandon(future))
+            if future.done():
+                return future
+        if not self._reserve(characters, future):
+            return future
+
+        with self._condition:
+            if self._closed:
+                # Replaced by configure_schedulers; its workers are exiting
+                self._resolve(future, error=RuntimeError(f"{self.provider} scheduler is closed"))
+                return future
+            heapq.heappush(self._queue, (priority, next(self._counter), fn, characters, future, 0))
+            self._condition.notify()
+        return future
+
+    def _reserve(self, characters: int, future: Future) -> bool:
+        budget = self.limits.monthly_characters
+        if not self.usage.reserve(self.provider, characters, budget):
+            future.set_exception(BudgetExceededError(
+                f"{self.provider} monthly budget of {budget} characters exceeded"
+            ))
+            return False
+        # Completed requests are added to usage before they resolve
+        future.add_done_callback(lambda _: self.usage.release(self.provider, characters))
+        return True
+
+    def run(self, fn: Callable[[], Any], characters: int = 0,
+            priority: int = PRIORITY_LIVE, token: Optional[CancellationToken] = None) -> Any:
+        """Queue a provider call and wait for its result.
+
+        Raises:
+            CancelledError: If ``token`` was cancelled first
+        """
+        try:
+            return self.submit(fn, characters, priority, token).result()
+        except FutureCancelledError:
+            raise CancelledError(f"{self.provider} request cancelled")
+
+    def run_inline(self, fn: Callable[[], Any], characters: int = 0,
+                   token: Optional[CancellationToken] = None) -> Any:
+        """Run a provider call in the calling thread within the rate limits.
+
+        For calls that also play the audio, which would otherwise hold
+        one of the provider's worker slots for the whole playback. The
+        call is not retried on throttling.
+
+        Raises:
+            BudgetExceededError: If the call would exceed the monthly budget
+            CancelledError: If ``token`` was cancelled before the call
+        """
+        budget = self.limits.monthly_characters
+        if not self.usage.reserve(self.provider, characters, budget):
+            raise BudgetExceededError(
+                f"{self.provider} monthly budget of {budget} characters exceeded"
+            )
+        try:
+            self._wait_for_capacity(characters)
+            if token is not None:
+                token.raise_if_cancelled()
+            result = fn()
+            self.usage.add(self.provider, characters)
+            return result
+        finally:
+            self.usage.release(self.provider, characters)
+
+    def _abandon(self, future: Future):
+        # Queued jobs are skipped by the workers; running ones are resolved
+        # now so the caller is released, and their result discarded later
+        if future.done():
+            return
+        self.cancelled += 1
+        if not future.cancel():
+            self._resolve(future, error=CancelledError(f"{self.provider} request cancelled"))
+
+    @staticmethod
+    def _resolve(future: Future, result: Any = None, error: Optional[BaseException] = None):
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    def _backoff(self, attempt: int) -> float:
+        ceiling = min(self.limits.backoff_max, self.limits.backoff_base * (2 ** attempt))
+        return random.uniform(ceiling / 2, ceiling)
+
+    def _pause(self, delay: float):
+        # Hold back every process sharing the provider, not just this one
+        with self._condition:
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        if self.state:
+            key = f"{self.provider}.paused_until"
+            with self.state.update() as data:
+                data[key] = max(data.get(key, 0.0), time.time() + delay)
+
+    def _pause_remaining(self) -> float:
+        with self._condition:
+            pause = self._paused_until - time.monotonic()
+        if self.state:
+            shared = self.state.read().get(f"{self.provider}.paused_until", 0.0)
+            pause = max(pause, shared - time.time())
+        return pause
+
+    def _wait_for_capacity(self, characters: int):
+        while True:
+            pause = self._pause_remaining()
+            if pause > 0:
+                time.sleep(pause)
+                continue
+            wait = self._requests.try_acquire(1)
+            if wait:
+                time.sleep(wait)
+                continue
+            if self._characters and characters:
+                wait = self._characters.try_acquire(characters)
+                while wait:
+                    time.sleep(wait)
+                    wait = self._characters.try_acquire(characters)
+            return
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+                if self._closed and not self._queue:
+                    return
+                priority, _, fn, characters, future, attempt = heapq.heappop(self._queue)
+
+            # Retried jobs are already marked as running
+            if attempt == 0 and not future.set_running_or_notify_cancel():
+                continue
+            if future.done():
+                continue
+
+            self._wait_for_capacity(characters)
+            if future.done():
+                # Cancelled while waiting for capacity, so never sent
+                continue
+            try:
+                result = fn()
+            except Exception as e:
+                throttled, retry_after = throttle_info(e)
+                if not throttled or attempt >= self.limits.max_retries or future.done():
+                    self._resolve(future, error=e)
+                    continue
+
+                self.throttled += 1
+                self.retries += 1
+                delay = retry_after if retry_after is not None else self._backoff(attempt)
+                self._pause(delay)
+                with self._condition:
+                    heapq.heappush(self._queue,
+                                   (priority, next(self._counter), fn, characters, future,
+                                    attempt + 1))
+                    self._condition.notify()
+                continue
+
+            self.usage.add(self.provider, characters)
+            self._resolve(future, result)
+
+    def close(self, wait: bool = True):
+        """Stop the worker threads once queued jobs have run.
+
+        Args:
+            wait: Block until the workers have exited
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        if wait:
+            for worker in self._workers:
+                worker.join()
+
+
+_schedulers: Dict[str, RequestScheduler] = {}
+_settings: Dict[str, Any] = {'limits': {}, 'usage': None, 'state': None, 'key': None}
+_lock = threading.Lock()
+
+
+def rate_state_path(usage_file: str) -> Path:
+    """Get the file sharing rate limit state, kept next to the usage file."""
+    path = Path(usage_file).expanduser()
+    return path.with_name(f"{path.stem}-rates.json")
+
+
+def configure_schedulers(limits: Optional[Dict[str, Dict[str, Any]]] = None,
+                         usage_file: Optional[str] = None, retry_delay: Optional[float] = None):
+    """Configure the per-provider schedulers created by ``get_scheduler``.
+
+    Calling it again with the same settings keeps the existing
+    schedulers; new settings close them and start afresh. With a usage
+    file, rate limits and usage are shared by every process using it.
+
+    Args:
+        limits: Per-provider overrides of ``ProviderLimits`` fields
+        usage_file: JSON file for persisting monthly character usage
+        retry_delay: Default base delay for retry backoff in seconds
+    """
+    key = json.dumps([limits or {}, usage_file, retry_delay], sort_keys=True)
+    with _lock:
+        if key == _settings['key']:
+            return
+        _settings['key'] = key
+        _settings['limits'] = limits or {}
+        _settings['usage'] = UsageTracker(usage_file)
+        _settings['state'] = SharedStateFile(str(rate_state_path(usage_file))) if usage_file else None
+        _settings['retry_delay'] = retry_delay
+        # Engines still holding a replaced scheduler finish their queued
+        # requests, then its threads exit
+        for scheduler in _schedulers.values():
+            scheduler.close(wait=False)
+        _schedulers.clear()
+
+
+def get_scheduler(provider: str) -> RequestScheduler:
+    """Get the shared scheduler for a provider, creating it on first use.
+
+    Args:
+        provider: Provider name, e.g. 'polly' or 'azure'
+
+    Returns:
+        RequestScheduler: The process-wide scheduler for the provider
+    """
+    with _lock:
+        if provider not in _schedulers:
+            overrides = _settings['limits'].get(provider, {})
+            base = ProviderLimits()
+            profile = overrides.get('profile')
+            if profile:
+                if profile in LIMIT_PROFILES:
+                    base = LIMIT_PROFILES[profile].get(provider, base)
+                else:
+                    print(f"Unknown rate limit profile '{profile}' for {provider}")
+            data = dict(base.__dict__)
+            if _settings.get('retry_delay') is not None:
+                data['backoff_base'] = _settings['retry_delay']
+            data.update(overrides)
+            if _settings['usage'] is None:
+                _settings['usage'] = UsageTracker()
+            _schedulers[provider] = RequestScheduler(
+                provider, ProviderLimits.from_dict(data), _settings['usage'], _settings['state']
+            )
+        return _schedulers[provider]
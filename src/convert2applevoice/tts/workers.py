@@ -0,0 +1,494 @@
+"""Pools of long-running synthesis worker processes.
+
+Spawning ``say`` or initialising an engine for every phrase can cost
+more than synthesizing a short prompt. A worker process creates its
+engine once and then renders phrases sent to it over a pipe:
+
+    parent -> worker: ('synth', text, priority) | ('cancel',) | ('voices',) |
+                      ('ping',) | ('exit',)
+    worker -> parent: ('ok', {'size': n, 'formats': stats}) followed by
+                      the audio as one message, ('ok', value), or
+                      ('error', message)
+
+``cancel`` has no response of its own: it interrupts the render in
+progress, which then answers with an error, so an abandoned phrase does
+not keep the worker busy.
+
+Audio is sent with ``send_bytes`` so it is never pickled. The output
+format stats recorded while rendering travel with each render and are
+merged into the parent's, so they cover phrases rendered on workers.
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .base import TTSEngine, PRIORITY_LIVE
+from .formats import take_format_stats, merge_format_stats
+from ..cancel import CancellationToken, CancelledError
+
+# Seconds between checks of a cancellation token while waiting on a worker
+CANCEL_POLL = 0.005
+
+
+class WorkerError(Exception):
+    """Raised when a worker process dies, hangs or cannot start."""
+
+
+def _read_requests(conn, requests: "queue.Queue[Optional[tuple]]",
+                   current: List[CancellationToken]):
+    # Runs beside the render so a cancel can interrupt it
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            requests.put(None)
+            return
+        if message[0] == 'cancel':
+            current[0].cancel()
+            continue
+        if message[0] == 'synth':
+            current[0] = CancellationToken()
+            message = message + (current[0],)
+        requests.put(message)
+        if message[0] == 'exit':
+            return
+
+
+def worker_main(conn, engine_factory: Callable[[], Optional[TTSEngine]]):
+    """Run a synthesis worker until told to exit or the pipe closes."""
+    try:
+        engine = engine_factory()
+        if engine is None:
+            raise RuntimeError("Engine not found")
+    except Exception as e:
+        conn.send(('error', f"Engine failed to start: {str(e)}"))
+        return
+    conn.send(('ok', None))
+
+    requests: "queue.Queue[Optional[tuple]]" = queue.Queue()
+    current = [CancellationToken()]
+    threading.Thread(target=_read_requests, args=(conn, requests, current),
+                     name="tts-worker-reader", daemon=True).start()
+    while True:
+        message = requests.get()
+        if message is None:
+            break
+        command = message[0]
+        try:
+            if command == 'synth':
+                audio = engine.synthesize(message[1], priority=message[2], token=message[3])
+                if audio is None:
+                    raise RuntimeError(f"{type(engine).__name__} cannot render audio")
+                conn.send(('ok', {'size': len(audio), 'formats': take_format_stats()}))
+                conn.send_bytes(audio)
+            elif command == 'voices':
+                conn.send(('ok', engine.get_voice_details()))
+            elif command == 'ping':
+                conn.send(('ok', 'pong'))
+            elif command == 'exit':
+                break
+            else:
+                conn.send(('error', f"Unknown command: {command}"))
+        except CancelledError:
+            conn.send(('error', "Render cancelled"))
+        except Exception as e:
+            conn.send(('error', str(e)))
+    engine.stop()
+
+
+class EngineWorker:
+    """A synthesis process holding one warm engine."""
+
+    def __init__(self, ctx, engine_factory: Callable[[], Optional[TTSEngine]],
+                 start_timeout: float = 30.0):
+        """Start the worker and wait for its engine to be ready.
+
+        Args:
+            ctx: Multiprocessing context
+            engine_factory: Picklable callable creating the engine
+            start_timeout: Seconds to wait for the engine to start
+
+        Raises:
+            WorkerError: If the engine fails to start in time
+        """
+        self.jobs = 0
+        self.last_used = time.monotonic()
+        self._pending: Optional[str] = None
+        self._conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=worker_main, args=(child_conn, engine_factory),
+                                   name="convert2applevoice-tts-worker", daemon=True)
+        self.process.start()
+        child_conn.close()
+        self._receive(start_timeout)
+
+    def _wait(self, timeout: float, token: Optional[CancellationToken]) -> bool:
+        if token is None:
+            return self._conn.poll(timeout)
+        deadline = time.monotonic() + timeout
+        while not self._conn.poll(min(CANCEL_POLL, max(0.0, deadline - time.monotonic()))):
+            token.raise_if_cancelled()
+            if time.monotonic() >= deadline:
+                return False
+        return True
+
+    def _receive(self, timeout: float, token: Optional[CancellationToken] = None):
+        # A worker that dies or hangs is killed; an engine error is not fatal
+        try:
+            if not self._wait(timeout, token):
+                self.kill()
+                raise WorkerError(f"Worker did not respond within {timeout}s")
+            status, value = self._conn.recv()
+        except (EOFError, OSError) as e:
+            self.kill()
+            raise WorkerError(f"Worker exited: {str(e)}")
+        if status != 'ok':
+            raise WorkerError(value)
+        return value
+
+    def request(self, timeout: float, *message, token: Optional[CancellationToken] = None):
+        """Send a request and wait for its response.
+
+        Raises:
+            WorkerError: If the worker died, did not answer within
+                ``timeout`` (it is then killed) or reported an error
+            CancelledError: If ``token`` was cancelled; the response is
+                still pending and must be discarded with ``drain``
+        """
+        self.last_used = time.monotonic()
+        try:
+            self._conn.send(message)
+        except OSError as e:
+            self.kill()
+            raise WorkerError(f"Worker exited: {str(e)}")
+        self._pending = message[0]
+        value = self._receive(timeout, token)
+        self._pending = None
+        if message[0] == 'synth':
+            merge_format_stats(value['formats'])
+            try:
+                value = self._conn.recv_bytes()
+            except (EOFError, OSError) as e:
+                self.kill()
+                raise WorkerError(f"Worker exited: {str(e)}")
+        return value
+
+    def synthesize(self, text: str, timeout: float,
+                   token: Optional[CancellationToken] = None,
+                   priority: int = PRIORITY_LIVE) -> bytes:
+        """Render text to WAV audio in the worker."""
+        self.jobs += 1
+        return self.request(timeout, 'synth', text, priority, token=token)
+
+    def cancel(self):
+        """Ask the worker to stop the render in progress."""
+        try:
+            self._conn.send(('cancel',))
+        except OSError:
+            pass
+
+    def drain(self, timeout: float):
+        """Wait for and discard the response to an abandoned request."""
+        command, self._pending = self._pending, None
+        try:
+            value = self._receive(timeout)
+            if command == 'synth':
+                merge_format_stats(value['formats'])
+                self._conn.recv_bytes()
+        except WorkerError:
+            pass
+        except (EOFError, OSError):
+            self.kill()
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        """Check the worker is alive and responsive."""
+        try:
+            return self.request(timeout, 'ping') == 'pong'
+        except WorkerError:
+            return False
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self):
+        """Terminate the worker immediately."""
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join()
+        self._conn.close()
+
+    def close(self, timeout: float = 2.0):
+        """Ask the worker to exit, killing it if it does not."""
+        try:
+            self._conn.send(('exit',))
+        except OSError:
+            pass
+        self.process.join(timeout)
+        self.kill()
+
+
+class WorkerPool:
+    """A fixed number of warm engine workers.
+
+    Idle workers are pinged before reuse, replaced if they have died or
+    hung, and recycled after ``max_jobs`` phrases to bound any leaks in
+    the engine. If a replacement fails to start, an empty placeholder
+    keeps its place in the pool and the next checkout tries again, so
+    the pool never shrinks.
+    """
+
+    def __init__(self, engine_factory: Callable[[], Optional[TTSEngine]], size: int = 1,
+                 max_jobs: int = 500, timeout: float = 30.0, health_interval: float = 10.0):
+        """Start the workers.
+
+        The factory is called inside the worker processes, so it must be
+        picklable (a module-level callable or ``functools.partial``).
+
+        Args:
+            engine_factory: Creates the engine in each worker
+            size: Number of worker processes
+            max_jobs: Phrases a worker renders before it is replaced
+            timeout: Seconds to wait for a phrase before the worker is
+                considered hung
+            health_interval: Seconds a worker may sit idle before it is
+                pinged ahead of its next job
+        """
+        # pyobjc frameworks are not fork-safe, so always spawn
+        self.ctx = mp.get_context('spawn')
+        self.engine_factory = engine_factory
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self.health_interval = health_interval
+        # None is a placeholder for a worker that failed to start
+        self._idle: "queue.Queue[Optional[EngineWorker]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._closed = False
+        self.jobs = 0
+        self.errors = 0
+        self.recycled = 0
+        self.replaced = 0
+        self.cancelled = 0
+        for _ in range(self.size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> EngineWorker:
+        return EngineWorker(self.ctx, self.engine_factory)
+
+    def _refill(self):
+        # Start a replacement worker, leaving a placeholder if it fails
+        try:
+            worker = self._spawn()
+        except (WorkerError, OSError) as e:
+            print(f"Error starting TTS worker: {str(e)}")
+            worker = None
+        self._idle.put(worker)
+        if self._closed:
+            self.close()
+
+    def _checkout(self) -> EngineWorker:
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise WorkerError(f"No TTS worker became free within {self.timeout}s")
+        if worker is not None:
+            stale = time.monotonic() - worker.last_used > self.health_interval
+            if worker.alive and not (stale and not worker.ping()):
+                return worker
+            worker.kill()
+            with self._lock:
+                self.replaced += 1
+        try:
+            return self._spawn()
+        except (WorkerError, OSError) as e:
+            self._idle.put(None)
+            raise WorkerError(f"TTS worker failed to start: {str(e)}")
+
+    def _checkin(self, worker: EngineWorker):
+        if self._closed:
+            worker.close()
+            return
+        if worker.jobs < self.max_jobs:
+            self._idle.put(worker)
+            return
+
+        # Replace it off the caller's path so the phrase is not delayed
+        def recycle():
+            worker.close()
+            with self._lock:
+                self.recycled += 1
+            self._refill()
+
+        threading.Thread(target=recycle, name="tts-worker-recycle", daemon=True).start()
+
+    def _abandon(self, worker: EngineWorker):
+        # Stop the worker's render and collect its answer off the caller's
+        # path, then reuse it
+        worker.cancel()
+
+        def drain():
+            worker.drain(self.timeout)
+            if worker.alive:
+                self._checkin(worker)
+            else:
+                self._refill()
+
+        with self._lock:
+            self.cancelled += 1
+        threading.Thread(target=drain, name="tts-worker-drain", daemon=True).start()
+
+    def synthesize(self, text: str, token: Optional[CancellationToken] = None,
+                   priority: int = PRIORITY_LIVE) -> bytes:
+        """Render text to WAV audio on the next free worker.
+
+        A worker that dies or hangs is replaced and the phrase retried once.
+
+        Args:
+            text: Text to render
+            token: Returns immediately when cancelled; the worker's
+                render is interrupted and its result discarded in the
+                background
+            priority: Scheduling priority passed to the worker's engine
+
+        Raises:
+            WorkerError: If the phrase failed on two workers, no worker
+                became free or could be started in time, or the engine
+                reported an error
+            CancelledError: If ``token`` was cancelled
+        """
+        for attempt in range(2):
+            if token is not None:
+                token.raise_if_cancelled()
+            worker = self._checkout()
+            try:
+                audio = worker.synthesize(text, self.timeout, token, priority)
+            except CancelledError:
+                self._abandon(worker)
+                raise
+            except WorkerError:
+                with self._lock:
+                    self.errors += 1
+                if worker.alive:
+                    # The engine reported an error; the worker is fine
+                    self._checkin(worker)
+                    raise
+                with self._lock:
+                    self.replaced += 1
+                self._refill()
+                if attempt:
+                    raise
+                continue
+            with self._lock:
+                self.jobs += 1
+            self._checkin(worker)
+            return audio
+
+    def call(self, *message) -> Any:
+        """Send any other request to a free worker."""
+        worker = self._checkout()
+        try:
+            return worker.request(self.timeout, *message)
+        finally:
+            if worker.alive:
+                self._checkin(worker)
+            else:
+                self._refill()
+
+    def stats(self) -> Dict[str, int]:
+        """Get job and worker lifecycle counters."""
+        with self._lock:
+            return {
+                'workers': self.size,
+                'jobs': self.jobs,
+                'errors': self.errors,
+                'recycled': self.recycled,
+                'replaced': self.replaced,
+                'cancelled': self.cancelled,
+            }
+
+    def close(self):
+        """Stop all workers."""
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if worker is not None:
+                worker.close()
+
+
+class PooledTTS(TTSEngine):
+    """TTS engine that renders on a ``WorkerPool`` and plays locally."""
+
+    def __init__(self, pool: WorkerPool):
+        """Initialize the engine.
+
+        Args:
+            pool: Worker pool to render phrases on
+        """
+        self.pool = pool
+
+    def synthesize(self, text: str, priority: int = PRIORITY_LIVE,
+                   token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        """Render text to WAV audio on a worker.
+
+        Args:
+            text: Text to render
+            priority: Scheduling priority for the worker engine's rate limits
+            token: Abandons the render when cancelled
+
+        Returns:
+            Optional[bytes]: WAV file contents, or None on failure
+
+        Raises:
+            CancelledError: If ``token`` was cancelled
+        """
+        try:
+            return self.pool.synthesize(text, token, priority)
+        except WorkerError as e:
+            print(f"TTS worker error: {str(e)}")
+            return None
+
+    def speak(self, text: str) -> bool:
+        """Render text on a worker and play it.
+
+        Args:
+            text: Text to speak
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        token = self._start_utterance()
+        try:
+            audio = self.synthesize(text, token=token)
+        except CancelledError:
+            return False
+        if audio is None:
+            return False
+        return self.play_audio(audio, token=token)
+
+    def get_available_voices(self) -> list[str]:
+        return [voice['id'] for voice in self.get_voice_details()]
+
+    def get_voice_details(self) -> list[Dict[str, Any]]:
+        try:
+            return self.pool.call('voices')
+        except WorkerError as e:
+            print(f"TTS worker error: {str(e)}")
+            return []
+
+    def is_speaking(self) -> bool:
+        player = getattr(self, '_player', None)
+        return bool(player and player.is_playing())
+
+    def stop(self) -> None:
+        self.cancel()
+
+    def close(self):
+        """Stop playback and the worker processes."""
+        self.stop()
+        self.pool.close()
@@ -2,9 +2,23 @@
 
 import json
 import os
+import re
 from typing import Optional, Dict, Any, Tuple, List
-from .base import TTSEngine, TTSConfig
+from .base import TTSEngine, TTSConfig, PRIORITY_LIVE
+from .scheduler import get_scheduler
+from .formats import to_output
 from ..audio import AudioManager
+from ..cancel import CancellationToken, CancelledError
+
+# Engines that call a metered cloud API and go through a RequestScheduler
+CLOUD_ENGINES = ('azure', 'polly', 'watson', 'elevenlabs')
+
+SSML_TAG = re.compile(r'<[^>]+>')
+
+
+def billed_characters(text: str) -> int:
+    """Count the characters a provider bills for, excluding SSML markup."""
+    return len(SSML_TAG.sub('', text))
 
 class WrapperTTS(TTSEngine):
     """TTS engine using py3-tts-wrapper library."""
@@ -20,6 +34,9 @@ class WrapperTTS(TTSEngine):
         self._client = None
         self._setup_engine()
         
+        engine_type = self.config.extra_options.get('engine_type', 'espeak')
+        self._scheduler = get_scheduler(engine_type) if engine_type in CLOUD_ENGINES else None
+        
         # Set up audio routing
         if hasattr(self.config, 'audio'):
             success, message = AudioManager.setup_audio_routing(self.config)
@@ -104,38 +121,109 @@ class WrapperTTS(TTSEngine):
         except Exception as e:
             raise Exception(f"Error setting up TTS engine: {str(e)}")
     
-    def speak(self, text: str):
+    def speak(self, text: str) -> bool:
         """Speak the given text.
         
+        Only the render goes through the rate-limit scheduler; playback
+        happens afterwards so it does not hold the provider's slot.
+        
+        Args:
+            text: Text to speak
+            
+        Returns:
+            bool: True if playback started, False otherwise
+        """
+        token = self._start_utterance()
+        try:
+            audio = self.synthesize(text, token=token)
+        except CancelledError:
+            return False  # Interrupted by stop()
+        if audio is None:
+            return False
+        return self.play_audio(audio, token=token)
+    
+    def speak_streamed(self, text: str):
+        """Speak the given text with streaming.
+        
         Args:
             text: Text to speak
         """
         if not self._engine:
             raise RuntimeError("TTS engine not initialized")
             
+        characters = billed_characters(text)
         # Convert to SSML if it's not already
         if not text.startswith('<speak>'):
             text = self._engine.ssml.add(text)
             
-        self._engine.speak(text)
+        token = self._start_utterance()
+        try:
+            if self._scheduler:
+                # Streaming plays as it renders, so run it outside the
+                # scheduler's worker slots
+                self._scheduler.run_inline(lambda: self._engine.speak_streamed(text),
+                                           characters, token)
+            else:
+                self._call(lambda: self._engine.speak_streamed(text), characters, token=token)
+        except CancelledError:
+            pass  # Interrupted by stop()
     
-    def speak_streamed(self, text: str):
-        """Speak the given text with streaming.
+    def _call(self, fn, characters: int, priority: int = PRIORITY_LIVE,
+              token: Optional[CancellationToken] = None):
+        """Run a provider call, through the rate-limit scheduler for cloud engines."""
+        if self._scheduler:
+            return self._scheduler.run(fn, characters, priority, token)
+        if token is not None:
+            token.raise_if_cancelled()
+        result = fn()
+        if token is not None:
+            token.raise_if_cancelled()
+        return result
+    
+    def synthesize(self, text: str, priority: int = PRIORITY_LIVE,
+                   token: Optional[CancellationToken] = None) -> Optional[bytes]:
+        """Render the given text to WAV audio.
         
         Args:
-            text: Text to speak
+            text: Text to render
+            priority: Scheduling priority for rate-limited providers
+            token: Drops the request if it is still queued when cancelled
+            
+        Returns:
+            Optional[bytes]: WAV file contents, or None on failure
+            
+        Raises:
+            CancelledError: If ``token`` was cancelled
         """
         if not self._engine:
             raise RuntimeError("TTS engine not initialized")
             
+        characters = billed_characters(text)
         # Convert to SSML if it's not already
         if not text.startswith('<speak>'):
             text = self._engine.ssml.add(text)
             
-        self._engine.speak_streamed(text)
+        try:
+            audio = self._call(lambda: self._engine.synth_to_bytes(text), characters, priority, token)
+        except CancelledError:
+            raise
+        except Exception as e:
+            print(f"Error synthesizing audio: {str(e)}")
+            return None
+            
+        # tts_wrapper returns WAV, compressed audio, or raw 16-bit mono PCM
+        # at the engine's rate depending on the provider
+        engine_type = self.config.extra_options.get('engine_type', 'espeak')
+        try:
+            return to_output(engine_type, audio, getattr(self._engine, 'audio_rate', 22050),
+                             self.config.sample_rate, self.config.channels)
+        except Exception as e:
+            print(f"Error converting audio: {str(e)}")
+            return None
     
     def stop(self):
-        """Stop current speech."""
+        """Stop current speech and abandon queued requests."""
+        self.cancel()
         if self._engine:
             self._engine.stop()
             
@@ -166,6 +254,42 @@ class WrapperTTS(TTSEngine):
             print(f"Error getting voices: {str(e)}")
             return []
     
+    def get_voice_details(self) -> List[Dict[str, Any]]:
+        """Get available voices with their metadata.
+        
+        Returns:
+            List[Dict[str, Any]]: Voice id, name, locale, gender, sample
+            rate and whether the voice is neural
+        """
+        if not self._engine:
+            return []
+            
+        try:
+            voices = self._engine.get_voices()
+        except Exception as e:
+            print(f"Error getting voices: {str(e)}")
+            return []
+            
+        if isinstance(voices, dict):
+            voices = [{'id': key, **(value if isinstance(value, dict) else {})}
+                      for key, value in voices.items()]
+            
+        details = []
+        for voice in voices:
+            if not isinstance(voice, dict):
+                voice = {'id': str(voice)}
+            voice_id = str(voice.get('id', voice.get('name', '')))
+            codes = voice.get('language_codes') or [voice.get('locale') or voice.get('language')]
+            details.append({
+                'id': voice_id,
+                'name': voice.get('name', voice_id),
+                'locale': codes[0] if codes and codes[0] else None,
+                'gender': voice.get('gender'),
+                'sample_rate': voice.get('sample_rate', getattr(self._engine, 'audio_rate', None)),
+                'neural': 'neural' in voice_id.lower() or voice.get('engine') == 'neural',
+            })
+        return details
+    
     def is_speaking(self) -> bool:
         """Check if currently speaking.
         
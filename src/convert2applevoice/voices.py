@@ -0,0 +1,240 @@
+"""Persistent cache of the voices offered by each TTS engine."""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from .tts.base import TTSEngine
+
+
+def normalize_locale(locale: Optional[str]) -> Optional[str]:
+    """Normalize a locale code to the ``en-GB`` form.
+
+    Args:
+        locale: Locale such as 'en_GB', 'EN-gb' or 'en'
+
+    Returns:
+        Optional[str]: Normalized locale, or None
+    """
+    if not locale:
+        return None
+    parts = locale.replace('_', '-').split('-')
+    return '-'.join([parts[0].lower()] + [p.upper() if len(p) == 2 else p for p in parts[1:]])
+
+
+@dataclass
+class VoiceInfo:
+    """A voice offered by a TTS engine."""
+    engine: str
+    id: str
+    name: Optional[str] = None
+    locale: Optional[str] = None
+    gender: Optional[str] = None
+    sample_rate: Optional[int] = None
+    neural: bool = False
+
+
+class VoiceCatalogue:
+    """Voice lists for every engine, cached on disk and refreshed on a TTL.
+
+    Queries are answered from the cached data, so they are instant at
+    startup and keep working offline; stale engines are refreshed in a
+    background thread.
+    """
+
+    def __init__(self, path: str, engine_factory: Callable[[str], Optional[TTSEngine]],
+                 ttl: float = 24 * 3600):
+        """Initialize the catalogue from the on-disk cache.
+
+        Args:
+            path: JSON cache file
+            engine_factory: Function creating an engine by name for refreshes
+            ttl: Seconds before an engine's voice list is considered stale
+        """
+        self.path = Path(path).expanduser()
+        self.engine_factory = engine_factory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._fetched: Dict[str, float] = {}
+        self._voices: List[VoiceInfo] = []
+        self._by_engine: Dict[str, Set[int]] = {}
+        self._by_locale: Dict[str, Set[int]] = {}
+        self._by_language: Dict[str, Set[int]] = {}
+        self._refreshing: Dict[str, threading.Thread] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            voices = {engine: [VoiceInfo(**voice) for voice in entry['voices']]
+                      for engine, entry in data.get('engines', {}).items()}
+            fetched = {engine: entry['fetched_at']
+                       for engine, entry in data.get('engines', {}).items()}
+        except (OSError, KeyError, TypeError, json.JSONDecodeError) as e:
+            print(f"Error loading voice cache: {str(e)}")
+            return
+        with self._lock:
+            self._fetched = fetched
+            self._rebuild(voices)
+
+    def _save(self):
+        engines = {}
+        for engine, fetched_at in self._fetched.items():
+            engines[engine] = {
+                'fetched_at': fetched_at,
+                'voices': [asdict(self._voices[i]) for i in sorted(self._by_engine.get(engine, ()))],
+            }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # A unique temporary file, so concurrent writers never share one
+        with tempfile.NamedTemporaryFile('w', dir=self.path.parent, prefix=self.path.name,
+                                         suffix='.tmp', delete=False) as f:
+            json.dump({'engines': engines}, f, indent=4)
+        os.replace(f.name, self.path)
+
+    def _rebuild(self, voices_by_engine: Dict[str, List[VoiceInfo]]):
+        self._voices = []
+        self._by_engine, self._by_locale, self._by_language = {}, {}, {}
+        for engine, voices in voices_by_engine.items():
+            for voice in voices:
+                index = len(self._voices)
+                self._voices.append(voice)
+                self._by_engine.setdefault(engine, set()).add(index)
+                if voice.locale:
+                    self._by_locale.setdefault(voice.locale, set()).add(index)
+                    language = voice.locale.split('-')[0]
+                    self._by_language.setdefault(language, set()).add(index)
+
+    def _grouped(self) -> Dict[str, List[VoiceInfo]]:
+        return {engine: [self._voices[i] for i in sorted(indices)]
+                for engine, indices in self._by_engine.items()}
+
+    def engines(self) -> List[str]:
+        """Engines with a cached voice list."""
+        with self._lock:
+            return sorted(self._fetched)
+
+    def is_stale(self, engine: str) -> bool:
+        """Check if an engine's voice list is missing or older than the TTL."""
+        with self._lock:
+            fetched_at = self._fetched.get(engine)
+        return fetched_at is None or time.time() - fetched_at > self.ttl
+
+    def refresh(self, engine: str) -> bool:
+        """Fetch an engine's voice list and update the cache.
+
+        The cached list is kept if the engine cannot be reached. The
+        engine created for the refresh is closed afterwards.
+
+        Args:
+            engine: Engine name
+
+        Returns:
+            bool: True if the voice list was refreshed
+        """
+        tts = None
+        try:
+            tts = self.engine_factory(engine)
+            details = tts.get_voice_details() if tts else []
+        except Exception as e:
+            print(f"Error refreshing voices for {engine}: {str(e)}")
+            return False
+        finally:
+            if hasattr(tts, 'close'):
+                tts.close()
+        if not details:
+            return False
+
+        voices = []
+        for voice in details:
+            voices.append(VoiceInfo(
+                engine=engine,
+                id=voice['id'],
+                name=voice.get('name'),
+                locale=normalize_locale(voice.get('locale')),
+                gender=(voice.get('gender') or None) and str(voice['gender']).lower(),
+                sample_rate=voice.get('sample_rate'),
+                neural=bool(voice.get('neural')),
+            ))
+
+        with self._lock:
+            grouped = self._grouped()
+            grouped[engine] = voices
+            self._fetched[engine] = time.time()
+            self._rebuild(grouped)
+            self._save()
+        return True
+
+    def refresh_stale(self, engines: List[str], background: bool = True):
+        """Refresh the voice lists of engines that are stale.
+
+        Args:
+            engines: Engine names to check
+            background: Refresh in daemon threads instead of blocking
+        """
+        for engine in engines:
+            if not self.is_stale(engine):
+                continue
+            if not background:
+                self.refresh(engine)
+                continue
+            running = self._refreshing.get(engine)
+            if running and running.is_alive():
+                continue
+            thread = threading.Thread(target=self.refresh, args=(engine,),
+                                      name=f"voices-{engine}", daemon=True)
+            self._refreshing[engine] = thread
+            thread.start()
+
+    def wait(self, timeout: Optional[float] = None):
+        """Wait for background refreshes to finish."""
+        for thread in list(self._refreshing.values()):
+            thread.join(timeout)
+
+    def query(self, engine: Optional[str] = None, locale: Optional[str] = None,
+              gender: Optional[str] = None, neural: Optional[bool] = None) -> List[VoiceInfo]:
+        """Find cached voices matching all the given filters.
+
+        Args:
+            engine: Engine name
+            locale: Full locale ('en-GB') or language only ('en')
+            gender: Voice gender, e.g. 'female'
+            neural: Only neural (True) or non-neural (False) voices
+
+        Returns:
+            List[VoiceInfo]: Matching voices
+        """
+        with self._lock:
+            candidates: Optional[Set[int]] = None
+            if engine is not None:
+                candidates = set(self._by_engine.get(engine, ()))
+            if locale is not None:
+                locale = normalize_locale(locale)
+                index = self._by_locale if '-' in locale else self._by_language
+                matches = index.get(locale, set())
+                candidates = matches if candidates is None else candidates & matches
+            if candidates is None:
+                candidates = set(range(len(self._voices)))
+
+            voices = [self._voices[i] for i in sorted(candidates)]
+
+        if gender is not None:
+            voices = [v for v in voices if v.gender == gender.lower()]
+        if neural is not None:
+            voices = [v for v in voices if v.neural == neural]
+        return voices
+
+    def find(self, engine: str, voice: str) -> Optional[VoiceInfo]:
+        """Look up a voice by id or name (case-insensitive)."""
+        wanted = voice.lower()
+        for info in self.query(engine=engine):
+            if info.id.lower() == wanted or (info.name and info.name.lower() == wanted):
+                return info
+        return None
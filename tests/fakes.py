@@ -0,0 +1,51 @@
+"""Test doubles shared by the test modules."""
+
+from convert2applevoice.audio import pcm_to_wav
+from convert2applevoice.cancel import CancellationToken
+from convert2applevoice.tts.base import TTSEngine, PRIORITY_LIVE
+
+
+class StubTTS(TTSEngine):
+    """Engine that records phrases and renders silence instead of speaking.
+
+    Tests subclass it to fake only the behaviour they check. It is
+    importable from worker processes, so it can be used in engine
+    factories passed to a ``WorkerPool`` or pipeline stage.
+    """
+
+    def __init__(self, config=None, delay: float = 0.0):
+        """Initialize the stub.
+
+        Args:
+            config: TTS configuration (unused)
+            delay: Seconds each ``synthesize`` call takes; a cancellation
+                token interrupts it
+        """
+        self.delay = delay
+        self.spoken = []
+        self.played = []
+
+    def speak(self, text):
+        self.stop()
+        self.spoken.append(text)
+        return True
+
+    def synthesize(self, text, priority=PRIORITY_LIVE, token=None):
+        token = token or CancellationToken()
+        token.sleep(self.delay)
+        # 10ms of 16kHz mono silence per character
+        return pcm_to_wav(b"\0\0" * 160 * len(text), 16000)
+
+    def play_audio(self, audio, block=False, token=None):
+        self.played.append(audio)
+        return True
+
+    def get_available_voices(self):
+        return ["stub"]
+
+    def is_speaking(self):
+        return False
+
+    def stop(self):
+        self.cancel()
+
@@ -0,0 +1,78 @@
+"""Tests for the engine benchmark."""
+
+from convert2applevoice.audio import pcm_to_wav
+from convert2applevoice.bench import audio_duration, benchmark_engine
+from fakes import StubTTS
+
+
+class RenderingTTS(StubTTS):
+    """Fake engine rendering 0.1s of silence per character."""
+
+    def synthesize(self, text, priority=0, token=None):
+        return pcm_to_wav(b"\0\0" * 1600 * len(text), 16000)
+
+
+class StreamingTTS(RenderingTTS):
+    """Fake engine that streams its render and records when it is closed."""
+
+    supports_streaming = True
+    closed = []
+
+    def synthesize_stream(self, text, priority=0, token=None):
+        audio = self.synthesize(text)
+        yield audio[:44]
+        yield audio[44:]
+
+    def close(self):
+        self.closed.append(self)
+
+
+class SilentTTS(StubTTS):
+    """Fake engine that cannot render audio ahead of playback."""
+
+    def synthesize(self, text, priority=0, token=None):
+        return None
+
+
+def test_audio_duration():
+    """Test WAV duration parsing."""
+    assert audio_duration(pcm_to_wav(b"\0\0" * 16000, 16000)) == 1.0
+    assert audio_duration(b"not audio") == 0.0
+
+
+def test_benchmark_reports_cold_and_warm_runs():
+    """Test that cold and warm runs are timed with real-time factor."""
+    cold, warm = benchmark_engine("fake", None, lambda e, v: RenderingTTS(),
+                                  phrases=["one", "two"], warm_runs=2)
+    assert (cold.runs, warm.runs) == (2, 4)
+    summary = warm.summary()
+    assert summary['error_rate'] == 0
+    assert summary['rtf'] is not None
+    assert summary['output_bytes'] > 0
+    # The whole render arrives at once, so the first byte comes with the total
+    assert summary['streaming'] is False
+    assert summary['ttfb'] is not None
+
+
+def test_benchmark_streaming_engine_and_cleanup():
+    """Test that TTFB is reported for streaming engines and engines are closed."""
+    created = []
+
+    def factory(engine, voice):
+        created.append(StreamingTTS())
+        return created[-1]
+
+    cold, warm = benchmark_engine("fake", None, factory, phrases=["one", "two", "three"],
+                                  warm_runs=1)
+    assert warm.summary()['streaming'] is True
+    assert warm.summary()['ttfb'] is not None
+    assert len(created) == 3
+    assert StreamingTTS.closed == created
+
+
+def test_benchmark_counts_errors():
+    """Test that engines without offline rendering count as errors."""
+    cold, warm = benchmark_engine("fake", None, lambda e, v: SilentTTS(),
+                                  phrases=["one"], warm_runs=1)
+    assert cold.error_rate == 1.0
+    assert warm.error_rate == 1.0
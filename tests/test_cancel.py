@@ -0,0 +1,165 @@
+"""Tests for barge-in cancellation of synthesis and playback."""
+
+import functools
+import stat
+import threading
+import time
+
+import pytest
+
+from convert2applevoice.audio import AudioPlayer, pcm_to_wav
+from convert2applevoice.cancel import CancellationToken, CancelledError
+from convert2applevoice.prefetch import PhrasePredictor, Prefetcher
+from convert2applevoice.tts.scheduler import (
+    ProviderLimits, RequestScheduler, ThrottledError, UsageTracker,
+)
+from convert2applevoice.tts.workers import WorkerPool
+from fakes import StubTTS
+
+# Maximum time from cancel() until the cancelled work has let go
+MAX_LATENCY = 0.05
+
+
+def run_in_thread(fn):
+    """Run fn in a thread, recording its outcome and when it finished."""
+    outcome = {}
+
+    def target():
+        try:
+            outcome['result'] = fn()
+        except Exception as e:
+            outcome['error'] = e
+        outcome['finished'] = time.monotonic()
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread, outcome
+
+
+def cancel_after(token, thread, outcome, delay=0.1):
+    """Cancel once the work is under way and return the cancellation latency."""
+    time.sleep(delay)
+    token.cancel()
+    thread.join(5)
+    return outcome['finished'] - token.cancelled_at
+
+
+def test_token_runs_callbacks_once():
+    """Test callbacks run on cancel, and immediately once cancelled."""
+    token = CancellationToken()
+    calls = []
+    token.on_cancel(lambda: calls.append('a'))
+    token.cancel()
+    token.cancel()
+    token.on_cancel(lambda: calls.append('b'))
+    assert calls == ['a', 'b']
+    with pytest.raises(CancelledError):
+        token.raise_if_cancelled()
+
+
+def test_scheduler_releases_caller_and_drops_queued_jobs(tmp_path):
+    """Test that a cancelled request stops blocking and queued ones are never sent."""
+    scheduler = RequestScheduler('mock', ProviderLimits(requests_per_second=100),
+                                 UsageTracker(str(tmp_path / 'usage.json')))
+    sent = []
+    token = CancellationToken()
+    slow = scheduler.submit(lambda: time.sleep(0.5))
+    thread, outcome = run_in_thread(
+        lambda: scheduler.run(lambda: sent.append('queued'), 6, token=token))
+    try:
+        assert cancel_after(token, thread, outcome) < MAX_LATENCY
+        assert isinstance(outcome['error'], CancelledError)
+        slow.result()
+        time.sleep(0.05)
+        assert sent == []
+        assert scheduler.cancelled == 1
+    finally:
+        scheduler.close()
+
+
+def test_scheduler_drops_job_waiting_to_retry(tmp_path):
+    """Test that a throttled request is not retried after cancellation."""
+    limits = ProviderLimits(requests_per_second=100, backoff_base=0.2, backoff_max=0.2)
+    scheduler = RequestScheduler('mock', limits, UsageTracker(str(tmp_path / 'usage.json')))
+    attempts = []
+
+    def throttled():
+        attempts.append(time.monotonic())
+        raise ThrottledError(retry_after=0.2)
+
+    token = CancellationToken()
+    thread, outcome = run_in_thread(lambda: scheduler.run(throttled, token=token))
+    try:
+        assert cancel_after(token, thread, outcome, delay=0.05) < MAX_LATENCY
+        time.sleep(0.3)
+        assert len(attempts) == 1
+    finally:
+        scheduler.close()
+
+
+def test_player_stops_within_bound(tmp_path):
+    """Test that cancelling releases the audio device promptly."""
+    script = tmp_path / 'player'
+    script.write_text("#!/bin/sh\nexec sleep 5\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    player = AudioPlayer()
+    player._command = str(script)
+
+    token = CancellationToken()
+    thread, outcome = run_in_thread(
+        lambda: player.play(pcm_to_wav(b"\0\0" * 16000, 16000), block=True, token=token))
+    assert cancel_after(token, thread, outcome) < MAX_LATENCY
+    assert not player.is_playing()
+    assert player._path is None
+
+
+def test_prefetch_close_aborts_render():
+    """Test that closing the prefetcher abandons in-flight renders."""
+    prefetcher = Prefetcher(StubTTS(delay=5), PhrasePredictor(["One.", "Two."]))
+    prefetcher.observe("One.")
+    time.sleep(0.1)
+    started = time.monotonic()
+    prefetcher.close()
+    assert time.monotonic() - started < MAX_LATENCY
+    assert prefetcher.stats()['wasted'] == 0
+
+
+class PacedTTS(StubTTS):
+    """Engine taking 0.1s per character to render."""
+
+    def synthesize(self, text, priority=0, token=None):
+        (token or CancellationToken()).sleep(0.1 * len(text))
+        return super().synthesize(text, priority, token)
+
+
+def test_cancelled_worker_render_frees_worker():
+    """Test that the next phrase on a one-worker pool does not wait for a cancelled render."""
+    pool = WorkerPool(PacedTTS, size=1)
+    try:
+        token = CancellationToken()
+        thread, outcome = run_in_thread(lambda: pool.synthesize("A phrase of several seconds",
+                                                                token))
+        cancel_after(token, thread, outcome)
+        started = time.monotonic()
+        assert pool.synthesize("Next").startswith(b'RIFF')
+        # The cancelled render had over two seconds left; "Next" takes 0.4s
+        assert time.monotonic() - started < 1.0
+    finally:
+        pool.close()
+
+
+def test_worker_render_abandoned_and_worker_reused():
+    """Test that cancelling a pooled render returns at once and keeps the worker."""
+    pool = WorkerPool(functools.partial(StubTTS, delay=0.5))
+    try:
+        pid = pool._idle.queue[0].process.pid
+        token = CancellationToken()
+        thread, outcome = run_in_thread(lambda: pool.synthesize("Hello", token))
+        assert cancel_after(token, thread, outcome) < MAX_LATENCY
+        assert isinstance(outcome['error'], CancelledError)
+
+        assert pool.synthesize("Hello again").startswith(b'RIFF')
+        assert pool._idle.queue[0].process.pid == pid
+        assert pool.stats()['cancelled'] == 1
+    finally:
+        pool.close()
@@ -0,0 +1,153 @@
+"""Tests for clause-level chunked synthesis."""
+
+import io
+import threading
+import time
+import wave
+
+import numpy as np
+
+from convert2applevoice.audio import pcm_to_wav
+from convert2applevoice.chunking import ChunkedTTS, split_clauses, join_chunks
+from fakes import StubTTS
+
+LONG_PROMPT = ("When the weather turned cold last winter, we moved the garden furniture "
+               "into the shed, covered the roses, and waited patiently for spring to arrive.")
+
+RATE = 16000
+
+
+def tone(seconds):
+    t = np.arange(int(RATE * seconds)) / RATE
+    return (np.sin(2 * np.pi * 220 * t) * 8000).astype('<i2').tobytes()
+
+
+def frames(audio):
+    with wave.open(io.BytesIO(audio)) as wav:
+        return wav.getnframes()
+
+
+class SlowTTS(StubTTS):
+    """Fake engine whose render time grows with the text length."""
+
+    def __init__(self, per_char=0.001):
+        super().__init__()
+        self.per_char = per_char
+        self.rendered = []
+        self.first_played = threading.Event()
+
+    def synthesize(self, text, priority=0, token=None):
+        time.sleep(self.per_char * len(text))
+        if token is not None:
+            token.raise_if_cancelled()
+        self.rendered.append(text)
+        return pcm_to_wav(tone(0.01 * len(text)), RATE)
+
+    def play_audio(self, audio, block=False, token=None):
+        self.played.append(audio)
+        self.first_played.set()
+        if block and token is not None:
+            token.wait(0.02)
+        return True
+
+
+class FailingChunkTTS(SlowTTS):
+    """Fake engine that cannot render one particular chunk."""
+
+    def __init__(self, fail_on):
+        super().__init__(per_char=0)
+        self.fail_on = fail_on
+
+    def synthesize(self, text, priority=0, token=None):
+        if text == self.fail_on:
+            return None
+        return super().synthesize(text, priority, token)
+
+
+def test_split_at_clause_boundaries():
+    """Test splitting at punctuation, merging short pieces and splitting long ones."""
+    chunks = split_clauses(LONG_PROMPT, max_chars=60, min_chars=20)
+    assert " ".join(chunk.text for chunk in chunks) == LONG_PROMPT
+    assert chunks[0].text == "When the weather turned cold last winter,"
+    assert chunks[0].boundary == 'clause'
+    assert chunks[-1].boundary == 'end'
+    assert all(len(chunk.text) <= 60 for chunk in chunks)
+
+    # Abbreviations and decimals are not boundaries on their own
+    chunks = split_clauses("Mr. Smith paid 3.50 for it. Then he left the shop.")
+    assert [c.text for c in chunks] == ["Mr. Smith paid 3.50 for it.", "Then he left the shop."]
+    assert split_clauses("Hello.") == split_clauses("Hello.", min_chars=1)
+
+
+def test_join_with_pauses_and_crossfades():
+    """Test that gaps insert silence and negative gaps overlap the chunks."""
+    level = np.full(RATE // 2, 8000, dtype='<i2').tobytes()
+    chunks = [pcm_to_wav(level, RATE), pcm_to_wav(level, RATE)]
+    assert frames(join_chunks(chunks, [0.25])) == int(RATE * 1.25)
+    assert frames(join_chunks(chunks, [-0.02])) == int(RATE * 0.98)
+
+
+def test_live_crossfade_fades_out_and_in():
+    """Test that a crossfade is played live as a fade-out then a fade-in."""
+    level = pcm_to_wav(np.full(RATE // 10, 8000, dtype='<i2').tobytes(), RATE)
+    fade = int(RATE * 0.02)
+    ending = np.frombuffer(ChunkedTTS._shape(level, -0.02, False)[44:], dtype='<i2')
+    assert len(ending) == RATE // 10
+    assert ending[0] == 8000 and ending[-fade] > ending[-fade // 2] > ending[-1] == 0
+    starting = np.frombuffer(ChunkedTTS._shape(level, 0.1, True, fade_in=0.02)[44:],
+                             dtype='<i2')
+    assert len(starting) == RATE // 10 + RATE // 10
+    assert starting[0] == 0 < starting[fade // 2] < starting[fade] == 8000
+
+
+def test_batch_render_joins_chunks():
+    """Test that synthesize renders each clause and returns one file."""
+    tts = ChunkedTTS(SlowTTS(per_char=0), max_chars=60)
+    audio = tts.synthesize(LONG_PROMPT)
+    assert len(tts.tts.rendered) == len(tts.split(LONG_PROMPT)) > 1
+    assert audio.startswith(b'RIFF') and frames(audio) > 0
+
+
+def test_first_chunk_plays_before_whole_prompt_renders():
+    """Test time-to-first-audio is bounded by the first clause, not the prompt."""
+    engine = SlowTTS(per_char=0.002)
+    tts = ChunkedTTS(engine, max_chars=60)
+    started = time.monotonic()
+    assert tts.speak(LONG_PROMPT)
+    first_audio = time.monotonic() - started
+    whole_render = 0.002 * len(LONG_PROMPT)
+    assert first_audio < whole_render / 2
+
+    deadline = time.monotonic() + 5
+    while tts.is_speaking() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(engine.played) == len(tts.split(LONG_PROMPT))
+    stats = tts.stats()
+    assert stats['phrases'] == 1 and stats['chunks'] == len(engine.played)
+    assert (stats['ttfa'][0]['min_chars'], stats['ttfa'][0]['max_chars']) == (81, 160)
+
+
+def test_stop_abandons_remaining_chunks():
+    """Test that stopping mid-prompt plays and renders nothing further."""
+    engine = SlowTTS(per_char=0.002)
+    tts = ChunkedTTS(engine, max_chars=40)
+    tts.speak(LONG_PROMPT)
+    tts.stop()
+    time.sleep(0.3)
+    assert len(engine.played) == 1
+    assert len(engine.rendered) < len(tts.split(LONG_PROMPT))
+
+
+def test_failed_chunk_renders_rest_in_one_request():
+    """Test that a chunk that fails to render does not drop the rest of the prompt."""
+    chunks = split_clauses(LONG_PROMPT, max_chars=60)
+    engine = FailingChunkTTS(fail_on=chunks[1].text)
+    tts = ChunkedTTS(engine, max_chars=60)
+    assert tts.speak(LONG_PROMPT)
+
+    deadline = time.monotonic() + 5
+    while tts.is_speaking() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    rest = " ".join(chunk.text for chunk in chunks[1:])
+    assert engine.rendered == [chunks[0].text, rest]
+    assert len(engine.played) == 2
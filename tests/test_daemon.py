@@ -0,0 +1,170 @@
+"""Tests for the daemon and its control client."""
+
+import json
+import threading
+import time
+
+import pytest
+
+from convert2applevoice.config import Config
+from convert2applevoice.ctl import DaemonClient, DaemonError
+from convert2applevoice.daemon import ControlServer, VoiceDaemon
+from convert2applevoice.loop import AutomationLoop
+from convert2applevoice.prefetch import Prefetcher, PhrasePredictor
+from convert2applevoice.soak import FakeCapture
+from convert2applevoice.stability import StabilityGate
+from convert2applevoice.tts.scheduler import configure_schedulers, get_scheduler
+from fakes import StubTTS
+
+
+class SlowSpeakingTTS(StubTTS):
+    """Fake engine whose speak call blocks until stopped."""
+
+    def speak(self, text):
+        token = self._start_utterance()
+        self.spoken.append(text)
+        token.wait(1.0)
+        return True
+
+
+class ClosingPrefetcher(Prefetcher):
+    """Prefetcher that records whether it was closed."""
+
+    closed = False
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    config = Config(str(tmp_path / 'config.json'))
+    config.check_interval = 0.01
+    daemon = VoiceDaemon(config, lambda c: StubTTS(), lambda c: FakeCapture())
+    server = ControlServer(str(tmp_path / 'daemon.sock'), daemon)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    client = DaemonClient(str(tmp_path / 'daemon.sock'), timeout=5)
+    yield client
+    client.close()
+    server.shutdown()
+    daemon.shutdown()
+    server.server_close()
+
+
+def test_speak_and_stats(client):
+    """Test pushing phrases and reading stats over the socket."""
+    client.request('speak', text="Hello there")
+    stats = client.request('stats')
+    assert stats['state'] == 'idle'
+    assert stats['phrases_pushed'] == 1
+
+
+def test_start_pause_resume(client):
+    """Test controlling the automation loop."""
+    assert client.request('start')['state'] == 'running'
+    time.sleep(0.1)
+    assert client.request('pause')['state'] == 'paused'
+    spoken = client.request('stats')['phrases_spoken']
+    assert spoken > 0
+    time.sleep(0.1)
+    assert client.request('stats')['phrases_spoken'] == spoken
+    assert client.request('resume')['state'] == 'running'
+
+
+def test_reload_and_errors(client):
+    """Test reloading config and error responses."""
+    assert client.request('reload')['engine'] == 'azure'
+    with pytest.raises(DaemonError):
+        client.request('speak', text="")
+    with pytest.raises(DaemonError):
+        client.request('bogus')
+
+
+def test_request_latency(client):
+    """Test that warm requests are answered in milliseconds."""
+    client.request('stats')
+    started = time.monotonic()
+    for _ in range(50):
+        client.request('stats')
+    assert (time.monotonic() - started) / 50 < 0.01
+
+
+def test_commands_answered_during_tick(tmp_path):
+    """Test that a tick or a pushed phrase blocked on speech does not hold
+    up requests from other clients."""
+    config = Config(str(tmp_path / 'config.json'))
+    config.check_interval = 0.01
+    daemon = VoiceDaemon(config, lambda c: SlowSpeakingTTS(), lambda c: FakeCapture())
+    server = ControlServer(str(tmp_path / 'daemon.sock'), daemon)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    first = DaemonClient(str(tmp_path / 'daemon.sock'), timeout=5)
+    second = DaemonClient(str(tmp_path / 'daemon.sock'), timeout=5)
+    try:
+        daemon.start()
+        deadline = time.monotonic() + 5
+        while not daemon.tts.spoken and time.monotonic() < deadline:
+            time.sleep(0.01)
+        started = time.monotonic()
+        assert second.request('stats')['state'] == 'running'
+        assert time.monotonic() - started < 0.5
+
+        # One client's phrase is still being spoken when another pushes one
+        second.request('pause')
+        pushes = [threading.Thread(target=client.request, args=('speak',), kwargs={'text': text})
+                  for client, text in ((first, "First"), (second, "Second"))]
+        pushes[0].start()
+        while "First" not in daemon.tts.spoken and time.monotonic() < deadline:
+            time.sleep(0.01)
+        started = time.monotonic()
+        pushes[1].start()
+        while "Second" not in daemon.tts.spoken and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert time.monotonic() - started < 0.5
+        for push in pushes:
+            push.join()
+        assert first.request('stats')['phrases_pushed'] == 2
+    finally:
+        first.close()
+        second.close()
+        server.shutdown()
+        daemon.shutdown()
+        server.server_close()
+
+
+def test_reload_replaces_loop_cleanly(tmp_path):
+    """Test that reload closes the old prefetcher, keeps the last phrase
+    and applies the new rate limits."""
+    path = tmp_path / 'config.json'
+    config = Config(str(path))
+    config.check_interval = 0.01
+    settings = json.loads(path.read_text())
+    settings['usage_file'] = str(tmp_path / 'usage.json')
+    settings['rate_limits'] = {'polly': {'max_concurrent': 3}}
+    path.write_text(json.dumps(settings))
+
+    def loop_factory(capture, tts, config):
+        return AutomationLoop(capture, tts, check_interval=0.01,
+                              prefetcher=ClosingPrefetcher(tts, PhrasePredictor()),
+                              gate=StabilityGate(min_frames=1))
+
+    daemon = VoiceDaemon(config, lambda c: StubTTS(),
+                         lambda c: FakeCapture(phrases=["one"], blank_frames=0), loop_factory)
+    try:
+        daemon.start()
+        deadline = time.monotonic() + 5
+        while not daemon.loop.last_text and time.monotonic() < deadline:
+            time.sleep(0.01)
+        old_loop = daemon.loop
+        daemon.reload()
+        assert old_loop.prefetcher.closed
+        assert daemon.loop.last_text == "one"
+        assert get_scheduler('polly').limits.max_concurrent == 3
+
+        # The prompt still on screen is not spoken again
+        time.sleep(0.1)
+        assert daemon.loop.phrases_spoken == 0
+    finally:
+        daemon.shutdown()
+        configure_schedulers()
@@ -0,0 +1,136 @@
+"""Tests for the render farm queue and workers."""
+
+import multiprocessing as mp
+import sqlite3
+import threading
+import time
+
+from convert2applevoice.farm import RenderQueue, RenderWorker, run_worker
+from fakes import StubTTS
+
+PHRASES = [f"Phrase number {i}." for i in range(20)]
+
+
+class ClosingTTS(StubTTS):
+    """Fake engine recording when it is closed."""
+
+    closed = []
+
+    def close(self):
+        self.closed.append(self)
+
+
+def fake_engine(engine, voice):
+    return StubTTS(delay=0.05)
+
+
+def make_queue(tmp_path, max_attempts=3):
+    return RenderQueue(str(tmp_path / 'farm.db'), str(tmp_path / 'renders'), max_attempts)
+
+
+def test_enqueue_deduplicates_jobs(tmp_path):
+    """Test that re-enqueuing the same phrases adds nothing."""
+    queue = make_queue(tmp_path)
+    assert queue.enqueue('fake', 'a', PHRASES[:5]) == 5
+    assert queue.enqueue('fake', 'a', PHRASES[:6]) == 1
+    assert queue.enqueue('fake', 'b', PHRASES[:5]) == 5
+    assert queue.progress()['pending'] == 11
+
+
+def test_identical_renders_share_a_file(tmp_path):
+    """Test that results are stored once per content hash."""
+    queue = make_queue(tmp_path)
+    queue.enqueue('fake', 'a', ["Hello."])
+    queue.enqueue('fake', 'b', ["Hello."])
+    RenderWorker(queue, fake_engine, worker_id='w1').run()
+
+    results = queue.results()
+    assert len(results) == 2
+    assert results[0][3] == results[1][3] and results[0][3].exists()
+    assert queue.progress()['done'] == 2
+
+
+def test_engines_closed_when_worker_exits(tmp_path):
+    """Test that the engines a worker created are closed when its loop ends."""
+    queue = make_queue(tmp_path)
+    queue.enqueue('fake', 'a', PHRASES[:2])
+    queue.enqueue('fake', 'b', PHRASES[:2])
+    created = []
+
+    def factory(engine, voice):
+        created.append(ClosingTTS())
+        return created[-1]
+
+    worker = RenderWorker(queue, factory, worker_id='w1')
+    assert worker.run() == 4
+    assert len(created) == 2
+    assert ClosingTTS.closed == created
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    """Test that a dead worker's job is re-leased and its late result ignored."""
+    queue = make_queue(tmp_path)
+    queue.enqueue('fake', None, ["Hello."])
+    job = queue.lease('dead', lease_seconds=0.1)
+    assert queue.lease('live', lease_seconds=0.1) is None
+
+    time.sleep(0.15)
+    retry = queue.lease('live')
+    assert retry.id == job.id and retry.attempts == 2
+    assert not queue.complete(job.id, 'dead', b"late")
+    assert queue.complete(retry.id, 'live', b"audio")
+
+
+def test_failed_jobs_retry_until_max_attempts(tmp_path):
+    """Test that failures are retried and then marked failed."""
+    queue = make_queue(tmp_path, max_attempts=2)
+    queue.enqueue('fake', None, ["Hello."])
+    for _ in range(2):
+        job = queue.lease('w1')
+        queue.fail(job.id, 'w1', "boom")
+    assert queue.lease('w1') is None
+    assert queue.progress()['failed'] == 1
+    assert queue.retry_failed() == 1
+    assert queue.lease('w1') is not None
+
+
+def test_lost_lease_cancels_render(tmp_path):
+    """Test that a worker stops rendering once its lease is taken over."""
+    queue = make_queue(tmp_path)
+    queue.enqueue('fake', None, ["Hello."])
+    worker = RenderWorker(queue, lambda e, v: StubTTS(delay=5),
+                          worker_id='w1', lease_seconds=10, heartbeat_interval=0.05)
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    time.sleep(0.1)
+    with sqlite3.connect(str(tmp_path / 'farm.db')) as conn:
+        conn.execute("UPDATE jobs SET worker = 'w2'")
+    thread.join(1)
+    assert not thread.is_alive()
+    assert worker.lost == 1 and worker.completed == 0
+
+
+def test_several_worker_processes(tmp_path):
+    """Test that worker processes share the queue without duplicating work."""
+    queue = make_queue(tmp_path)
+    queue.enqueue('fake', 'a', PHRASES)
+    queue.enqueue('fake', 'b', PHRASES)
+
+    ctx = mp.get_context('spawn')
+    processes = [
+        ctx.Process(target=run_worker, args=(str(tmp_path / 'farm.db'),
+                                             str(tmp_path / 'renders'), fake_engine, f"w{i}"))
+        for i in range(3)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+
+    progress = queue.progress()
+    assert progress['done'] == 40 and progress['total'] == 40
+    with sqlite3.connect(str(tmp_path / 'farm.db')) as conn:
+        attempts = conn.execute("SELECT MAX(attempts) FROM jobs").fetchone()[0]
+        workers = conn.execute("SELECT COUNT(DISTINCT worker) FROM jobs").fetchone()[0]
+    assert attempts == 1
+    assert workers > 1
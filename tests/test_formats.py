@@ -0,0 +1,96 @@
+"""Tests for output format negotiation and conversion."""
+
+import io
+import shutil
+import wave
+
+import numpy as np
+import pytest
+
+from convert2applevoice.audio import pcm_to_wav
+from convert2applevoice.tts.formats import (
+    negotiate_format, detect_encoding, convert_pcm, to_output, get_format_stats,
+    reset_format_stats, take_format_stats, merge_format_stats,
+)
+
+
+def tone(sample_rate, seconds=0.1):
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    return (np.sin(2 * np.pi * 440 * t) * 10000).astype('<i2').tobytes()
+
+
+def wav_format(data):
+    with wave.open(io.BytesIO(data)) as wav:
+        return wav.getframerate(), wav.getnchannels(), wav.getnframes()
+
+
+def test_negotiate_prefers_native_pcm():
+    """Test that PCM at the device rate is chosen where the provider offers it."""
+    assert negotiate_format('macos', 48000).sample_rate == 48000
+    assert negotiate_format('macos', None).sample_rate == 22050
+    # Engines that cannot choose their format keep their default
+    assert negotiate_format('azure', 48000).sample_rate == 22050
+
+
+def test_detect_encoding():
+    """Test sniffing of WAV, MP3, Ogg and raw PCM."""
+    assert detect_encoding(pcm_to_wav(b'\0\0', 16000)) == 'wav'
+    assert detect_encoding(b'ID3\x04' + b'\0' * 10) == 'mp3'
+    assert detect_encoding(b'\xff\xfb\x90\x00') == 'mp3'
+    assert detect_encoding(b'OggS\0') == 'ogg'
+    assert detect_encoding(b'\x01\x00\x02\x00') == 'pcm'
+
+
+def test_convert_pcm_resamples_and_remixes():
+    """Test resampling and mono to stereo conversion keep the duration."""
+    pcm = convert_pcm(tone(22050), 22050, 1, 48000, 2)
+    assert len(pcm) == 4800 * 2 * 2
+    samples = np.frombuffer(pcm, dtype='<i2').reshape(-1, 2)
+    assert (samples[:, 0] == samples[:, 1]).all()
+
+
+def test_native_output_passed_through():
+    """Test that audio already in the device format is not touched."""
+    reset_format_stats()
+    audio = pcm_to_wav(tone(48000), 48000)
+    assert to_output('macos', audio, 48000, 48000, 1) is audio
+    stats = get_format_stats()['macos']
+    assert stats['native'] == 1 and stats['converted'] == 0
+    assert stats['bytes_transferred'] == len(audio)
+
+
+def test_raw_pcm_converted_to_device_format():
+    """Test that raw PCM at another rate is converted and counted."""
+    reset_format_stats()
+    audio = to_output('polly', tone(16000), 16000, 48000, 2)
+    assert wav_format(audio) == (48000, 2, 4800)
+    assert get_format_stats()['polly']['converted'] == 1
+
+
+@pytest.mark.skipif(not shutil.which('ffmpeg'), reason="ffmpeg not installed")
+def test_compressed_output_decoded():
+    """Test the decode fallback and the decode time avoided estimate."""
+    import subprocess
+    reset_format_stats()
+    mp3 = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-f', 's16le', '-ar', '22050', '-ac', '1',
+         '-i', 'pipe:0', '-f', 'mp3', 'pipe:1'],
+        input=tone(22050, 1.0), capture_output=True, check=True).stdout
+    rate, channels, _ = wav_format(to_output('elevenlabs', mp3, 22050, 48000, 1))
+    assert (rate, channels) == (48000, 1)
+    to_output('macos', pcm_to_wav(tone(48000), 48000), 48000, 48000, 1)
+    stats = get_format_stats()
+    assert stats['elevenlabs']['decoded'] == 1
+    assert stats['macos']['decode_time_avoided'] > 0
+
+
+def test_stats_merged_from_another_process():
+    """Test that stats taken in a worker add to the parent's."""
+    reset_format_stats()
+    to_output('macos', pcm_to_wav(tone(22050), 22050), 22050, 48000, 1)
+    raw = take_format_stats()
+    assert get_format_stats() == {}
+    merge_format_stats(raw)
+    merge_format_stats(raw)
+    assert get_format_stats()['macos']['converted'] == 2
+    reset_format_stats()
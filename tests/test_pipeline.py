@@ -0,0 +1,132 @@
+"""Tests for the process-per-stage pipeline."""
+
+import functools
+import multiprocessing as mp
+import time
+
+from convert2applevoice.pipeline import AudioSlotPool, PipelineSupervisor
+from fakes import StubTTS
+from convert2applevoice.soak import FakeCapture
+
+
+class TransientCapture:
+    """Capture backend that reads a confident transient, then the real prompt."""
+
+    def __init__(self):
+        self.frames = 0
+
+    def extract_text_with_confidence(self):
+        self.frames += 1
+        if self.frames == 1:
+            return "Transient text", 0.99
+        return "Hello there.", 0.5
+
+    def extract_text(self):
+        return self.extract_text_with_confidence()[0]
+
+
+def make_supervisor():
+    return PipelineSupervisor(
+        functools.partial(FakeCapture, frames_per_phrase=2, blank_frames=0),
+        StubTTS,
+        check_interval=0.01,
+        gate_settings={'min_frames': 2},
+        slots=2,
+        slot_size=64 * 1024,
+    )
+
+
+def wait_for(condition, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_phrases_flow_through_all_stages():
+    """Test that phrases are captured, rendered and played in separate processes."""
+    supervisor = make_supervisor()
+    supervisor.start()
+    try:
+        assert wait_for(lambda: supervisor.snapshot()['playback']['processed'] >= 5)
+        snapshot = supervisor.snapshot()
+        assert snapshot['synthesis']['errors'] == 0
+        assert all(stage['alive'] for stage in snapshot.values())
+    finally:
+        supervisor.stop()
+
+
+def test_crashed_stage_is_restarted():
+    """Test that the supervisor restarts a killed worker and keeps going."""
+    supervisor = make_supervisor()
+    supervisor.start()
+    try:
+        assert wait_for(lambda: supervisor.snapshot()['playback']['processed'] >= 1)
+        supervisor.processes['synthesis'].kill()
+        supervisor.processes['synthesis'].join()
+        assert supervisor.check() == 1
+
+        played = supervisor.snapshot()['playback']['processed']
+        assert wait_for(lambda: supervisor.snapshot()['playback']['processed'] > played + 3)
+        assert supervisor.snapshot()['synthesis']['restarts'] == 1
+    finally:
+        supervisor.stop()
+
+
+def test_slot_handed_over_is_not_reclaimed():
+    """Test that reclaiming a crashed stage's slots leaves queued slots alone."""
+    pool = AudioSlotPool(mp.get_context('spawn'), slots=2, slot_size=16)
+    try:
+        queued = pool.acquire('synthesis')
+        pool.hand_over(queued, 'queued')
+        held = pool.acquire('synthesis')
+        assert pool.reclaim('synthesis') == [held]
+        assert pool.owner(queued) == 'queued' and pool.owner(held) is None
+    finally:
+        pool.close()
+
+
+def test_queued_slot_never_sent_is_reclaimed():
+    """Test that a slot orphaned between queueing and sending is freed."""
+    pool = AudioSlotPool(mp.get_context('spawn'), slots=2, slot_size=16)
+    try:
+        sent = pool.acquire('synthesis')
+        sent_ticket = pool.enqueue(sent)
+        pool.mark_sent(sent)
+        orphan = pool.acquire('synthesis')
+        orphan_ticket = pool.enqueue(orphan)
+        assert pool.reclaim_unsent() == [orphan]
+        assert pool.owner(sent) == 'queued' and pool.owner(orphan) is None
+
+        # An index that did reach the channel before its slot was reused is ignored
+        assert pool.acquire('synthesis') == orphan
+        pool.enqueue(orphan)
+        assert not pool.claim(orphan, orphan_ticket)
+        assert pool.claim(sent, sent_ticket) and pool.owner(sent) == 'playback'
+    finally:
+        pool.close()
+
+
+def test_cancelled_transient_is_flushed():
+    """Test that a phrase the gate cancels is neither rendered nor played."""
+    supervisor = PipelineSupervisor(
+        TransientCapture,
+        functools.partial(StubTTS, delay=0.3),
+        check_interval=0.05,
+        gate_settings={'min_frames': 3, 'confidence_threshold': 0.9},
+        slots=2,
+        slot_size=64 * 1024,
+    )
+    supervisor.start()
+    try:
+        assert wait_for(lambda: supervisor.snapshot()['playback']['processed'] >= 1)
+        time.sleep(0.5)
+        snapshot = supervisor.snapshot()
+        assert snapshot['capture']['processed'] == 2
+        assert snapshot['synthesis']['processed'] == 1
+        assert snapshot['playback']['processed'] == 1
+        assert supervisor.stats.generation == 1
+    finally:
+        supervisor.stop()
@@ -0,0 +1,106 @@
+"""Tests for speculative pre-synthesis."""
+
+import threading
+import time
+
+from convert2applevoice.loop import AutomationLoop
+from convert2applevoice.prefetch import PhrasePredictor, Prefetcher
+from fakes import StubTTS
+from convert2applevoice.soak import FakeCapture
+
+PHRASES = ["First phrase.", "Second phrase.", "Third phrase.", "Fourth phrase."]
+
+
+class RenderingTTS(StubTTS):
+    """Fake engine that can render audio ahead of playback."""
+
+    def __init__(self):
+        super().__init__()
+        self.rendered = []
+
+    def synthesize(self, text, priority=0, token=None):
+        time.sleep(0.01)
+        self.rendered.append(text)
+        return text.encode()
+
+    def play_audio(self, audio, block=False, token=None):
+        self.played.append(audio.decode())
+        return True
+
+
+def test_predictor_follows_phrase_list():
+    """Test predictions follow the list order, ignoring OCR punctuation."""
+    predictor = PhrasePredictor(PHRASES)
+    predictor.observe("second phrase")
+    assert predictor.predict(2) == ["Third phrase.", "Fourth phrase."]
+
+
+def test_predictor_prefers_session_history():
+    """Test observed transitions take precedence over the list order."""
+    predictor = PhrasePredictor(PHRASES)
+    for text in ["First phrase.", "Third phrase.", "First phrase."]:
+        predictor.observe(text)
+    assert predictor.predict(1) == ["Third phrase."]
+
+
+def test_loop_plays_prefetched_audio():
+    """Test predicted phrases are played from the buffer and counted as hits."""
+    tts = RenderingTTS()
+    prefetcher = Prefetcher(tts, PhrasePredictor(PHRASES), depth=1)
+    capture = FakeCapture(phrases=PHRASES, frames_per_phrase=1, blank_frames=0)
+    loop = AutomationLoop(capture, tts, check_interval=0, prefetcher=prefetcher)
+    loop.run(max_iterations=len(PHRASES))
+    prefetcher.close()
+
+    assert len(tts.spoken) == 1
+    assert tts.played == PHRASES[1:]
+    stats = prefetcher.stats()
+    assert stats['hits'] == 3
+    assert stats['misses'] == 1
+    assert stats['wasted'] == 0
+
+
+def test_unused_renders_count_as_wasted():
+    """Test that renders never played are reported as wasted."""
+    tts = RenderingTTS()
+    prefetcher = Prefetcher(tts, PhrasePredictor(PHRASES), depth=2)
+    prefetcher.observe("First phrase.")
+    time.sleep(0.1)
+    prefetcher.close()
+    assert prefetcher.stats()['wasted'] == 2
+
+
+class OrderedTTS(RenderingTTS):
+    """Fake engine logging the order of stops, playback and renders."""
+
+    def __init__(self):
+        super().__init__()
+        self.events = []
+        self.rendering = threading.Event()
+
+    def synthesize(self, text, priority=0, token=None):
+        self.rendering.set()
+        return super().synthesize(text, priority, token)
+
+    def speak(self, text):
+        # The next phrase is already rendering while this one is spoken
+        self.events.append(('speak', self.rendering.wait(1)))
+        return True
+
+    def play_audio(self, audio, block=False, token=None):
+        self.events.append(('play', audio.decode()))
+        return True
+
+    def stop(self):
+        self.events.append(('stop', None))
+
+
+def test_loop_prefetches_during_speech_and_stops_before_playback():
+    """Test the next render starts before a miss is spoken and hits cut off prior speech."""
+    tts = OrderedTTS()
+    prefetcher = Prefetcher(tts, PhrasePredictor(PHRASES), depth=1)
+    capture = FakeCapture(phrases=PHRASES, frames_per_phrase=1, blank_frames=0)
+    loop = AutomationLoop(capture, tts, check_interval=0, prefetcher=prefetcher)
+    loop.run(max_iterations=2)
+    prefetcher.close()
+    assert tts.events == [('speak', True), ('stop', None), ('play', PHRASES[1])]
@@ -0,0 +1,301 @@
+"""Tests for the cloud TTS rate-limit scheduler."""
+
+import json
+import multiprocessing as mp
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from convert2applevoice.tts.base import PRIORITY_BACKGROUND, PRIORITY_LIVE
+from convert2applevoice.tts.scheduler import (
+    BudgetExceededError, ProviderLimits, RequestScheduler, SharedStateFile, TokenBucket,
+    UsageTracker, configure_schedulers, get_scheduler,
+)
+
+
+class MockProvider(BaseHTTPRequestHandler):
+    """Mock TTS endpoint that throttles the first few requests."""
+
+    throttle_count = 2
+    requests = 0
+
+    def do_POST(self):
+        type(self).requests += 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if type(self).requests <= self.throttle_count:
+            self.send_response(429)
+            self.send_header('Retry-After', '0.2')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b'RIFFaudio')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def mock_server():
+    MockProvider.requests = 0
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MockProvider)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/synthesize"
+    server.shutdown()
+
+
+def synthesize_request(url, text):
+    data = json.dumps({'text': text}).encode()
+    with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+        return response.read()
+
+
+def test_retries_honour_retry_after(mock_server):
+    """Test that 429 responses are retried after the Retry-After delay."""
+    scheduler = RequestScheduler('mock', ProviderLimits(requests_per_second=100, request_burst=10))
+    started = time.monotonic()
+    audio = scheduler.run(lambda: synthesize_request(mock_server, "hello"), characters=5)
+    elapsed = time.monotonic() - started
+    scheduler.close()
+
+    assert audio == b'RIFFaudio'
+    assert MockProvider.requests == 3
+    assert scheduler.throttled == 2
+    assert elapsed >= 0.4
+    assert scheduler.usage.used('mock') == 5
+
+
+def test_gives_up_after_max_retries(mock_server):
+    """Test that persistent throttling is surfaced after the retry limit."""
+    limits = ProviderLimits(requests_per_second=100, request_burst=10, max_retries=1)
+    scheduler = RequestScheduler('mock', limits)
+    with pytest.raises(urllib.error.HTTPError):
+        scheduler.run(lambda: synthesize_request(mock_server, "hello"))
+    scheduler.close()
+
+
+def test_live_requests_run_before_background():
+    """Test that queued live phrases jump ahead of background renders."""
+    order = []
+    gate = threading.Event()
+    scheduler = RequestScheduler('mock', ProviderLimits(requests_per_second=100, request_burst=10))
+    scheduler.submit(gate.wait)
+    futures = [scheduler.submit(lambda: order.append('background'), priority=PRIORITY_BACKGROUND),
+               scheduler.submit(lambda: order.append('live'), priority=PRIORITY_LIVE)]
+    gate.set()
+    for future in futures:
+        future.result()
+    scheduler.close()
+    assert order == ['live', 'background']
+
+
+def test_monthly_budget(tmp_path):
+    """Test that usage is persisted and the monthly budget enforced."""
+    usage = UsageTracker(str(tmp_path / 'usage.json'))
+    limits = ProviderLimits(requests_per_second=100, request_burst=10, monthly_characters=10)
+    scheduler = RequestScheduler('mock', limits, usage)
+    scheduler.run(lambda: None, characters=8)
+    with pytest.raises(BudgetExceededError):
+        scheduler.run(lambda: None, characters=8)
+    scheduler.close()
+    assert UsageTracker(str(tmp_path / 'usage.json')).used('mock') == 8
+
+
+def test_budget_reserved_for_queued_requests():
+    """Test that concurrent submits cannot together overshoot the budget."""
+    limits = ProviderLimits(requests_per_second=100, request_burst=10, monthly_characters=10)
+    scheduler = RequestScheduler('mock', limits)
+    release = threading.Event()
+    first = scheduler.submit(lambda: release.wait(5), characters=8)
+    second = scheduler.submit(lambda: None, characters=8)
+    with pytest.raises(BudgetExceededError):
+        second.result(1)
+    release.set()
+    first.result(5)
+    scheduler.close()
+    assert scheduler.usage.used('mock') == 8
+
+
+def test_inline_call_leaves_worker_slot_free():
+    """Test that a call run inline does not block queued renders."""
+    scheduler = RequestScheduler('mock', ProviderLimits(requests_per_second=100, request_burst=10))
+    playing = threading.Event()
+    done = threading.Event()
+
+    def speak():
+        playing.set()
+        done.wait(5)
+
+    thread = threading.Thread(target=scheduler.run_inline, args=(speak, 5))
+    thread.start()
+    playing.wait(1)
+    assert scheduler.run(lambda: 'rendered', characters=5, priority=PRIORITY_BACKGROUND) == 'rendered'
+    done.set()
+    thread.join()
+    scheduler.close()
+    assert scheduler.usage.used('mock') == 10
+
+
+def test_token_bucket_rate():
+    """Test that the bucket refills at the configured rate."""
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == 0
+    assert bucket.try_acquire() == pytest.approx(0.5)
+    now[0] = 0.5
+    assert bucket.try_acquire() == 0
+
+
+def test_unconfigured_provider_never_refused(tmp_path):
+    """Test that usage is tracked without a budget unless one is configured."""
+    try:
+        configure_schedulers(usage_file=str(tmp_path / 'usage.json'))
+        scheduler = get_scheduler('elevenlabs')
+        assert scheduler.limits.monthly_characters is None
+        for _ in range(3):
+            scheduler.run(lambda: None, characters=1_000_000)
+        assert scheduler.usage.used('elevenlabs') == 3_000_000
+
+        configure_schedulers({'elevenlabs': {'profile': 'free_tier'}},
+                             str(tmp_path / 'free.json'))
+        scheduler = get_scheduler('elevenlabs')
+        assert scheduler.limits.monthly_characters == 10_000
+        with pytest.raises(BudgetExceededError):
+            scheduler.run(lambda: None, characters=20_000)
+    finally:
+        configure_schedulers()
+
+
+def add_usage(path, times):
+    usage = UsageTracker(path)
+    for _ in range(times):
+        usage.add('mock', 1)
+
+
+def reserve_usage(path, characters, budget):
+    # Exits without releasing the hold, as a crashed process would
+    raise SystemExit(0 if UsageTracker(path).reserve('mock', characters, budget) else 1)
+
+
+def test_reservations_shared_between_processes(tmp_path):
+    """Test that in-flight holds count against the budget in every process
+    and are dropped once their process has exited."""
+    path = str(tmp_path / 'usage.json')
+    usage = UsageTracker(path)
+    ctx = mp.get_context('spawn')
+
+    def reserve_in_child():
+        process = ctx.Process(target=reserve_usage, args=(path, 8, 10))
+        process.start()
+        process.join()
+        return process.exitcode == 0
+
+    assert usage.reserve('mock', 8, 10)
+    assert not reserve_in_child()
+    usage.release('mock', 8)
+    assert reserve_in_child()
+    assert usage.reserve('mock', 8, 10)
+    assert usage.used('mock') == 0
+
+
+def test_usage_shared_between_processes(tmp_path):
+    """Test that processes adding to one usage file do not lose each other's usage."""
+    path = str(tmp_path / 'usage.json')
+    ctx = mp.get_context('spawn')
+    processes = [ctx.Process(target=add_usage, args=(path, 50)) for _ in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    assert UsageTracker(path).used('mock') == 150
+
+
+def test_rate_limit_shared_between_schedulers(tmp_path):
+    """Test that schedulers in different processes draw from one bucket."""
+    state = str(tmp_path / 'rates.json')
+    limits = ProviderLimits(requests_per_second=0.1, request_burst=2)
+    first = TokenBucket(limits.requests_per_second, limits.request_burst, time.time,
+                        SharedStateFile(state), 'mock.requests')
+    second = TokenBucket(limits.requests_per_second, limits.request_burst, time.time,
+                         SharedStateFile(state), 'mock.requests')
+    assert first.try_acquire() == 0
+    assert second.try_acquire() == 0
+    assert first.try_acquire() > 0 and second.try_acquire() > 0
+
+
+def test_configure_schedulers_once(tmp_path):
+    """Test that reconfiguring with the same settings keeps the schedulers,
+    and new settings close the old ones."""
+    usage_file = str(tmp_path / 'usage.json')
+    try:
+        configure_schedulers({'mock': {'requests_per_second': 100}}, usage_file)
+        scheduler = get_scheduler('mock')
+        configure_schedulers({'mock': {'requests_per_second': 100}}, usage_file)
+        assert get_scheduler('mock') is scheduler
+
+        configure_schedulers({'mock': {'requests_per_second': 50}}, usage_file)
+        assert get_scheduler('mock') is not scheduler
+        for worker in scheduler._workers:
+            worker.join(1)
+            assert not worker.is_alive()
+        with pytest.raises(RuntimeError):
+            scheduler.run(lambda: None)
+
+        # Throttling pauses reach every scheduler sharing the state file
+        get_scheduler('mock')._pause(0.5)
+        other = RequestScheduler('mock', state=get_scheduler('mock').state)
+        assert other._pause_remaining() > 0.3
+        other.close()
+    finally:
+        configure_schedulers()
+
+
+class FakeProviderEngine:
+    """tts_wrapper engine stand-in rendering PCM and wrapping text in SSML."""
+
+    audio_rate = 16000
+
+    class ssml:
+        @staticmethod
+        def add(text):
+            return f'<speak><prosody rate="medium">{text}</prosody></speak>'
+
+    def synth_to_bytes(self, text):
+        return b"\0\0" * 160
+
+    def stop(self):
+        pass
+
+
+def test_wrapper_speak_plays_outside_scheduler():
+    """Test that only the render is scheduled, SSML markup is not billed and
+    the render goes through output format conversion."""
+    from convert2applevoice.tts.base import TTSConfig
+    from convert2applevoice.tts.formats import get_format_stats, reset_format_stats
+    from convert2applevoice.tts.wrapper import WrapperTTS
+
+    reset_format_stats()
+
+    tts = object.__new__(WrapperTTS)
+    tts.config = TTSConfig(extra_options={'engine_type': 'mock'})
+    tts._engine = FakeProviderEngine()
+    tts._scheduler = RequestScheduler('mock', ProviderLimits(requests_per_second=100,
+                                                              request_burst=10))
+    slot_free = []
+
+    def play_audio(audio, block=False, token=None):
+        # A background render can still get the provider's only slot
+        slot_free.append(tts._scheduler.run(lambda: True, priority=PRIORITY_BACKGROUND))
+        return True
+
+    tts.play_audio = play_audio
+    assert tts.speak("Hello")
+    tts._scheduler.close()
+    assert slot_free == [True]
+    assert tts._scheduler.usage.used('mock') == len("Hello")
+    assert get_format_stats()['mock']['renders'] == 1
@@ -0,0 +1,38 @@
+"""Tests for the soak-test harness."""
+
+from convert2applevoice.loop import AutomationLoop
+from convert2applevoice.soak import FakeCapture, FakeTTS, SoakLimits, SoakRunner
+
+
+def test_loop_speaks_each_new_phrase_once():
+    """Test that repeated frames of the same prompt are only spoken once."""
+    capture = FakeCapture(phrases=["one", "two"], frames_per_phrase=3, blank_frames=1)
+    tts = FakeTTS()
+    loop = AutomationLoop(capture, tts, check_interval=0)
+    loop.run(max_iterations=8)
+    assert tts.spoken == 2
+
+
+def test_soak_passes_with_stand_in_backends():
+    """Test a short soak run stays within the default limits."""
+    loop = AutomationLoop(FakeCapture(), FakeTTS(), check_interval=0)
+    result = SoakRunner(loop, sample_every=100).run(500)
+    assert result.passed, result.violations
+    assert result.samples[-1].iteration == 500
+
+
+def test_soak_reports_leaks():
+    """Test that growth beyond the limits is reported as a violation."""
+    leaked = []
+
+    class LeakyTTS(FakeTTS):
+        def speak(self, text):
+            leaked.append(bytearray(64 * 1024))
+            return super().speak(text)
+
+    loop = AutomationLoop(FakeCapture(blank_frames=0, frames_per_phrase=1), LeakyTTS(),
+                          check_interval=0)
+    limits = SoakLimits(max_traced_growth_mb=1.0)
+    result = SoakRunner(loop, limits=limits, sample_every=50).run(100)
+    assert not result.passed
+    assert any("Traced allocations" in v for v in result.violations)
@@ -0,0 +1,71 @@
+"""Tests for the prompt stability gate."""
+
+from convert2applevoice.loop import AutomationLoop
+from fakes import StubTTS
+from convert2applevoice.stability import StabilityGate
+
+
+def feed(gate, frames):
+    return [gate.observe(*frame) if isinstance(frame, tuple) else gate.observe(frame)
+            for frame in frames]
+
+
+def test_transient_frames_are_not_emitted():
+    """Test that half-rendered text during a transition is skipped."""
+    gate = StabilityGate(min_frames=2)
+    decisions = feed(gate, ["Hello", "Hello", "Hel wor", "World", "World", "World"])
+    assert [d.emit for d in decisions] == [None, "Hello", None, None, "World", None]
+    assert gate.transients == 1
+
+
+def test_min_ms():
+    """Test that text must stay on screen for the minimum time."""
+    now = [0.0]
+    gate = StabilityGate(min_frames=1, min_ms=200, clock=lambda: now[0])
+    assert gate.observe("Hello").emit is None
+    now[0] = 0.25
+    assert gate.observe("Hello").emit == "Hello"
+
+
+def test_high_confidence_is_accepted_early_and_cancelled_if_transient():
+    """Test early acceptance and cancellation of a transient."""
+    gate = StabilityGate(min_frames=3, confidence_threshold=0.9)
+    first = gate.observe("Hel", 0.95)
+    assert first.emit == "Hel"
+    second = gate.observe("Hello there", 0.5)
+    assert second.cancel
+    assert second.emit is None
+    assert gate.cancelled == 1
+
+
+class FramesCapture:
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def extract_text_with_confidence(self):
+        return self.frames.pop(0)
+
+    def extract_text(self):
+        return self.extract_text_with_confidence()[0]
+
+
+class StoppableTTS(StubTTS):
+    stops = 0
+
+    def speak(self, text):
+        self.spoken.append(text)
+        return True
+
+    def stop(self):
+        type(self).stops += 1
+
+
+def test_loop_cancels_in_flight_speech():
+    """Test the loop stops speech for an early-accepted transient."""
+    frames = [("Hel", 0.99), ("Hello", 0.5), ("Hello", 0.5), ("Hello", 0.5)]
+    tts = StoppableTTS()
+    gate = StabilityGate(min_frames=2, confidence_threshold=0.95)
+    loop = AutomationLoop(FramesCapture(frames), tts, check_interval=0, gate=gate)
+    spoken = [loop.tick() for _ in frames]
+    assert spoken == ["Hel", None, "Hello", None]
+    assert StoppableTTS.stops == 1
@@ -0,0 +1,113 @@
+"""Tests for session record-and-replay."""
+
+import json
+
+from convert2applevoice.loop import AutomationLoop
+from convert2applevoice.prefetch import Prefetcher, PhrasePredictor
+from fakes import StubTTS
+from convert2applevoice.soak import FakeCapture
+from convert2applevoice.trace import (
+    RecordingCapture, TraceRecorder, TracingTTS, ReplayReport, load_trace, replay,
+)
+
+
+def record_session(path, iterations=12):
+    recorder = TraceRecorder(str(path), engine='fake')
+    capture = RecordingCapture(FakeCapture(phrases=["one", "two", "three"]), recorder)
+    tts = TracingTTS(StubTTS(), recorder)
+    AutomationLoop(capture, tts, check_interval=0).run(max_iterations=iterations)
+    recorder.close()
+    return tts
+
+
+def test_trace_round_trip(tmp_path):
+    """Test that frames and engine responses are recorded compactly."""
+    path = tmp_path / 'session.jsonl.gz'
+    record_session(path)
+    header, events = load_trace(str(path))
+    assert header['engine'] == 'fake'
+    frames = [e for e in events if e['e'] == 'frame']
+    assert len(frames) == 12
+    assert [e['text'] for e in events if e['e'] == 'speak'] == ["one", "two", "three"]
+
+
+def test_replay_is_deterministic(tmp_path):
+    """Test that replaying a trace speaks the same phrases in the same order."""
+    path = tmp_path / 'session.jsonl'
+    recorded = record_session(path)
+    first = replay(str(path), speed=0)
+    second = replay(str(path), speed=0)
+    assert first.phrases == second.phrases == [text for text, _, _ in recorded.calls]
+    assert first.frames == 12
+
+
+def test_report_round_trip(tmp_path):
+    """Test that reports can be saved and compared across builds."""
+    path = tmp_path / 'session.jsonl'
+    record_session(path)
+    report = replay(str(path), speed=0)
+    report.save(str(tmp_path / 'report.json'))
+    loaded = ReplayReport.load(str(tmp_path / 'report.json'))
+    assert loaded.summary()['phrases'] == 3
+
+
+class ConfidentCapture(FakeCapture):
+    """Fake capture backend that also reports an OCR confidence."""
+
+    def extract_text_with_confidence(self):
+        return self.extract_text(), 0.95
+
+
+def write_trace(path, frames, stability):
+    with open(path, 'w') as f:
+        f.write(json.dumps({'version': 1, 'stability': stability}) + '\n')
+        for t, text, conf in frames:
+            f.write(json.dumps({'t': t, 'e': 'frame', 'text': text, 'focused': bool(text),
+                                'conf': conf}) + '\n')
+
+
+def test_replay_gate_uses_trace_clock(tmp_path):
+    """Test that the gate's minimum duration is measured in recorded time."""
+    path = tmp_path / 'session.jsonl'
+    frames = [(0.0, "Hel", None)] + [(0.1 * i, "Hello there.", None) for i in range(1, 5)]
+    write_trace(path, frames, {'min_frames': 1, 'min_ms': 150})
+    report = replay(str(path), speed=0)
+    assert report.phrases == ["Hello there."]
+    assert replay(str(path), speed=0, stability={'enabled': False}).phrases == [
+        "Hel", "Hello there."]
+
+
+def test_replay_uses_recorded_confidence(tmp_path):
+    """Test that confident frames are accepted early, as when recorded."""
+    recorder = TraceRecorder(str(tmp_path / 'session.jsonl'))
+    capture = RecordingCapture(ConfidentCapture(phrases=["one"]), recorder)
+    assert capture.extract_text_with_confidence() == ("one", 0.95)
+    recorder.close()
+    _, events = load_trace(str(tmp_path / 'session.jsonl'))
+    assert events[0]['conf'] == 0.95
+
+    path = tmp_path / 'confident.jsonl'
+    write_trace(path, [(0.0, "Hello there.", 0.95)], {'min_frames': 3,
+                                                      'confidence_threshold': 0.9})
+    assert replay(str(path), speed=0).phrases == ["Hello there."]
+
+
+def test_replay_with_prefetching(tmp_path):
+    """Test that prefetch renders and playback are recorded and replayed."""
+    path = tmp_path / 'session.jsonl'
+    phrases = ["one", "two", "three"]
+    recorder = TraceRecorder(str(path))
+    capture = RecordingCapture(FakeCapture(phrases=phrases), recorder)
+    tts = TracingTTS(StubTTS(), recorder)
+    prefetcher = Prefetcher(tts, PhrasePredictor(phrases))
+    AutomationLoop(capture, tts, check_interval=0, prefetcher=prefetcher).run(max_iterations=12)
+    prefetcher.close()
+    recorder.close()
+    assert tts.renders and tts.plays
+
+    _, events = load_trace(str(path))
+    assert {'synth', 'play'} <= {e['e'] for e in events}
+    report = replay(str(path), speed=0,
+                    prefetcher_factory=lambda engine: Prefetcher(engine, PhrasePredictor(phrases)))
+    assert report.phrases == phrases
+    assert report.prefetch_hits == 2
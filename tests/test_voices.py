@@ -0,0 +1,94 @@
+"""Tests for the voice catalogue cache."""
+
+import subprocess
+
+from convert2applevoice.config import Config
+from fakes import StubTTS
+from convert2applevoice.tts.macos import MacOSTTS
+from convert2applevoice.voices import VoiceCatalogue
+
+AZURE_VOICES = [
+    {'id': 'en-GB-SoniaNeural', 'locale': 'en-GB', 'gender': 'Female', 'neural': True},
+    {'id': 'en-GB-RyanNeural', 'locale': 'en-GB', 'gender': 'Male', 'neural': True},
+    {'id': 'en-US-JennyNeural', 'locale': 'en-US', 'gender': 'Female', 'neural': True},
+    {'id': 'fr-FR-Standard', 'locale': 'fr_FR', 'gender': 'Female'},
+]
+
+
+class CatalogueTTS(StubTTS):
+    calls = 0
+    closed = 0
+
+    def get_voice_details(self):
+        type(self).calls += 1
+        return AZURE_VOICES
+
+    def close(self):
+        type(self).closed += 1
+
+
+def make_catalogue(path, **kwargs):
+    return VoiceCatalogue(str(path), lambda engine: CatalogueTTS(), **kwargs)
+
+
+def test_indexed_queries(tmp_path):
+    """Test locale, language, gender and neural filters."""
+    catalogue = make_catalogue(tmp_path / 'voices.json')
+    catalogue.refresh('azure')
+    ids = [v.id for v in catalogue.query(engine='azure', locale='en-GB', neural=True)]
+    assert ids == ['en-GB-SoniaNeural', 'en-GB-RyanNeural']
+    assert len(catalogue.query(locale='en')) == 3
+    assert [v.id for v in catalogue.query(locale='fr-FR')] == ['fr-FR-Standard']
+    assert len(catalogue.query(gender='female')) == 3
+
+
+def test_cache_is_persisted_and_respects_ttl(tmp_path):
+    """Test the cache answers from disk and only refreshes stale engines."""
+    path = tmp_path / 'voices.json'
+    CatalogueTTS.calls = 0
+    make_catalogue(path).refresh_stale(['azure'], background=False)
+    assert CatalogueTTS.calls == 1
+
+    catalogue = make_catalogue(path)
+    assert len(catalogue.query(engine='azure')) == 4
+    catalogue.refresh_stale(['azure'], background=False)
+    assert CatalogueTTS.calls == 1
+
+    stale = make_catalogue(path, ttl=0)
+    stale.refresh_stale(['azure'], background=True)
+    stale.wait()
+    assert CatalogueTTS.calls == 2
+
+
+def test_refresh_closes_engine_and_leaves_no_temp_files(tmp_path):
+    """Test the refresh engine is closed and the cache is written atomically."""
+    CatalogueTTS.closed = 0
+    catalogue = make_catalogue(tmp_path / 'voices.json')
+    assert catalogue.refresh('azure')
+    assert catalogue.refresh('google')
+    assert CatalogueTTS.closed == 2
+    assert [p.name for p in tmp_path.iterdir()] == ['voices.json']
+
+
+def test_validate_voice(tmp_path):
+    """Test config validation of tts_voice against the catalogue."""
+    catalogue = make_catalogue(tmp_path / 'voices.json')
+    config = Config(str(tmp_path / 'config.json'))
+    assert config.validate_voice(catalogue) is None
+
+    catalogue.refresh('azure')
+    assert config.validate_voice(catalogue) is None
+    config.tts_voice = 'en-GB-MissingNeural'
+    warning = config.validate_voice(catalogue)
+    assert 'en-GB-SoniaNeural' in warning
+
+
+def test_macos_voice_parsing(monkeypatch):
+    """Test parsing of 'say -v ?' output, including names with spaces."""
+    output = ("Alex                en_US    # Most people recognize me by my voice.\n"
+              "Eddy (English (UK)) en_GB    # Hello! My name is Eddy.\n")
+    monkeypatch.setattr(subprocess, 'run', lambda *a, **k: subprocess.CompletedProcess(
+        a, 0, stdout=output))
+    voices = MacOSTTS().get_voice_details()
+    assert [(v['id'], v['locale']) for v in voices] == [
+        ('Alex', 'en-US'), ('Eddy (English (UK))', 'en-GB')]
@@ -0,0 +1,195 @@
+"""Tests for the persistent synthesis worker pool."""
+
+import functools
+import os
+import time
+
+import pytest
+
+from fakes import StubTTS
+from convert2applevoice.prefetch import PhrasePredictor, Prefetcher
+from convert2applevoice.tts.base import PRIORITY_BACKGROUND, PRIORITY_LIVE
+from convert2applevoice.tts.espeak import ESpeakNGTTS, find_library
+from convert2applevoice.tts.formats import get_format_stats, reset_format_stats, to_output
+from convert2applevoice.tts.scheduler import ProviderLimits, RequestScheduler
+from convert2applevoice.tts.workers import PooledTTS, WorkerPool, WorkerError
+
+
+class SilentTTS(StubTTS):
+    """Engine that cannot render audio ahead of playback."""
+
+    def synthesize(self, text, priority=0, token=None):
+        return None
+
+
+class ConvertingTTS(StubTTS):
+    """Engine that resamples its render to a 48 kHz device."""
+
+    def synthesize(self, text, priority=0, token=None):
+        return to_output('stub', super().synthesize(text), 16000, 48000, 1)
+
+
+class OneShotTTS(StubTTS):
+    """Engine that starts once, then fails while ``marker`` exists."""
+
+    def __init__(self, marker):
+        if os.path.exists(marker):
+            raise RuntimeError("Engine unavailable")
+        open(marker, 'w').close()
+        super().__init__()
+
+
+class LimitedTTS(StubTTS):
+    """Engine rendering through a rate-limited provider, logging each
+    request's priority to ``log``."""
+
+    def __init__(self, log):
+        super().__init__()
+        self.log = log
+        self._scheduler = RequestScheduler('mock', ProviderLimits(requests_per_second=100,
+                                                                  request_burst=10))
+
+    def synthesize(self, text, priority=PRIORITY_LIVE, token=None):
+        def render():
+            with open(self.log, 'a') as f:
+                f.write(f"{priority} {text}\n")
+            return super(LimitedTTS, self).synthesize(text, priority, token)
+
+        return self._scheduler.run(render, len(text), priority, token)
+
+
+def worker_pids(pool):
+    return sorted(worker.process.pid for worker in list(pool._idle.queue))
+
+
+def test_worker_stays_warm_between_phrases():
+    """Test that phrases are rendered by the same long-running process."""
+    pool = WorkerPool(StubTTS)
+    try:
+        pids = worker_pids(pool)
+        for text in ["One", "Two", "Three"]:
+            assert pool.synthesize(text).startswith(b'RIFF')
+        assert worker_pids(pool) == pids
+        assert pool.stats()['jobs'] == 3
+    finally:
+        pool.close()
+
+
+def test_worker_recycled_after_max_jobs():
+    """Test that a worker is replaced once it reaches its job limit."""
+    pool = WorkerPool(StubTTS, max_jobs=2)
+    try:
+        pids = worker_pids(pool)
+        pool.synthesize("One")
+        pool.synthesize("Two")
+        assert pool.synthesize("Three").startswith(b'RIFF')
+        assert pool.stats()['recycled'] == 1
+        assert worker_pids(pool) != pids
+    finally:
+        pool.close()
+
+
+def test_dead_worker_replaced_and_phrase_retried():
+    """Test that a crashed worker is replaced without losing the phrase."""
+    pool = WorkerPool(StubTTS, health_interval=0)
+    try:
+        worker = pool._idle.queue[0]
+        worker.process.kill()
+        worker.process.join()
+        assert pool.synthesize("Hello").startswith(b'RIFF')
+        assert pool.stats()['replaced'] == 1
+    finally:
+        pool.close()
+
+
+def test_engine_error_keeps_worker():
+    """Test that an engine error is reported without restarting the worker."""
+    tts = PooledTTS(WorkerPool(SilentTTS))
+    try:
+        pids = worker_pids(tts.pool)
+        assert tts.synthesize("Hello") is None
+        with pytest.raises(WorkerError):
+            tts.pool.synthesize("Hello")
+        assert worker_pids(tts.pool) == pids
+        assert tts.get_available_voices() == ["stub"]
+    finally:
+        tts.close()
+
+
+@pytest.mark.skipif(not find_library(), reason="libespeak-ng not installed")
+def test_espeak_worker_renders_pcm():
+    """Test rendering with eSpeak NG in a warm worker."""
+    tts = PooledTTS(WorkerPool(ESpeakNGTTS))
+    try:
+        started = time.monotonic()
+        audio = tts.synthesize("Hello there")
+        first = time.monotonic() - started
+        assert audio.startswith(b'RIFF') and len(audio) > 1000
+
+        started = time.monotonic()
+        tts.synthesize("Hello there")
+        assert time.monotonic() - started < max(first, 0.5)
+        assert tts.get_voice_details()
+    finally:
+        tts.close()
+
+
+def test_failed_respawn_keeps_pool_size(tmp_path):
+    """Test that a worker whose replacement fails to start is retried later."""
+    marker = str(tmp_path / 'started')
+    pool = WorkerPool(functools.partial(OneShotTTS, marker), max_jobs=1)
+    try:
+        assert pool.synthesize("One").startswith(b'RIFF')
+        # The recycle spawn fails and leaves a placeholder behind
+        deadline = time.monotonic() + 15
+        while pool._idle.qsize() == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        with pytest.raises(WorkerError):
+            pool.synthesize("Two")
+
+        os.remove(marker)
+        assert pool.synthesize("Three").startswith(b'RIFF')
+    finally:
+        pool.close()
+
+
+def test_checkout_times_out_when_no_worker_is_free():
+    """Test that waiting for a busy pool fails instead of blocking forever."""
+    pool = WorkerPool(StubTTS, timeout=0.2)
+    try:
+        worker = pool._checkout()
+        with pytest.raises(WorkerError):
+            pool.synthesize("Hello")
+        pool._checkin(worker)
+        assert pool.synthesize("Hello").startswith(b'RIFF')
+    finally:
+        pool.close()
+
+
+def test_format_stats_returned_from_workers():
+    """Test that output format stats recorded in a worker reach the parent."""
+    reset_format_stats()
+    pool = WorkerPool(ConvertingTTS)
+    try:
+        pool.synthesize("One")
+        pool.synthesize("Two")
+        assert get_format_stats()['stub']['converted'] == 2
+    finally:
+        pool.close()
+        reset_format_stats()
+
+
+def test_priority_reaches_worker_engine(tmp_path):
+    """Test that a pooled prefetcher's renders reach the provider as background work."""
+    log = tmp_path / 'requests.log'
+    tts = PooledTTS(WorkerPool(functools.partial(LimitedTTS, str(log))))
+    prefetcher = Prefetcher(tts, PhrasePredictor(["One.", "Two."]), depth=1)
+    try:
+        prefetcher.observe("One.")
+        assert prefetcher.take("Two.").startswith(b'RIFF')
+        assert tts.synthesize("Live.").startswith(b'RIFF')
+        assert log.read_text().splitlines() == [f"{PRIORITY_BACKGROUND} Two.",
+                                                f"{PRIORITY_LIVE} Live."]
+    finally:
+        prefetcher.close()
+        tts.close()